@@ -0,0 +1,8 @@
+from app_twitter.models import Tweet
+from utilities.counters import CounterBuffer
+
+likes_count_buffer = CounterBuffer(Tweet, 'likes_count')
+
+__all__ = [
+    'likes_count_buffer',
+]
@@ -3,6 +3,9 @@ from typing import Tuple
 from django.db import models, transaction
 from django.utils.translation import gettext as _
 
+from app_like.counters import likes_count_buffer
+from app_twitter.models import UserStats
+
 
 class LikeManager(models.Manager):
 
@@ -68,13 +71,13 @@ class LikeManager(models.Manager):
         if not liked:
             like.delete()
             if hasattr(instance, 'likes_count'):
-                instance.likes_count -= 1
-                instance.save(update_fields=['likes_count'])
+                transaction.on_commit(lambda: likes_count_buffer.add(instance.pk, -1))
 
         else:
             if hasattr(instance, 'likes_count'):
-                instance.likes_count += 1
-                instance.save(update_fields=['likes_count'])
+                transaction.on_commit(lambda: likes_count_buffer.add(instance.pk, 1))
+
+        UserStats.objects.increment(user.pk, likes_count=1 if liked else -1)
 
         return liked, _(f"{instance} {'removed from' if not liked else 'added to'}"
                         f" your likes list.")
@@ -95,8 +98,9 @@ class LikeManager(models.Manager):
         if previously_liked:
             previously_liked.delete()
             if hasattr(instance, 'likes_count'):
-                instance.likes_count -= 1
-                instance.save(update_fields=['likes_count'])
+                transaction.on_commit(lambda: likes_count_buffer.add(instance.pk, -1))
+
+            UserStats.objects.increment(user.pk, likes_count=-1)
 
         like, disliked = self.get_or_create(user=user, is_dislike=True, tweet_id=instance.id)
 
@@ -107,7 +111,7 @@ class LikeManager(models.Manager):
                 instance.save(update_fields=['dislikes_count'])
 
         else:
-            if hasattr(instance, 'likes_count'):
+            if hasattr(instance, 'dislikes_count'):
                 instance.dislikes_count += 1
                 instance.save(update_fields=['dislikes_count'])
 
@@ -122,7 +126,7 @@ class LikeManager(models.Manager):
         :param kwargs:
         :return list:
         """
-        return self.filter(user=user, is_dislike=False, **kwargs).values_list('object_id', flat=True)
+        return self.filter(user=user, is_dislike=False, **kwargs).values_list('tweet', flat=True)
 
     def get_disliked_object_ids(self, user, **kwargs) -> list:
         """
@@ -132,7 +136,7 @@ class LikeManager(models.Manager):
         :param kwargs:
         :return list:
         """
-        return self.filter(user=user, is_dislike=True, **kwargs).values_list('object_id', flat=True)
+        return self.filter(user=user, is_dislike=True, **kwargs).values_list('tweet', flat=True)
 
     def who_liked_it(self, instance):
         """
@@ -0,0 +1,17 @@
+from celery import shared_task
+
+from app_like.counters import likes_count_buffer
+
+
+@shared_task(name='flush_likes_count')
+def flush_likes_count():
+    """
+    write the buffered like/unlike deltas to Tweet.likes_count
+    :return:
+    """
+    return likes_count_buffer.flush()
+
+
+__all__ = [
+    'flush_likes_count',
+]
@@ -0,0 +1,132 @@
+import json
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+
+from app_notification.events import user_events
+from app_notification.models import Notification, NotificationInbox
+from utilities.content_types import content_types
+from utilities.counters import BatchBuffer
+
+
+class NotificationAggregator(BatchBuffer):
+    """
+    Coalesced notifications, e.g. "X and 41 others liked your tweet".
+
+    The notifications of one receiver, type and object within an aggregation window
+    share a row, which keeps the number of distinct actors and the latest of them.
+    The notification events are queued in redis and written by a debounced task, so a
+    burst of events becomes one ``INSERT ... ON CONFLICT DO UPDATE`` statement. Every
+    flush takes the queued events as a batch of its own, see ``BatchBuffer``.
+    """
+    EVENTS_KEY = 'notifications:events'
+    SCHEDULED_KEY = 'notifications:flush-scheduled'
+
+    def __init__(self):
+        super().__init__(self.EVENTS_KEY)
+
+    @staticmethod
+    def event(receiver, actor, _type, group, content_type, object_id, timestamp=None):
+        """
+        :param receiver: pk of the notified user
+        :param actor: pk of the user who performed the action
+        :param _type:
+        :param group:
+        :param content_type: pk of the content type of the object
+        :param object_id:
+        :param timestamp: unix time of the action, defaults to now
+        :return:
+        """
+        return json.dumps([receiver, actor, _type, group, content_type, str(object_id), timestamp or time.time()])
+
+    def add(self, events):
+        """
+        Queue notification events
+        :param events: as returned by ``event``
+        :return: True if no flush is scheduled yet, the caller schedules one
+        """
+        if not events:
+            return False
+
+        pipeline = self.connection().pipeline(transaction=False)
+        pipeline.rpush(self.EVENTS_KEY, *events)
+        pipeline.set(self.SCHEDULED_KEY, 1, nx=True, ex=max(int(settings.NOTIFICATIONS_FLUSH_DEBOUNCE * 10), 60))
+        _, scheduled = pipeline.execute()
+
+        return bool(scheduled)
+
+    @staticmethod
+    def aggregate(events):
+        """
+        Group the events by their notification row
+        :param events:
+        :return: list of the rows, see ``NotificationManager.upsert_aggregated``
+        """
+        rows = dict()
+
+        for receiver, actor, _type, group, content_type, object_id, timestamp in sorted(
+                (json.loads(event) for event in events), key=lambda event: event[-1]):
+            if receiver == actor:
+                continue
+
+            window = int(timestamp // settings.NOTIFICATIONS_AGGREGATION_WINDOW)
+            row = rows.setdefault((receiver, _type, group, content_type, object_id, window), {
+                'actors': [], 'created_at': timestamp,
+            })
+
+            if actor in row['actors']:
+                row['actors'].remove(actor)
+            row['actors'].append(actor)
+            row['updated_at'] = timestamp
+
+        return [
+            {
+                'performed_on': receiver, 'type': _type, 'group': group, 'content_type': content_type,
+                'object_id': object_id, 'window': window, 'performed_by': row['actors'][-1],
+                'actors_count': len(row['actors']),
+                'recent_actors': row['actors'][::-1][:settings.NOTIFICATIONS_RECENT_ACTORS],
+                'created_at': row['created_at'], 'updated_at': row['updated_at'],
+            }
+            for (receiver, _type, group, content_type, object_id, window), row in rows.items()
+        ]
+
+    @staticmethod
+    def user_event(row):
+        return row['performed_on'], 'notification', {
+            'type': row['type'],
+            'group': row['group'],
+            'content_type': content_types.get_for_id(row['content_type']).model,
+            'object_id': row['object_id'],
+            'actors': row['recent_actors'],
+        }
+
+    def read(self, connection, key):
+        return connection.lrange(key, 0, -1)
+
+    def apply(self, writes):
+        rows = self.aggregate(writes)
+
+        made_unread = Notification.objects.upsert_aggregated(rows)
+        NotificationInbox.objects.add_unread(Counter(made_unread))
+        transaction.on_commit(lambda: user_events.publish([self.user_event(row) for row in rows]))
+
+        return len(rows)
+
+    def flush(self):
+        """
+        Write the queued events to the database
+        :return: number of written notification rows
+        """
+        # the events queued from now on schedule the next flush
+        self.connection().delete(self.SCHEDULED_KEY)
+
+        return super().flush()
+
+
+notifications_aggregator = NotificationAggregator()
+
+__all__ = [
+    'notifications_aggregator',
+]
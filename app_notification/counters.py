@@ -0,0 +1,90 @@
+from django.conf import settings
+from django_redis import get_redis_connection
+
+
+class UnreadNotificationsCache:
+    """
+    Redis cache of the unread notifications count of the users, in front of their
+    ``NotificationInbox`` rows. A changed count is dropped and loaded from the database
+    on its next read.
+
+    Every change also bumps the version of the count, and a loaded count is only cached
+    if its version did not change since before it was loaded, so a count loaded before
+    a change and cached after it is never kept.
+    """
+
+    # caches a loaded count, unless its version changed since the load started
+    FILL_SCRIPT = """
+    if (redis.call('GET', KEYS[2]) or '') ~= ARGV[1] then
+        return 0
+    end
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return 1
+    """
+
+    @staticmethod
+    def connection():
+        return get_redis_connection('default')
+
+    @staticmethod
+    def key(user_id, group):
+        return f'notifications:inbox:{group}:{user_id}'
+
+    @classmethod
+    def version_key(cls, user_id, group):
+        return f'{cls.key(user_id, group)}:version'
+
+    def get(self, user_id, group):
+        """
+        :param user_id:
+        :param group:
+        :return: the unread count, or None if not cached
+        """
+        unread = self.connection().get(self.key(user_id, group))
+
+        return None if unread is None else max(int(unread), 0)
+
+    def version(self, user_id, group):
+        """
+        :param user_id:
+        :param group:
+        :return: version of the count, read before loading it from the database
+        """
+        version = self.connection().get(self.version_key(user_id, group))
+
+        return version.decode() if version is not None else ''
+
+    def set(self, user_id, group, unread, version):
+        """
+        :param user_id:
+        :param group:
+        :param unread: the count loaded from the database
+        :param version: as returned by ``version`` before the count was loaded
+        :return: True if the count is cached
+        """
+        return bool(self.connection().register_script(self.FILL_SCRIPT)(
+            keys=[self.key(user_id, group), self.version_key(user_id, group)],
+            args=[version, unread, settings.NOTIFICATIONS_INBOX_TTL],
+        ))
+
+    def invalidate(self, keys):
+        """
+        :param keys: ``(user_id, group)`` tuples of the changed counts
+        :return:
+        """
+        if not keys:
+            return
+
+        pipeline = self.connection().pipeline(transaction=False)
+        for user_id, group in keys:
+            pipeline.incr(self.version_key(user_id, group))
+            pipeline.expire(self.version_key(user_id, group), settings.NOTIFICATIONS_INBOX_TTL)
+            pipeline.delete(self.key(user_id, group))
+        pipeline.execute()
+
+
+unread_notifications_cache = UnreadNotificationsCache()
+
+__all__ = [
+    'unread_notifications_cache',
+]
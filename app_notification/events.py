@@ -0,0 +1,61 @@
+import json
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+
+class UserEvents:
+    """
+    Per-user channel of the notification and message events. Every event is appended to
+    the capped stream of its user, its entry id being the resume token of the event, and
+    published on the channel of the user to the open event streams, see
+    app_notification.streaming.
+    """
+
+    # appends the event to the stream and publishes it with its entry id in one round trip
+    PUBLISH_SCRIPT = """
+    local id = redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[1], '*', 'data', ARGV[3])
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+    redis.call('PUBLISH', KEYS[2], id .. ' ' .. ARGV[3])
+    return id
+    """
+
+    @staticmethod
+    def connection():
+        return get_redis_connection('default')
+
+    @staticmethod
+    def stream_key(user_id):
+        return f'events:stream:{user_id}'
+
+    @staticmethod
+    def channel(user_id):
+        return f'events:channel:{user_id}'
+
+    def publish(self, events):
+        """
+        :param events: list of ``(user_id, kind, payload)``, payload being a json serializable dict
+        :return:
+        """
+        if not events:
+            return
+
+        connection = self.connection()
+        script = connection.register_script(self.PUBLISH_SCRIPT)
+
+        pipeline = connection.pipeline(transaction=False)
+        for user_id, kind, payload in events:
+            script(
+                keys=[self.stream_key(user_id), self.channel(user_id)],
+                args=[settings.EVENTS_STREAM_LENGTH, settings.EVENTS_STREAM_TTL,
+                      json.dumps({'kind': kind, **payload}, default=str)],
+                client=pipeline,
+            )
+        pipeline.execute()
+
+
+user_events = UserEvents()
+
+__all__ = [
+    'user_events',
+]
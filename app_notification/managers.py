@@ -1,28 +1,303 @@
-from django.contrib.contenttypes.models import ContentType
-from django.db import models, transaction
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from functools import reduce
+from operator import or_
 
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.utils.timezone import now
 
-class NotificationManager(models.Manager):
+from app_notification.counters import unread_notifications_cache
 
-    @transaction.atomic
-    def notify(self, sender, receiver, model, group, _type):
-        content_type = ContentType.objects.get_for_model(model)
 
-        action, is_new = self.get_or_create(performed_by=sender, performed_on=receiver, group=group, type=_type,
-                                            content_type=content_type, object_id=model.pk)
+class NotificationQuerySet(models.QuerySet):
+    def with_read_until(self):
+        """
+        Annotate the read watermark of the inbox of every notification as ``read_until``,
+        the notifications not updated since are read without their rows being touched
+        :return:
+        """
+        inbox = self.model._meta.get_field('performed_on').related_model._meta \
+            .get_field('notification_inboxes').related_model
+        read_until = inbox.objects.filter(user=OuterRef('performed_on'), group=OuterRef('group')).values('read_until')
 
-        if not is_new:
-            action.delete()
+        return self.annotate(read_until=Subquery(read_until[:1]))
 
-        return action, is_new
+    def unread(self):
+        return self.with_read_until().filter(Q(read_until=None) | Q(updated_at__gt=F('read_until')), read_at=None)
+
+
+class NotificationManager(models.Manager):
+    def get_queryset(self):
+        return NotificationQuerySet(self.model, using=self._db)
+
+    def unread(self):
+        return self.get_queryset().unread()
 
     def get_notifications(self, user, from_date, group):
-        qs = self.filter(performed_on=user, group=group)
+        qs = self.get_queryset().with_read_until().filter(performed_on=user, group=group).select_related('performed_by')
 
         if from_date:
-            qs = qs.filter(created_at__gte=from_date)
+            qs = qs.filter(updated_at__gte=from_date)
 
         return qs.cache()
 
     def get_notification_count(self, user, from_date, group):
-        return self.get_notifications(user, from_date, group).filter(read_at=None).cache().count()
+        return self.get_notifications(user, from_date, group).unread().cache().count()
+
+    def mark_read(self, user, ids):
+        """
+        Mark the unread ones of the notifications of a user as read with one ``UPDATE``
+        :param user:
+        :param ids:
+        :return: dict of group to the number of the notifications marked as read
+        """
+        with transaction.atomic():
+            unread = list(self.unread().filter(performed_on=user, pk__in=ids)
+                          .select_for_update(of=('self',)).order_by('pk').values_list('pk', 'group'))
+
+            if unread:
+                self.filter(pk__in=[pk for pk, _ in unread]).update(read_at=now())
+
+        return Counter(group for _, group in unread)
+
+    def unread_counts(self, user_ids):
+        """
+        Count the unread notifications of the users, served by the partial index of the unread rows
+        :param user_ids:
+        :return: dict of ``(user_id, group)`` to the unread count
+        """
+        return {
+            (row['performed_on'], row['group']): row['unread_count']
+            for row in self.unread().filter(performed_on__in=user_ids)
+            .values('performed_on', 'group').annotate(unread_count=Count('pk')).order_by()
+        }
+
+    def upsert_aggregated(self, rows):
+        """
+        Insert the aggregated notifications, or merge them into the rows of their aggregation
+        window with one ``INSERT ... ON CONFLICT DO UPDATE`` statement. A merged row is unread
+        again, its actors count grows by the actors not among its recent actors, so an actor
+        dropped from them is counted again, and its recent actors keep the latest ones first.
+        The rows are locked in key order, so concurrent flushes never deadlock.
+        :param rows: as returned by ``NotificationAggregator.aggregate``
+        :return: list of the ``(performed_on_id, group)`` of the rows unread after the upsert and
+                 not before, for the unread counts. A row not updated since the read watermark of
+                 its inbox, like the row of an event queued before the inbox was read, is read.
+        """
+        if not rows:
+            return []
+
+        quote = connection.ops.quote_name
+        fields = ('id', 'performed_on', 'type', 'group', 'content_type', 'object_id', 'window', 'performed_by',
+                  'actors_count', 'recent_actors', 'created_at', 'updated_at')
+        key = fields[1:7]
+
+        table = quote(self.model._meta.db_table)
+        columns = {field: quote(self.model._meta.get_field(field).column) for field in fields}
+        actors_count, recent_actors, updated_at = columns['actors_count'], columns['recent_actors'], \
+            columns['updated_at']
+        read_at = quote(self.model._meta.get_field('read_at').column)
+
+        rows = sorted(rows, key=lambda row: tuple(row[field] for field in key))
+
+        # the merged rows keep no trace of having been read, so their state is looked up first
+        existing = {
+            pk: (was_read_at, was_modified) for pk, was_read_at, was_modified in
+            self.filter(reduce(or_, (Q(**{field: row[field] for field in key}) for row in rows)))
+            .select_for_update().order_by(*key).values_list('pk', 'read_at', 'updated_at')
+        }
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} ({", ".join(columns.values())}) '
+                f'VALUES {", ".join(["(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s::bigint[], %s, %s)"] * len(rows))} '
+                f'ON CONFLICT ({", ".join(columns[field] for field in key)}) DO UPDATE SET '
+                f'{columns["performed_by"]} = EXCLUDED.{columns["performed_by"]}, '
+                f'{actors_count} = {table}.{actors_count} + EXCLUDED.{actors_count} - cardinality(ARRAY('
+                f'SELECT unnest(EXCLUDED.{recent_actors}) INTERSECT SELECT unnest({table}.{recent_actors}))), '
+                f'{recent_actors} = (EXCLUDED.{recent_actors} || ARRAY('
+                f'SELECT actor FROM unnest({table}.{recent_actors}) WITH ORDINALITY AS recent(actor, position) '
+                f'WHERE actor <> ALL(EXCLUDED.{recent_actors}) ORDER BY position)'
+                f')[1:{int(settings.NOTIFICATIONS_RECENT_ACTORS)}], '
+                f'{updated_at} = GREATEST({table}.{updated_at}, EXCLUDED.{updated_at}), '
+                f'{read_at} = NULL '
+                f'RETURNING {columns["id"]}, {columns["performed_on"]}, {columns["group"]}, {updated_at}',
+                [
+                    value
+                    for row in rows
+                    for value in (
+                        uuid.uuid4(), *(row[field] for field in fields[1:10]),
+                        datetime.fromtimestamp(row['created_at'], timezone.utc),
+                        datetime.fromtimestamp(row['updated_at'], timezone.utc),
+                    )
+                ],
+            )
+
+            upserted = cursor.fetchall()
+
+        # the inboxes are locked after the notification rows, as mark_read does, and a watermark
+        # moved meanwhile is read once the move commits
+        inbox = self.model._meta.get_field('performed_on').related_model._meta \
+            .get_field('notification_inboxes').related_model
+        read_until = inbox.objects.lock({(performed_on, group) for _, performed_on, group, _ in upserted})
+
+        made_unread = []
+
+        for pk, performed_on, group, modified in upserted:
+            watermark = read_until[performed_on, group]
+
+            # read by the watermark, e.g. the row of an event queued before the inbox was read
+            if watermark is not None and modified <= watermark:
+                continue
+
+            if pk in existing:
+                was_read_at, was_modified = existing[pk]
+                if was_read_at is None and (watermark is None or was_modified > watermark):
+                    continue
+
+            made_unread.append((performed_on, group))
+
+        return made_unread
+
+
+class NotificationInboxManager(models.Manager):
+    def lock(self, keys):
+        """
+        Lock the inbox rows in key order, the missing ones are created first
+        :param keys: ``(user_id, group)`` tuples
+        :return: dict of ``(user_id, group)`` to the read watermark of the inbox
+        """
+        keys = sorted(set(keys))
+        if not keys:
+            return dict()
+
+        self.bulk_create([self.model(user_id=user_id, group=group) for user_id, group in keys], ignore_conflicts=True)
+
+        return {
+            (user_id, group): read_until for user_id, group, read_until in
+            self.filter(reduce(or_, (Q(user_id=user_id, group=group) for user_id, group in keys)))
+            .select_for_update().order_by('user', 'group').values_list('user', 'group', 'read_until')
+        }
+
+    def add_unread(self, deltas):
+        """
+        Apply the deltas to the unread counts, the cached counts are dropped once the transaction commits
+        :param deltas: dict of ``(user_id, group)`` to the unread count delta
+        :return:
+        """
+        deltas = {key: delta for key, delta in sorted(deltas.items()) if delta}
+        if not deltas:
+            return
+
+        quote = connection.ops.quote_name
+
+        table = quote(self.model._meta.db_table)
+        user = quote(self.model._meta.get_field('user').column)
+        group = quote(self.model._meta.get_field('group').column)
+        unread_count = quote(self.model._meta.get_field('unread_count').column)
+        updated_at = quote(self.model._meta.get_field('updated_at').column)
+
+        modified = now()
+        increments = [(*key, delta) for key, delta in deltas.items() if delta > 0]
+        decrements = [(*key, delta) for key, delta in deltas.items() if delta < 0]
+
+        with connection.cursor() as cursor:
+            if increments:
+                cursor.execute(
+                    f'INSERT INTO {table} ({user}, {group}, {unread_count}, {updated_at}) '
+                    f'VALUES {", ".join(["(%s, %s, %s, %s)"] * len(increments))} '
+                    f'ON CONFLICT ({user}, {group}) DO UPDATE '
+                    f'SET {unread_count} = {table}.{unread_count} + EXCLUDED.{unread_count}, '
+                    f'{updated_at} = EXCLUDED.{updated_at}',
+                    [value for row in increments for value in (*row, modified)],
+                )
+
+            # a user without an inbox row has no unread notification to take away
+            if decrements:
+                cursor.execute(
+                    f'UPDATE {table} SET {unread_count} = GREATEST({table}.{unread_count} + v.delta, 0), '
+                    f'{updated_at} = %s '
+                    f'FROM (VALUES {", ".join(["(%s, %s, %s)"] * len(decrements))}) AS v(user_id, name, delta) '
+                    f'WHERE {table}.{user} = v.user_id AND {table}.{group} = v.name',
+                    [modified, *(value for row in decrements for value in row)],
+                )
+
+        transaction.on_commit(lambda: unread_notifications_cache.invalidate(list(deltas)))
+
+    def unread(self, user_id, group):
+        """
+        :param user_id:
+        :param group:
+        :return: the unread count
+        """
+        if (cached := unread_notifications_cache.get(user_id, group)) is not None:
+            return cached
+
+        # read first, so a change committed while the count is loaded keeps it out of the cache
+        version = unread_notifications_cache.version(user_id, group)
+        unread = self.filter(user_id=user_id, group=group).values_list('unread_count', flat=True).first() or 0
+
+        unread_notifications_cache.set(user_id, group, unread, version)
+
+        return unread
+
+    @transaction.atomic
+    def read_until(self, user, group, until):
+        """
+        Move the read watermark of an inbox forward. The unread count is recounted under the
+        lock of the inbox row, from the unread rows updated after the watermark only.
+        :param user:
+        :param group:
+        :param until: the notifications not updated since are read, capped to now
+        :return: the unread count
+        """
+        notification = self.model._meta.get_field('user').related_model._meta \
+            .get_field('action_received').related_model
+
+        until = min(until, now())
+        inbox, _ = self.select_for_update().get_or_create(user=user, group=group)
+
+        if inbox.read_until is None or until > inbox.read_until:
+            inbox.read_until = until
+            inbox.unread_count = notification.objects.filter(performed_on=user, group=group, read_at=None,
+                                                             updated_at__gt=until).count()
+            inbox.updated_at = now()
+            inbox.save(update_fields=['read_until', 'unread_count', 'updated_at'])
+
+            transaction.on_commit(lambda: unread_notifications_cache.invalidate([(user.pk, group)]))
+
+        return inbox.unread_count
+
+    def reconcile(self, user_ids, unread_counts):
+        """
+        Fix the drifted or missing inbox rows of the users and drop their cached counts
+        :param user_ids:
+        :param unread_counts: as returned by ``NotificationManager.unread_counts``
+        :return: number of the fixed rows
+        """
+        inboxes = {(inbox.user_id, inbox.group): inbox for inbox in self.filter(user_id__in=user_ids)}
+        modified = now()
+
+        created = [
+            self.model(user_id=user_id, group=group, unread_count=unread_count, updated_at=modified)
+            for (user_id, group), unread_count in unread_counts.items() if (user_id, group) not in inboxes
+        ]
+
+        updated = []
+        for key, inbox in inboxes.items():
+            if inbox.unread_count != unread_counts.get(key, 0):
+                inbox.unread_count = unread_counts.get(key, 0)
+                inbox.updated_at = modified
+                updated.append(inbox)
+
+        with transaction.atomic():
+            self.bulk_create(created, ignore_conflicts=True)
+            self.bulk_update(updated, ['unread_count', 'updated_at'])
+
+        groups = self.model._meta.get_field('group').choices
+        unread_notifications_cache.invalidate([(user_id, group) for user_id in user_ids for group, _ in groups])
+
+        return len(created) + len(updated)
@@ -0,0 +1,79 @@
+# Generated by Django 4.0.4 on 2026-10-18 18:08
+
+import django.contrib.postgres.fields
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('app_notification', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='notification',
+            options={'ordering': ('-updated_at',)},
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='actors_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='recent_actors',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, default=list, size=None),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='window',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.RunSQL(
+            sql="""
+            UPDATE app_notification_notification
+            SET updated_at = created_at,
+                recent_actors = CASE WHEN performed_by_id IS NULL THEN '{}' ELSE ARRAY[performed_by_id] END
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        AddIndexConcurrently(
+            model_name='notification',
+            index=models.Index(fields=['performed_on', 'group', '-updated_at'], name='notification_receiver_index'),
+        ),
+        # the unique index is built without blocking the writes, then attached as the constraint
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    sql="""
+                    CREATE UNIQUE INDEX CONCURRENTLY notification_aggregation_unique ON app_notification_notification
+                        (performed_on_id, type, "group", content_type_id, object_id, "window")
+                    """,
+                    reverse_sql='DROP INDEX CONCURRENTLY IF EXISTS notification_aggregation_unique',
+                ),
+                migrations.RunSQL(
+                    sql='ALTER TABLE app_notification_notification ADD CONSTRAINT notification_aggregation_unique '
+                        'UNIQUE USING INDEX notification_aggregation_unique',
+                    reverse_sql='ALTER TABLE app_notification_notification '
+                                'DROP CONSTRAINT notification_aggregation_unique',
+                ),
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='notification',
+                    constraint=models.UniqueConstraint(
+                        fields=('performed_on', 'type', 'group', 'content_type', 'object_id', 'window'),
+                        name='notification_aggregation_unique'),
+                ),
+            ],
+        ),
+    ]
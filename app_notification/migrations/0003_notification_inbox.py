@@ -0,0 +1,47 @@
+# Generated by Django 4.0.4 on 2026-10-18 18:14
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('app_notification', '0002_notification_aggregation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationInbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group', models.CharField(choices=[('twitter', 'twitter')], default='twitter', max_length=32)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_inboxes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'group'), name='notification_inbox_unique')],
+            },
+        ),
+        AddIndexConcurrently(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('read_at', None)), fields=['performed_on', 'group'], name='notification_unread_index'),
+        ),
+        migrations.RunSQL(
+            sql="""
+            INSERT INTO app_notification_notificationinbox (user_id, "group", unread_count, updated_at)
+            SELECT performed_on_id, "group", COUNT(*), MAX(updated_at)
+            FROM app_notification_notification
+            WHERE read_at IS NULL
+            GROUP BY performed_on_id, "group"
+            ON CONFLICT (user_id, "group") DO NOTHING
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.0.4 on 2026-10-18 18:19
+
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('app_notification', '0003_notification_inbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationinbox',
+            name='read_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        RemoveIndexConcurrently(
+            model_name='notification',
+            name='notification_unread_index',
+        ),
+        AddIndexConcurrently(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('read_at', None)), fields=['performed_on', 'group', 'updated_at'], name='notification_unread_index'),
+        ),
+    ]
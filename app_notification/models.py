@@ -3,11 +3,13 @@ import uuid
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.fields import ArrayField
 from django.contrib.postgres.indexes import HashIndex
 from django.db import models
+from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 
-from app_notification.managers import NotificationManager
+from app_notification.managers import NotificationInboxManager, NotificationManager
 
 User = get_user_model()
 
@@ -35,18 +37,58 @@ class Notification(models.Model):
     object_id = models.TextField(null=False)
     content_object = GenericForeignKey('content_type', 'object_id')
 
+    # the notifications of a receiver, type and object within one aggregation window share a row,
+    # see app_notification.aggregation
+    window = models.PositiveIntegerField(null=True, editable=False)
+    actors_count = models.PositiveIntegerField(default=1)
+    recent_actors = ArrayField(models.BigIntegerField(), default=list, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(default=now)
     read_at = models.DateTimeField(default=None, null=True)
 
     objects = NotificationManager()
 
     class Meta:
-        ordering = ('-created_at',)
+        ordering = ('-updated_at',)
 
         indexes = [
             models.Index(fields=('-created_at',)),
             models.Index(fields=('content_type', 'object_id', 'type', 'group')),
+            models.Index(fields=('performed_on', 'group', '-updated_at'), name='notification_receiver_index'),
+            models.Index(fields=('performed_on', 'group', 'updated_at'), name='notification_unread_index',
+                         condition=models.Q(read_at=None)),
+        ]
+
+        constraints = [
+            models.UniqueConstraint(fields=('performed_on', 'type', 'group', 'content_type', 'object_id', 'window'),
+                                    name='notification_aggregation_unique'),
         ]
 
     def __str__(self):
         return f'{self.type}: {self.performed_by} -> {self.performed_on} at {self.created_at}'
+
+
+class NotificationInbox(models.Model):
+    """
+    Unread notifications count of a user in a group, cached in redis, see app_notification.counters
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notification_inboxes')
+    group = models.CharField(max_length=32, choices=Notification.NotificationsGroups.choices,
+                             default=Notification.NotificationsGroups.TWITTER)
+
+    unread_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(default=now)
+
+    # the notifications not updated since are read, see NotificationQuerySet.unread
+    read_until = models.DateTimeField(null=True, blank=True)
+
+    objects = NotificationInboxManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=('user', 'group'), name='notification_inbox_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.user}: {self.unread_count} unread {self.group} notifications'
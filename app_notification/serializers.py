@@ -1,4 +1,6 @@
+from django.utils.translation import gettext as _
 from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
 
 from app_notification.models import Notification
 
@@ -13,6 +15,32 @@ class ReadingNotificationSerializer(serializers.ModelSerializer):
         )
 
 
+class BulkReadingNotificationSerializer(serializers.Serializer):
+    ids = serializers.ListField(required=False, max_length=500, child=serializers.UUIDField())
+    until = serializers.DateTimeField(required=False)
+    group = serializers.ChoiceField(choices=Notification.NotificationsGroups.choices,
+                                    default=Notification.NotificationsGroups.TWITTER)
+
+    class Meta:
+        fields = (
+            'ids',
+            'until',
+            'group',
+        )
+
+    def validate(self, attrs):
+        if not attrs.get('ids') and not attrs.get('until'):
+            raise ValidationError({"message": _("ids or until is required!")})
+
+        return super().validate(attrs)
+
+    def update(self, instance, validated_data):
+        pass
+
+    def create(self, validated_data):
+        pass
+
+
 class SendNotificationSerializer(serializers.Serializer):
     users = serializers.ListField(min_length=1, required=True, child=serializers.IntegerField(min_value=1))
 
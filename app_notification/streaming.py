@@ -0,0 +1,259 @@
+import asyncio
+import json
+import re
+from urllib.parse import parse_qs
+
+import redis.asyncio as redis
+from django.conf import settings
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from app_notification.events import UserEvents
+
+entry_id_pattern = re.compile(r'^\d+-\d+$')
+
+
+def entry_key(entry_id):
+    return tuple(int(part) for part in entry_id.split('-'))
+
+
+class Listener:
+    """
+    An open event stream waiting for the events of its user
+    """
+
+    def __init__(self):
+        self.queue = asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE)
+        self.closed = asyncio.Event()
+
+    def put(self, entry_id, data):
+        # a listener too slow to keep up is closed, its client resumes from the stream
+        if self.closed.is_set():
+            return
+
+        try:
+            self.queue.put_nowait((entry_id, data))
+        except asyncio.QueueFull:
+            self.closed.set()
+
+
+class EventHub:
+    """
+    The pub/sub side of the event streams of a process. All the open streams share one
+    redis connection, which is subscribed to the channels of their users and hands every
+    published event to the listeners of its channel. The histories are read through a
+    client of their own, which outlives the reset of the subscribed connection.
+    """
+
+    def __init__(self):
+        self.client = None
+        self.pubsub = None
+        self.reader = None
+        self.listeners = dict()
+        self.history_client = None
+
+    async def subscribe(self, user_id):
+        """
+        :param user_id:
+        :return: a listener receiving the events published from now on
+        """
+        if self.client is None:
+            self.client = redis.from_url(settings.REDIS_URL)
+            self.pubsub = self.client.pubsub()
+
+        channel = UserEvents.channel(user_id)
+        listener = Listener()
+
+        if channel not in self.listeners:
+            self.listeners[channel] = set()
+            await self.pubsub.subscribe(channel)
+
+        self.listeners[channel].add(listener)
+
+        if self.reader is None:
+            self.reader = asyncio.ensure_future(self.read())
+
+        return listener
+
+    async def unsubscribe(self, user_id, listener):
+        channel = UserEvents.channel(user_id)
+        listeners = self.listeners.get(channel, set())
+        listeners.discard(listener)
+
+        if not listeners and self.listeners.pop(channel, None) is not None and self.pubsub is not None:
+            await self.pubsub.unsubscribe(channel)
+
+    async def history(self, user_id, after):
+        """
+        :param user_id:
+        :param after: entry id of the last event the client received
+        :return: list of the ``(entry_id, data)`` of the later events still in the stream
+        """
+        if self.history_client is None:
+            self.history_client = redis.from_url(settings.REDIS_URL)
+
+        entries = await self.history_client.xrange(UserEvents.stream_key(user_id), min=after)
+
+        return [(entry_id.decode(), fields[b'data'].decode()) for entry_id, fields in entries
+                if entry_key(entry_id.decode()) > entry_key(after)]
+
+    async def read(self):
+        try:
+            while True:
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None:
+                    continue
+
+                entry_id, data = message['data'].decode().split(' ', 1)
+
+                for listener in list(self.listeners.get(message['channel'].decode(), ())):
+                    listener.put(entry_id, data)
+
+        except Exception:
+            # the open streams are closed and their clients resume on a new connection
+            listeners = [listener for channel_listeners in self.listeners.values() for listener in channel_listeners]
+            pubsub, self.pubsub, self.client, self.reader, self.listeners = self.pubsub, None, None, None, dict()
+
+            for listener in listeners:
+                listener.closed.set()
+
+            await pubsub.reset()
+
+
+class EventStreamApplication:
+    """
+    ASGI application serving the notification and message events of the requesting user as
+    server-sent events at ``path``, any other request is passed to ``application``.
+
+    The client authenticates with its access token in the ``Authorization`` header or the
+    ``token`` query parameter, and resumes after a reconnect with the id of the last event
+    it received in the ``Last-Event-ID`` header or the ``last_event_id`` query parameter.
+    An idle stream costs a queue and a task, so a process holds many thousands of them.
+    """
+
+    def __init__(self, application, path='/events/'):
+        self.application = application
+        self.path = path
+        self.hub = EventHub()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] != self.path:
+            return await self.application(scope, receive, send)
+
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        query = {name: values[0] for name, values in parse_qs(scope['query_string'].decode('latin-1')).items()}
+
+        user_id = self.authenticate(headers.get('authorization', '').removeprefix('Bearer ') or query.get('token'))
+        if user_id is None:
+            return await self.reject(send)
+
+        last_event_id = headers.get('last-event-id') or query.get('last_event_id')
+        if last_event_id and not entry_id_pattern.match(last_event_id):
+            last_event_id = None
+
+        listener = await self.hub.subscribe(user_id)
+        disconnected = asyncio.ensure_future(self.wait_disconnect(receive))
+        closed = asyncio.ensure_future(listener.closed.wait())
+        getter = None
+
+        try:
+            # subscribed first, so no event falls between the history and the live events
+            history = await self.hub.history(user_id, last_event_id) if last_event_id else []
+
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [
+                    (b'content-type', b'text/event-stream'),
+                    (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no'),
+                ],
+            })
+
+            for entry_id, data in history:
+                await self.send_event(send, entry_id, data)
+                last_event_id = entry_id
+
+            while True:
+                getter = getter or asyncio.ensure_future(listener.queue.get())
+
+                done, _ = await asyncio.wait({getter, disconnected, closed}, timeout=settings.EVENTS_KEEPALIVE,
+                                             return_when=asyncio.FIRST_COMPLETED)
+
+                if disconnected in done:
+                    break
+
+                elif closed in done:
+                    # the queued events come before the dropped ones, the client resumes after them
+                    queued = [getter.result()] if getter in done else []
+                    while not listener.queue.empty():
+                        queued.append(listener.queue.get_nowait())
+
+                    for entry_id, data in queued:
+                        if last_event_id is None or entry_key(entry_id) > entry_key(last_event_id):
+                            await self.send_event(send, entry_id, data)
+                            last_event_id = entry_id
+                    break
+
+                elif getter in done:
+                    entry_id, data = getter.result()
+                    getter = None
+
+                    if last_event_id is None or entry_key(entry_id) > entry_key(last_event_id):
+                        await self.send_event(send, entry_id, data)
+                        last_event_id = entry_id
+
+                else:
+                    await send({'type': 'http.response.body', 'body': b': keepalive\n\n', 'more_body': True})
+
+            if not disconnected.done():
+                await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+        finally:
+            for task in (getter, disconnected, closed):
+                if task is not None:
+                    task.cancel()
+
+            await self.hub.unsubscribe(user_id, listener)
+
+    @staticmethod
+    def authenticate(token):
+        """
+        :param token: raw access token
+        :return: id of the user of a valid token, or None
+        """
+        if not token:
+            return None
+
+        try:
+            return AccessToken(token)[api_settings.USER_ID_CLAIM]
+        except (TokenError, KeyError):
+            return None
+
+    @staticmethod
+    async def reject(send):
+        await send({
+            'type': 'http.response.start',
+            'status': 401,
+            'headers': [(b'content-type', b'application/json')],
+        })
+        await send({'type': 'http.response.body', 'body': json.dumps({'detail': 'authentication required'}).encode()})
+
+    @staticmethod
+    async def send_event(send, entry_id, data):
+        await send({
+            'type': 'http.response.body',
+            'body': f'id: {entry_id}\ndata: {data}\n\n'.encode(),
+            'more_body': True,
+        })
+
+    @staticmethod
+    async def wait_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+
+__all__ = [
+    'EventStreamApplication',
+]
@@ -0,0 +1,31 @@
+from celery import shared_task
+from django.conf import settings
+
+from app_notification.aggregation import notifications_aggregator
+from utilities.decorators import pickle_input
+
+
+@pickle_input
+@shared_task(name='flush_notifications')
+def flush_notifications():
+    """
+    write the queued notification events to the aggregated notifications
+    :return:
+    """
+    return notifications_aggregator.flush()
+
+
+def queue_notifications(events):
+    """
+    queue notification events, the first of a burst schedules their flush
+    :param events: as returned by ``NotificationAggregator.event``
+    :return:
+    """
+    if notifications_aggregator.add(events):
+        flush_notifications(celery_kwargs={'countdown': settings.NOTIFICATIONS_FLUSH_DEBOUNCE})
+
+
+__all__ = [
+    'flush_notifications',
+    'queue_notifications',
+]
@@ -0,0 +1,104 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils.timezone import now
+from django_redis import get_redis_connection
+
+from app_notification.aggregation import notifications_aggregator
+from app_notification.models import Notification, NotificationInbox
+from app_twitter.models import Tweet
+from utilities.content_types import content_types
+
+User = get_user_model()
+
+
+class NotificationAggregatorTest(TestCase):
+    def setUp(self):
+        get_redis_connection('default').flushdb()
+
+        self.receiver = User.objects.create_user(username='receiver', password='x', email='receiver@x.com')
+        self.actors = [User.objects.create_user(username=f'actor{index}', password='x', email=f'actor{index}@x.com')
+                       for index in range(3)]
+        self.tweet = Tweet.objects.create(author=self.receiver, body='tweet')
+
+    def queue(self, actor, timestamp=None):
+        notifications_aggregator.add([notifications_aggregator.event(
+            self.receiver.pk, actor.pk, Notification.NotificationsTypes.LIKE, Notification.NotificationsGroups.TWITTER,
+            content_types.get_for_model(Tweet).pk, self.tweet.pk, timestamp,
+        )])
+
+    def flush(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            notifications_aggregator.flush()
+
+    def read_all(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            NotificationInbox.objects.read_until(self.receiver, Notification.NotificationsGroups.TWITTER, now())
+
+    def assertUnreadCount(self, unread_count):
+        self.assertEqual(NotificationInbox.objects.get(user=self.receiver).unread_count, unread_count)
+        self.assertEqual(Notification.objects.unread().filter(performed_on=self.receiver).count(), unread_count)
+
+    def assertNotified(self, actors_count, unread_count):
+        notification = Notification.objects.get(performed_on=self.receiver)
+        inbox = NotificationInbox.objects.get(user=self.receiver)
+
+        self.assertEqual(notification.actors_count, actors_count)
+        self.assertEqual(inbox.unread_count, unread_count)
+
+    def test_overlapping_flushes_take_separate_batches(self):
+        self.queue(self.actors[0])
+        first = notifications_aggregator.take()
+
+        # a flush running while the first one has not applied its batch yet
+        self.queue(self.actors[1])
+        with self.captureOnCommitCallbacks(execute=True):
+            notifications_aggregator.flush()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            notifications_aggregator.apply_batch(first)
+
+        self.assertNotified(actors_count=2, unread_count=1)
+
+    def test_batch_is_applied_once(self):
+        self.queue(self.actors[0])
+        self.queue(self.actors[1])
+        batch_id = notifications_aggregator.take()
+        key = notifications_aggregator.batch_key(batch_id)
+        events = notifications_aggregator.read(notifications_aggregator.connection(), key)
+
+        # a flush applying the batch while another one already did
+        notifications_aggregator.apply_batch(batch_id)
+        get_redis_connection('default').rpush(key, *events)
+
+        self.assertEqual(notifications_aggregator.apply_batch(batch_id), 0)
+        self.assertNotified(actors_count=2, unread_count=1)
+
+    def test_event_queued_before_read_all_flushes_read(self):
+        self.queue(self.actors[0], timestamp=time.time() - 1)
+        self.read_all()
+        self.flush()
+
+        self.assertUnreadCount(0)
+
+    def test_read_row_merging_an_earlier_event_stays_read(self):
+        self.queue(self.actors[0], timestamp=time.time() - 2)
+        self.flush()
+        self.assertUnreadCount(1)
+
+        self.queue(self.actors[1], timestamp=time.time() - 1)
+        self.read_all()
+        self.flush()
+
+        self.assertUnreadCount(0)
+
+    def test_event_after_read_all_is_unread(self):
+        self.queue(self.actors[0], timestamp=time.time() - 2)
+        self.flush()
+        self.read_all()
+
+        self.queue(self.actors[1], timestamp=time.time() + 1)
+        self.flush()
+
+        self.assertUnreadCount(1)
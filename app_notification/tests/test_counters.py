@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django_redis import get_redis_connection
+from rest_framework.test import APIClient
+
+from app_notification.counters import unread_notifications_cache
+from app_notification.models import Notification, NotificationInbox
+
+User = get_user_model()
+
+GROUP = Notification.NotificationsGroups.TWITTER
+
+
+class UnreadNotificationsCacheTest(TestCase):
+    def setUp(self):
+        get_redis_connection('default').flushdb()
+
+        self.user = User.objects.create_user(username='user', password='x', email='user@x.com')
+
+    def add_unread(self, delta):
+        with self.captureOnCommitCallbacks(execute=True):
+            NotificationInbox.objects.add_unread({(self.user.pk, GROUP): delta})
+
+    def test_count_follows_the_changes(self):
+        self.assertEqual(NotificationInbox.objects.unread(self.user.pk, GROUP), 0)
+
+        self.add_unread(2)
+        self.assertEqual(NotificationInbox.objects.unread(self.user.pk, GROUP), 2)
+        self.assertEqual(unread_notifications_cache.get(self.user.pk, GROUP), 2)
+
+        self.add_unread(-1)
+        self.assertEqual(NotificationInbox.objects.unread(self.user.pk, GROUP), 1)
+
+    def test_count_loaded_before_a_change_is_not_cached(self):
+        version = unread_notifications_cache.version(self.user.pk, GROUP)
+        stale = NotificationInbox.objects.filter(user=self.user).count()
+
+        # a change committed between the load and the fill
+        self.add_unread(1)
+
+        self.assertFalse(unread_notifications_cache.set(self.user.pk, GROUP, stale, version))
+        self.assertEqual(NotificationInbox.objects.unread(self.user.pk, GROUP), 1)
+
+
+class NotificationsCountViewTest(TestCase):
+    def setUp(self):
+        get_redis_connection('default').flushdb()
+
+        self.user = User.objects.create_user(username='user', password='x', email='user@x.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('app_twitter:notifications_count')
+
+    def test_etag_changes_with_the_count(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+
+        self.assertEqual(response.data, {'count': 0})
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # within the same second as the previous response
+        with self.captureOnCommitCallbacks(execute=True):
+            NotificationInbox.objects.add_unread({(self.user.pk, Notification.NotificationsGroups.TWITTER): 1})
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'count': 1})
+        self.assertNotEqual(response['ETag'], etag)
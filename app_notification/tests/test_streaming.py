@@ -0,0 +1,21 @@
+from django.test import SimpleTestCase
+from django_redis import get_redis_connection
+
+from app_notification.events import user_events
+from app_notification.streaming import EventHub
+
+
+class EventHubTest(SimpleTestCase):
+    def setUp(self):
+        get_redis_connection('default').flushdb()
+
+    async def test_history_without_the_subscribed_connection(self):
+        user_events.publish([(1, 'notification', {'index': 0}), (1, 'notification', {'index': 1})])
+        first, second = [entry_id.decode() for entry_id, _ in
+                         get_redis_connection('default').xrange(user_events.stream_key(1))]
+
+        # the state the reader leaves the hub in after losing its connection
+        hub = EventHub()
+        hub.client = hub.pubsub = None
+
+        self.assertEqual(await hub.history(1, first), [(second, '{"kind": "notification", "index": 1}')])
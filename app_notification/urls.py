@@ -6,4 +6,5 @@ app_name = 'app_notification'
 
 urlpatterns = [
     path('read/', read_notification, name='read_notification'),
+    path('read/bulk/', bulk_read_notifications, name='bulk_read_notifications'),
 ]
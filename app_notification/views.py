@@ -1,12 +1,11 @@
 from django.db import transaction
-from django.utils.timezone import now
 from rest_framework import status
 from rest_framework.generics import UpdateAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from app_notification.models import Notification
-from app_notification.serializers import ReadingNotificationSerializer
+from app_notification.models import Notification, NotificationInbox
+from app_notification.serializers import BulkReadingNotificationSerializer, ReadingNotificationSerializer
 
 
 class ReadNotificationView(UpdateAPIView):
@@ -19,27 +18,54 @@ class ReadNotificationView(UpdateAPIView):
     http_method_names = ['put']
     lookup_field = 'id'
 
-    def get_queryset(self):
-        return super().get_queryset().filter(performed_on=self.request.user, read_at__isnull=True)
+    @staticmethod
+    def mark_read(user, ids):
+        """
+        :param user:
+        :param ids:
+        :return: dict of group to the number of the notifications marked as read
+        """
+        with transaction.atomic():
+            read = Notification.objects.mark_read(user, ids)
+            NotificationInbox.objects.add_unread({(user.pk, group): -count for group, count in read.items()})
+
+        return read
 
     def update(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        _id = serializer.validated_data['id']
-
-        qs = self.get_queryset().filter(id=_id)
 
-        if qs.exists():
-            with transaction.atomic():
-                instance = qs.select_for_update().first()
-                instance.read_at = now()
-                instance.save()
+        self.mark_read(request.user, [serializer.validated_data['id']])
 
         return Response(status=status.HTTP_200_OK)
 
 
+class BulkReadNotificationView(ReadNotificationView):
+    serializer_class = BulkReadingNotificationSerializer
+
+    def update(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        ids = serializer.validated_data.get('ids')
+        until = serializer.validated_data.get('until')
+        group = serializer.validated_data['group']
+
+        read = self.mark_read(request.user, ids) if ids else dict()
+
+        if until:
+            NotificationInbox.objects.read_until(request.user, group, until)
+
+        return Response(status=status.HTTP_200_OK, data={
+            'read': sum(read.values()),
+            'unread': NotificationInbox.objects.unread(request.user.pk, group),
+        })
+
+
 read_notification = ReadNotificationView.as_view()
+bulk_read_notifications = BulkReadNotificationView.as_view()
 
 __all__ = [
     'read_notification',
+    'bulk_read_notifications',
 ]
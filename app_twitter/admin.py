@@ -8,3 +8,4 @@ admin.site.register(models.Conversation)
 admin.site.register(models.BlockList)
 admin.site.register(models.Mention)
 admin.site.register(models.WaitingForResponse)
+admin.site.register(models.UserStats)
@@ -0,0 +1,442 @@
+import fcntl
+import heapq
+import json
+import mmap
+import os
+import struct
+import threading
+from bisect import bisect_left
+from time import monotonic
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django_redis import get_redis_connection
+
+from app_twitter.models import Hashtag
+from utilities.text import normalize_text
+
+User = get_user_model()
+
+
+class AutocompleteSnapshot:
+    """
+    Memory-mapped, read-only snapshot of the autocomplete entries.
+
+    The entries are sorted by their key (``@`` or ``#`` followed by the folded
+    username, full name or hashtag), so the entries of a prefix are a range
+    found with two binary searches. The best entries of the prefixes with more
+    than ``SCAN_LIMIT`` entries are precomputed in a second sorted table.
+
+    Layout, all integers little endian::
+
+        header      magic, generation, entries count, heavy prefixes count
+        offsets     uint32 offset of every entry, then of every heavy prefix
+        entry       uint64 weight, uint16 key length, key, uint16 payload length, json payload
+        heavy       uint16 prefix length, prefix, uint8 count, uint32 entry index * count
+    """
+    MAGIC = b'ACS2'
+    HEADER = struct.Struct('<4sIII')
+    OFFSET = struct.Struct('<I')
+    WEIGHT = struct.Struct('<Q')
+    LENGTH = struct.Struct('<H')
+
+    SCAN_LIMIT = 256
+    HEAVY_SIZE = 32
+
+    def __init__(self, path):
+        self.path = path
+
+        with open(path, 'rb') as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.generation, self.count, self.heavy_count = self.HEADER.unpack_from(self.buffer, 0)
+        if magic != self.MAGIC:
+            raise ValueError(f'{path} is not an autocomplete snapshot')
+
+    @classmethod
+    def read_generation(cls, path):
+        """
+        :param path:
+        :return: generation of the snapshot at the path, None if there is none
+        """
+        try:
+            with open(path, 'rb') as file:
+                magic, generation, _, _ = cls.HEADER.unpack(file.read(cls.HEADER.size))
+        except (FileNotFoundError, struct.error):
+            return None
+
+        return generation if magic == cls.MAGIC else None
+
+    def offset(self, index):
+        return self.OFFSET.unpack_from(self.buffer, self.HEADER.size + index * self.OFFSET.size)[0]
+
+    def read_bytes(self, position):
+        length, = self.LENGTH.unpack_from(self.buffer, position)
+        position += self.LENGTH.size
+        return self.buffer[position:position + length], position + length
+
+    def key(self, index):
+        return self.read_bytes(self.offset(index) + self.WEIGHT.size)[0]
+
+    def entry(self, index):
+        """
+        :param index:
+        :return: tuple of weight and payload bytes
+        """
+        position = self.offset(index)
+        weight, = self.WEIGHT.unpack_from(self.buffer, position)
+        _, position = self.read_bytes(position + self.WEIGHT.size)
+        return weight, self.read_bytes(position)[0]
+
+    def heavy_prefix(self, index):
+        return self.read_bytes(self.offset(self.count + index))[0]
+
+    def search(self, prefix):
+        """
+        Returns the best entries starting with the prefix
+        :param prefix: folded prefix bytes
+        :return: list of (weight, payload bytes), best first
+        """
+        heavy = bisect_left(_Keys(self.heavy_prefix, self.heavy_count), prefix)
+        if heavy < self.heavy_count and self.heavy_prefix(heavy) == prefix:
+            _, position = self.read_bytes(self.offset(self.count + heavy))
+            size = self.buffer[position]
+            indexes = struct.unpack_from(f'<{size}I', self.buffer, position + 1)
+            return [self.entry(index) for index in indexes]
+
+        keys = _Keys(self.key, self.count)
+        start = bisect_left(keys, prefix)
+
+        entries = []
+        for index in range(start, min(start + self.SCAN_LIMIT, self.count)):
+            if not keys[index].startswith(prefix):
+                break
+            entries.append(self.entry(index))
+
+        return heapq.nlargest(self.HEAVY_SIZE, entries, key=lambda entry: entry[0])
+
+    @classmethod
+    def write(cls, path, entries, generation):
+        """
+        Write a snapshot of the entries, atomically replacing the existing one
+        :param path:
+        :param entries: iterable of (key bytes, weight, payload bytes)
+        :param generation: the overlay generation the entries were read in
+        :return: number of entries
+        """
+        entries = sorted(entries, key=lambda entry: entry[0])
+        keys = [key for key, _, _ in entries]
+        weights = [weight for _, weight, _ in entries]
+
+        heavy = []
+        ranges = [(0, len(entries))]
+        length = 1
+
+        # only the prefixes of heavy ranges can be heavy themselves
+        while ranges:
+            next_ranges = []
+
+            for start, stop in ranges:
+                index = start
+                while index < stop:
+                    if len(keys[index]) < length:
+                        index += 1
+                        continue
+
+                    prefix = keys[index][:length]
+                    end = bisect_left(keys, prefix + b'\xff', index, stop)
+
+                    if end - index > cls.SCAN_LIMIT:
+                        best = heapq.nlargest(cls.HEAVY_SIZE, range(index, end), key=weights.__getitem__)
+                        heavy.append((prefix, best))
+                        next_ranges.append((index, end))
+
+                    index = end
+
+            ranges = next_ranges
+            length += 1
+
+        heavy.sort()
+
+        body = bytearray()
+        offsets = []
+        base = cls.HEADER.size + (len(entries) + len(heavy)) * cls.OFFSET.size
+
+        for key, weight, payload in entries:
+            offsets.append(base + len(body))
+            body += cls.WEIGHT.pack(weight) + cls.LENGTH.pack(len(key)) + key + \
+                cls.LENGTH.pack(len(payload)) + payload
+
+        for prefix, best in heavy:
+            offsets.append(base + len(body))
+            body += cls.LENGTH.pack(len(prefix)) + prefix + bytes([len(best)]) + struct.pack(f'<{len(best)}I', *best)
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temporary = f'{path}.{os.getpid()}.tmp'
+
+        with open(temporary, 'wb') as file:
+            file.write(cls.HEADER.pack(cls.MAGIC, generation, len(entries), len(heavy)))
+            file.write(struct.pack(f'<{len(offsets)}I', *offsets))
+            file.write(body)
+            # on disk before it is renamed, a crash never leaves a partly written snapshot at the path
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(temporary, path)
+
+        return len(entries)
+
+
+class _Keys:
+    """
+    Sequence view of the keys of a snapshot for ``bisect``
+    """
+
+    def __init__(self, getter, length):
+        self.getter = getter
+        self.length = length
+
+    def __getitem__(self, index):
+        return self.getter(index)
+
+    def __len__(self):
+        return self.length
+
+
+class Autocomplete:
+    """
+    Prefix completion of ``@username`` / ``@full name`` and ``#hashtag``, weighted by the
+    followers count and the usage count, answered without a database query.
+
+    The processes map a snapshot built from the database, so the workers of a host share its
+    pages. New and updated users and new hashtags are written to a redis overlay of the
+    current generation, which the processes copy every ``AUTOCOMPLETE_OVERLAY_REFRESH`` seconds.
+
+    The snapshot is only built by the ``build_autocomplete`` task every build interval, or by
+    the ``build_autocomplete`` command, which start a new generation and replace the snapshot
+    file atomically. A snapshot records the generation it was built in and holds every entry
+    of the older generations, so a process adds the overlays from its snapshot generation on,
+    and remaps the snapshot once the file is replaced.
+    """
+    GENERATION_KEY = 'autocomplete:generation'
+    OVERLAY_KEY = 'autocomplete:overlay:{}'
+
+    USER = '@'
+    HASHTAG = '#'
+
+    # adds the entries to the overlay of the current generation
+    ADD_SCRIPT = """
+    local key = string.gsub(KEYS[1], '{}', redis.call('GET', KEYS[2]) or '0')
+    redis.call('HSET', key, unpack(ARGV, 2))
+    redis.call('EXPIRE', key, ARGV[1])
+    return 1
+    """
+
+    # returns the current generation, then the entries of the overlays from the given generation on
+    OVERLAYS_SCRIPT = """
+    local generation = tonumber(redis.call('GET', KEYS[2]) or '0')
+    local entries = {generation}
+    for overlay = tonumber(ARGV[1]) or generation, generation do
+        local key = string.gsub(KEYS[1], '{}', overlay)
+        for _, value in ipairs(redis.call('HGETALL', key)) do
+            entries[#entries + 1] = value
+        end
+    end
+    return entries
+    """
+
+    lock = threading.Lock()
+    snapshot = None
+    snapshot_stat = None
+    overlay = []
+    overlay_users = set()
+    refreshed_at = None
+
+    @staticmethod
+    def connection():
+        return get_redis_connection('default')
+
+    @staticmethod
+    def fold(text):
+        return normalize_text(text)
+
+    @classmethod
+    def key(cls, kind, text):
+        return f'{kind}{cls.fold(text)}'.encode()
+
+    @staticmethod
+    def dumps(payload):
+        return json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode()
+
+    @classmethod
+    def user_entries(cls, pk, username, fullname, avatar, followers_count):
+        payload = cls.dumps({'kind': cls.USER, 'id': pk, 'username': username, 'fullname': fullname,
+                             'avatar': avatar or None})
+
+        yield cls.key(cls.USER, username), followers_count or 0, payload
+        if fullname:
+            yield cls.key(cls.USER, fullname), followers_count or 0, payload
+
+    @classmethod
+    def hashtag_entries(cls, name, usage_count):
+        yield cls.key(cls.HASHTAG, name.lstrip('#')), usage_count, cls.dumps({'kind': cls.HASHTAG, 'name': name})
+
+    @classmethod
+    def entries(cls):
+        users = User.objects.filter(is_active=True).order_by() \
+            .values_list('pk', 'username', 'fullname', 'avatar', 'stats__followers_count')
+
+        for pk, username, fullname, avatar, followers_count in users.iterator(chunk_size=10_000):
+            avatar = avatar and User._meta.get_field('avatar').storage.url(avatar)
+            yield from cls.user_entries(pk, username, fullname, avatar, followers_count)
+
+        hashtags = Hashtag.objects.order_by().values_list('name', 'usage_count')
+
+        for name, usage_count in hashtags.iterator(chunk_size=10_000):
+            yield from cls.hashtag_entries(name, usage_count)
+
+    @classmethod
+    def advance(cls):
+        """
+        Start a new generation, every host rebuilds its snapshot on its next refresh
+        :return: the new generation
+        """
+        return cls.connection().incr(cls.GENERATION_KEY)
+
+    @classmethod
+    def build(cls):
+        """
+        Rebuild the snapshot from the database, unless another process is rebuilding it
+        or it is already built in the current generation
+        :return: number of entries, None if the snapshot was not rebuilt
+        """
+        path = settings.AUTOCOMPLETE_SNAPSHOT_PATH
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        with open(f'{path}.lock', 'w') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+
+            # read before the database, the entries of the older generations are all in the database
+            generation = int(cls.connection().get(cls.GENERATION_KEY) or 0)
+
+            if AutocompleteSnapshot.read_generation(path) == generation:
+                return None
+
+            return AutocompleteSnapshot.write(path, cls.entries(), generation)
+
+    @classmethod
+    def add(cls, entries):
+        entries = [value for key, weight, payload in entries for value in (key, f'{weight}:'.encode() + payload)]
+
+        if entries:
+            cls.connection().register_script(cls.ADD_SCRIPT)(keys=[cls.OVERLAY_KEY, cls.GENERATION_KEY],
+                                                              args=[settings.AUTOCOMPLETE_OVERLAY_TTL, *entries])
+
+    @classmethod
+    def add_user(cls, user, followers_count=0):
+        """
+        Add a new or updated user to the overlay, the entries of its old names are hidden
+        :param user:
+        :param followers_count:
+        :return:
+        """
+        transaction.on_commit(lambda: cls.add(cls.user_entries(
+            user.pk, user.username, user.fullname, user.avatar.url if user.avatar else None, followers_count)))
+
+    @classmethod
+    def add_hashtags(cls, names):
+        transaction.on_commit(lambda: cls.add(entry for name in names for entry in cls.hashtag_entries(name, 1)))
+
+    @classmethod
+    def refresh(cls):
+        """
+        Remap a replaced snapshot and copy the overlays, at most once per refresh interval.
+        The snapshot is never built here, without one the overlays are all there is.
+        :return:
+        """
+        now = monotonic()
+        if cls.refreshed_at is not None and now - cls.refreshed_at < settings.AUTOCOMPLETE_OVERLAY_REFRESH:
+            return
+
+        with cls.lock:
+            if cls.refreshed_at is not None and now - cls.refreshed_at < settings.AUTOCOMPLETE_OVERLAY_REFRESH:
+                return
+
+            try:
+                stat = os.stat(settings.AUTOCOMPLETE_SNAPSHOT_PATH)
+                stat = stat.st_ino, stat.st_mtime_ns
+            except FileNotFoundError:
+                stat = None
+
+            if stat != cls.snapshot_stat:
+                cls.snapshot = AutocompleteSnapshot(settings.AUTOCOMPLETE_SNAPSHOT_PATH) if stat else None
+                cls.snapshot_stat = stat
+
+            since = cls.snapshot.generation if cls.snapshot else ''
+            _, *entries = cls.connection().register_script(cls.OVERLAYS_SCRIPT)(
+                keys=[cls.OVERLAY_KEY, cls.GENERATION_KEY], args=[since])
+
+            overlay = dict()
+            for key, value in zip(entries[::2], entries[1::2]):
+                weight, payload = value.split(b':', 1)
+                overlay[key] = (int(weight), payload)
+
+            cls.overlay = sorted((key, weight, payload) for key, (weight, payload) in overlay.items())
+            cls.overlay_users = {payload.get('id') for payload in (json.loads(payload) for _, _, payload in cls.overlay)
+                                 if payload['kind'] == cls.USER}
+            cls.refreshed_at = now
+
+    @classmethod
+    def complete(cls, term, limit=10):
+        """
+        Returns the best completions of the term, ``@`` or ``#`` restrict it to the
+        users or the hashtags.
+        :param term:
+        :param limit:
+        :return: list of payload dicts, best first
+        """
+        cls.refresh()
+
+        text = cls.fold(term)
+        kinds = (text[0],) if text[:1] in (cls.USER, cls.HASHTAG) else (cls.USER, cls.HASHTAG)
+        text = text.lstrip(cls.USER + cls.HASHTAG)
+
+        candidates = []
+        for kind in kinds:
+            prefix = f'{kind}{text}'.encode()
+
+            if cls.snapshot:
+                candidates.extend((weight, payload, False) for weight, payload in cls.snapshot.search(prefix))
+
+            start = bisect_left(cls.overlay, (prefix,))
+            for key, weight, payload in cls.overlay[start:]:
+                if not key.startswith(prefix):
+                    break
+                candidates.append((weight, payload, True))
+
+        results, seen = [], set()
+        for _, payload, is_overlay in sorted(candidates, key=lambda candidate: candidate[0], reverse=True):
+            payload = json.loads(payload)
+            identity = payload['kind'], payload.get('id') or payload.get('name')
+
+            # the snapshot entries of an updated user may carry its old names
+            if not is_overlay and payload['kind'] == cls.USER and payload.get('id') in cls.overlay_users:
+                continue
+
+            if identity not in seen:
+                seen.add(identity)
+                results.append(payload)
+
+                if len(results) == limit:
+                    break
+
+        return results
+
+
+__all__ = [
+    'Autocomplete',
+]
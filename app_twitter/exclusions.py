@@ -0,0 +1,134 @@
+from django.conf import settings
+from django.db import transaction
+from django_redis import get_redis_connection
+
+from app_twitter.models import BlockList, MutedUsers
+
+
+class ExclusionSet:
+    """
+    Authors whose tweets are hidden from a viewer, maintained incrementally by
+    blocking and muting.
+
+    Every viewer has a redis hash of ``author id -> reasons`` bitmask, so
+    removing one reason (e.g. unmuting a blocked author) keeps the others. The
+    sentinel field marks a built hash, cold hashes are built from the database
+    on their first read.
+    """
+    KEY = 'exclusions:{}'
+    SENTINEL = '-'
+
+    BLOCKED = 1
+    BLOCKED_BY = 2
+    MUTED = 4
+
+    # sets or clears a reason bit of an author only if the hash is already built
+    UPDATE_SCRIPT = """
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        return 0
+    end
+    local reasons = tonumber(redis.call('HGET', KEYS[1], ARGV[1]) or '0')
+    local reason = tonumber(ARGV[2])
+    local is_set = math.floor(reasons / reason) % 2 == 1
+    if ARGV[3] == '1' and not is_set then
+        reasons = reasons + reason
+    elseif ARGV[3] == '0' and is_set then
+        reasons = reasons - reason
+    end
+    if reasons == 0 then
+        redis.call('HDEL', KEYS[1], ARGV[1])
+    else
+        redis.call('HSET', KEYS[1], ARGV[1], reasons)
+    end
+    return 1
+    """
+
+    @classmethod
+    def key(cls, user_id):
+        return cls.KEY.format(user_id)
+
+    @staticmethod
+    def connection():
+        return get_redis_connection('default')
+
+    @classmethod
+    def build(cls, user_id):
+        """
+        Rebuild the exclusions of a (cold) viewer from the database
+        :param user_id:
+        :return: dict of author id to reasons
+        """
+        exclusions = dict()
+
+        for reason, author_ids in (
+                (cls.BLOCKED, BlockList.objects.filter(blocker_id=user_id).values_list('blocked', flat=True)),
+                (cls.BLOCKED_BY, BlockList.objects.filter(blocked_id=user_id).values_list('blocker', flat=True)),
+                (cls.MUTED, MutedUsers.objects.filter(muter_id=user_id).values_list('muted', flat=True)),
+        ):
+            for author_id in author_ids:
+                exclusions[author_id] = exclusions.get(author_id, 0) | reason
+
+        key = cls.key(user_id)
+
+        pipeline = cls.connection().pipeline()
+        pipeline.delete(key)
+        pipeline.hset(key, mapping={cls.SENTINEL: 0, **exclusions})
+        pipeline.expire(key, settings.EXCLUSIONS_TTL)
+        pipeline.execute()
+
+        return exclusions
+
+    @classmethod
+    def excluded(cls, user, author_ids):
+        """
+        Returns the given authors that are hidden from the viewer, the cost only
+        depends on the number of given authors and not on the size of the set.
+        :param user:
+        :param author_ids:
+        :return: set of author ids
+        """
+        author_ids = list(set(author_ids))
+
+        if not user.is_authenticated or not author_ids:
+            return set()
+
+        key = cls.key(user.pk)
+
+        pipeline = cls.connection().pipeline()
+        pipeline.hmget(key, cls.SENTINEL, *author_ids)
+        pipeline.expire(key, settings.EXCLUSIONS_TTL)
+        (built, *reasons), _ = pipeline.execute()
+
+        if built is None:
+            exclusions = cls.build(user.pk)
+            return {author_id for author_id in author_ids if author_id in exclusions}
+
+        return {author_id for author_id, reason in zip(author_ids, reasons) if reason is not None}
+
+    @classmethod
+    def update(cls, user_id, author_id, reason, add):
+        """
+        Set or clear a reason of an author once the current transaction commits,
+        so a rolled back block or mute never reaches the hash.
+        :param user_id:
+        :param author_id:
+        :param reason:
+        :param add:
+        :return:
+        """
+        transaction.on_commit(lambda: cls.connection().register_script(cls.UPDATE_SCRIPT)(
+            keys=[cls.key(user_id)], args=[author_id, reason, int(add)]))
+
+    @classmethod
+    def block(cls, blocker, blocked, is_blocked):
+        cls.update(blocker.pk, blocked.pk, cls.BLOCKED, is_blocked)
+        cls.update(blocked.pk, blocker.pk, cls.BLOCKED_BY, is_blocked)
+
+    @classmethod
+    def mute(cls, muter, muted, is_muted):
+        cls.update(muter.pk, muted.pk, cls.MUTED, is_muted)
+
+
+__all__ = [
+    'ExclusionSet',
+]
@@ -0,0 +1,138 @@
+import atexit
+import logging
+import threading
+from collections import Counter
+from time import monotonic
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+from app_twitter.models import Tweet
+from utilities.counters import CounterBuffer
+
+logger = logging.getLogger(__name__)
+
+views_count_buffer = CounterBuffer(Tweet, 'views_count')
+
+
+class ImpressionBuffer:
+    """
+    In-process buffer of the tweets served to the users.
+
+    Impressions are counted in memory and handed to redis in one pipeline once
+    ``IMPRESSIONS_FLUSH_EVENTS`` impressions are buffered or the oldest one is
+    older than ``IMPRESSIONS_FLUSH_INTERVAL`` milliseconds, whichever comes first,
+    a timer flushes the buffer of an idle process. The periodic ``flush_views_count``
+    task writes them to ``Tweet.views_count``.
+    """
+    VIEWERS_KEY = 'impressions:viewers:{}'
+
+    def __init__(self, counter_buffer):
+        self.counter_buffer = counter_buffer
+
+        self.lock = threading.Lock()
+        self.views = Counter()
+        self.viewers = dict()
+        self.events = 0
+        self.started_at = None
+        self.timer = None
+
+        atexit.register(self.flush)
+
+    @classmethod
+    def viewers_key(cls, tweet_id):
+        return cls.VIEWERS_KEY.format(tweet_id)
+
+    @staticmethod
+    def connection():
+        return get_redis_connection('default')
+
+    def record(self, tweets, user):
+        """
+        Count an impression of every given tweet
+        :param tweets:
+        :param user: the viewer, anonymous viewers are not counted as unique viewers
+        :return:
+        """
+        with self.lock:
+            for tweet in tweets:
+                self.views[tweet.pk] += 1
+                self.events += 1
+
+                if settings.IMPRESSIONS_UNIQUE_VIEWERS and user.is_authenticated:
+                    self.viewers.setdefault(tweet.pk, set()).add(user.pk)
+
+            if self.started_at is None:
+                self.started_at = monotonic()
+
+                self.timer = threading.Timer(settings.IMPRESSIONS_FLUSH_INTERVAL / 1000, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+            is_due = self.events >= settings.IMPRESSIONS_FLUSH_EVENTS or \
+                (monotonic() - self.started_at) * 1000 >= settings.IMPRESSIONS_FLUSH_INTERVAL
+
+            if not is_due:
+                return
+
+            views, viewers = self.take()
+
+        self.write(views, viewers)
+
+    def take(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        views, viewers = self.views, self.viewers
+
+        self.views, self.viewers = Counter(), dict()
+        self.events, self.started_at = 0, None
+
+        return views, viewers
+
+    def write(self, views, viewers):
+        """
+        Hand the impressions to redis, impressions failing to be written are dropped
+        so serving the tweets never fails on them
+        :param views: dict of tweet id to the number of views
+        :param viewers: dict of tweet id to the set of viewer ids
+        :return:
+        """
+        if not views:
+            return
+
+        try:
+            self.counter_buffer.add_many(views)
+
+            if viewers:
+                pipeline = self.connection().pipeline(transaction=False)
+                for tweet_id, user_ids in viewers.items():
+                    pipeline.pfadd(self.viewers_key(tweet_id), *user_ids)
+                    pipeline.expire(self.viewers_key(tweet_id), settings.IMPRESSIONS_VIEWERS_TTL)
+                pipeline.execute()
+
+        except Exception:
+            logger.exception('dropped the impressions of %d tweets', len(views))
+
+    def flush(self):
+        with self.lock:
+            views, viewers = self.take()
+
+        self.write(views, viewers)
+
+    def unique_viewers(self, tweet_id):
+        """
+        Estimated number of distinct users who have seen the tweet
+        :param tweet_id:
+        :return:
+        """
+        return self.connection().pfcount(self.viewers_key(tweet_id))
+
+
+impressions = ImpressionBuffer(views_count_buffer)
+
+__all__ = [
+    'views_count_buffer',
+    'impressions',
+]
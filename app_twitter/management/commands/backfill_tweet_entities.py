@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app_twitter.models import Tweet
+from utilities.text import extract_entities
+
+
+class Command(BaseCommand):
+    help = 'Extract the entities of the tweets written before they were stored, in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--sleep', type=float, default=0.0, help='seconds to wait between the chunks')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        last_pk, updated = 0, 0
+
+        while tweets := list(Tweet.objects.filter(pk__gt=last_pk, entities__isnull=True).order_by('pk')
+                             .only('pk', 'body')[:chunk_size]):
+            for tweet in tweets:
+                tweet.entities = extract_entities(tweet.body)
+
+            updated += Tweet.objects.bulk_update(tweets, ['entities'])
+            last_pk = tweets[-1].pk
+
+            self.stdout.write(f'backfilled tweets up to {last_pk}, {updated} updated')
+
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f'{updated} tweets updated'))
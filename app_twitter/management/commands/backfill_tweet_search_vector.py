@@ -0,0 +1,39 @@
+import time
+
+from django.contrib.postgres.search import SearchVector
+from django.core.management.base import BaseCommand
+from django.db.models import F, Func, TextField
+
+from app_twitter.models import Tweet
+
+
+class Command(BaseCommand):
+    help = 'Build the search vectors of the tweets written before the search vector trigger, in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--sleep', type=float, default=0.0, help='seconds to wait between the chunks')
+        parser.add_argument('--rebuild', action='store_true',
+                            help='rebuild every vector, e.g. after a change of the tweet_search_text function')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        last_pk, updated = 0, 0
+
+        tweets = Tweet.objects.all() if options['rebuild'] else Tweet.objects.filter(search_vector__isnull=True)
+        # the same vector the search vector trigger builds
+        search_vector = SearchVector(Func(F('body'), function='tweet_search_text', output_field=TextField()),
+                                     config=Tweet.SEARCH_CONFIG)
+
+        # every chunk is its own short transaction, only the rows of the chunk are locked
+        while tweet_ids := list(tweets.filter(pk__gt=last_pk).order_by('pk')
+                                .values_list('pk', flat=True)[:chunk_size]):
+            updated += tweets.filter(pk__in=tweet_ids).update(search_vector=search_vector)
+            last_pk = tweet_ids[-1]
+
+            self.stdout.write(f'backfilled tweets up to {last_pk}, {updated} updated')
+
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f'{updated} tweets updated'))
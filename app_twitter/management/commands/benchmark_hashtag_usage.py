@@ -0,0 +1,65 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.db.models import F
+
+from app_twitter.models import Hashtag
+
+
+class Command(BaseCommand):
+    help = 'Measure the hashtag usage counting throughput of concurrent writers of the same hashtags, ' \
+           'with a row lock per hashtag and with the batched upsert of HashtagManager.increment_usage. ' \
+           'The benchmark hashtags are deleted afterwards, run it against a development database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=16)
+        parser.add_argument('--tweets', type=int, default=200, help='tweets of every writer')
+        parser.add_argument('--tags', type=int, default=3, help='hashtags of every tweet')
+
+    @staticmethod
+    def row_locks(names):
+        with transaction.atomic():
+            for name in names:
+                hashtag, _ = Hashtag.objects.select_for_update().get_or_create(name=name, normalized_name=name)
+                hashtag.usage_count = F('usage_count') + 1
+                hashtag.save()
+
+    @staticmethod
+    def upsert(names):
+        Hashtag.objects.increment_usage(names)
+
+    def run(self, method, names, writers, tweets):
+        def writer():
+            try:
+                for _ in range(tweets):
+                    method(names)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=writer) for _ in range(writers)]
+
+        started_at = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return time.perf_counter() - started_at
+
+    def handle(self, *args, **options):
+        writers, tweets = options['writers'], options['tweets']
+        names = [f'#benchmark{index}' for index in range(options['tags'])]
+
+        for method in (self.row_locks, self.upsert):
+            Hashtag.objects.filter(name__in=names).delete()
+
+            duration = self.run(method, names, writers, tweets)
+            counts = set(Hashtag.objects.filter(name__in=names).values_list('usage_count', flat=True))
+
+            self.stdout.write(f'{method.__name__}: {writers * tweets / duration:.0f} tweets/s '
+                              f'with {writers} writers, usage counts {sorted(counts)} '
+                              f'(expected [{writers * tweets}])')
+
+        Hashtag.objects.filter(name__in=names).delete()
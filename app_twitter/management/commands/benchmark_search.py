@@ -0,0 +1,150 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from app_twitter.models import Hashtag
+from app_twitter.views.search import hashtag_search_view, twitter_search, username_search_view
+from utilities.text import normalize_text
+
+User = get_user_model()
+
+# persian names, some in their arabic spelling, and latin names with their transliterations
+FIRST_NAMES = (
+    'علی', 'علي', 'محمد', 'رضا', 'حسین', 'مهدی', 'مهدي', 'زهرا', 'فاطمه', 'مریم', 'سارا', 'نرگس', 'کیان', 'كيان',
+    'امیرحسین', 'امیر‌حسین', 'پریسا', 'یاسمن', 'ali', 'mohammad', 'reza', 'hossein', 'mahdi', 'zahra', 'sara',
+    'maryam', 'amir', 'john', 'james', 'emma', 'olivia', 'noah', 'liam', 'sophia', 'lucas',
+)
+LAST_NAMES = (
+    'احمدی', 'احمدي', 'محمدی', 'رضایی', 'رضائي', 'حسینی', 'کریمی', 'كريمي', 'موسوی', 'جعفری', 'نوری', 'کاظمی',
+    'ahmadi', 'mohammadi', 'rezaei', 'hosseini', 'karimi', 'mousavi', 'jafari', 'smith', 'johnson', 'williams',
+    'brown', 'garcia', 'miller', 'davis', 'martin',
+)
+TAG_WORDS = (
+    'کتاب', 'كتاب', 'ایران', 'تهران', 'فوتبال', 'سینما', 'موسیقی', 'برنامه‌نویسی', 'python', 'django', 'news',
+    'football', 'music', 'travel', 'photography', 'coding', 'science', 'worldcup', 'movie', 'art',
+)
+
+
+def transliterate(name):
+    return name if name.isascii() else f'u{sum(map(ord, name)) % 997}'
+
+
+def with_typo(generator, term):
+    """
+    :param generator:
+    :param term:
+    :return: the term with one of its characters replaced, as typed by mistake
+    """
+    index = generator.randrange(len(term))
+    return term[:index] + generator.choice('aeiouرسی') + term[index + 1:]
+
+
+class Command(BaseCommand):
+    help = 'Measure the user and hashtag search views on generated users and hashtags, and print the plans ' \
+           'of their search queries. The generated rows are written in a transaction rolled back at the end, ' \
+           'run it against a development database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000_000)
+        parser.add_argument('--hashtags', type=int, default=100_000)
+        parser.add_argument('--terms', type=int, default=50, help='search terms of every kind')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def generate(self, generator, users, hashtags):
+        started_at = time.perf_counter()
+
+        for start in range(0, users, 5000):
+            batch = []
+
+            for index in range(start, min(start + 5000, users)):
+                first, last = generator.choice(FIRST_NAMES), generator.choice(LAST_NAMES)
+                username = f'{transliterate(first)}_{transliterate(last)}{index}'[:26].lower()
+                fullname = f'{first} {last}'
+
+                batch.append(User(username=username, normalized_username=normalize_text(username),
+                                  fullname=fullname, normalized_fullname=normalize_text(fullname), password='!'))
+
+            User.objects.bulk_create(batch)
+
+        names = dict()
+        while len(names) < hashtags:
+            name = f'#{generator.choice(TAG_WORDS)}{generator.choice(TAG_WORDS)}{generator.randrange(10_000)}'
+            names.setdefault(normalize_text(name), name)
+
+        Hashtag.objects.bulk_create([Hashtag(name=name, normalized_name=normalized_name,
+                                             usage_count=generator.randrange(10_000))
+                                     for normalized_name, name in names.items()],
+                                    batch_size=5000, ignore_conflicts=True)
+
+        with connection.cursor() as cursor:
+            for index in ('user_norm_username_trgm_index', 'user_norm_fullname_trgm_index',
+                          'hashtag_normalized_trgm_index'):
+                cursor.execute('SELECT gin_clean_pending_list(%s::regclass)', [index])
+
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(User._meta.db_table)}')
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(Hashtag._meta.db_table)}')
+
+        self.stdout.write(f'generated {users} users and {hashtags} hashtags in {time.perf_counter() - started_at:.0f}s')
+
+    @staticmethod
+    def terms(generator, count):
+        """
+        :param generator:
+        :param count:
+        :return: dict of the kind of the terms to the terms, prefixes, whole names and names with a typo
+        """
+        return {
+            'prefix': [generator.choice(FIRST_NAMES + LAST_NAMES)[:4] for _ in range(count)],
+            'name': [f'{generator.choice(FIRST_NAMES)} {generator.choice(LAST_NAMES)}' for _ in range(count)],
+            'typo': [with_typo(generator, generator.choice(LAST_NAMES + TAG_WORDS)) for _ in range(count)],
+        }
+
+    @override_settings(ALLOWED_HOSTS=['testserver'])
+    def measure(self, view, terms, user):
+        factory = APIRequestFactory()
+        durations = []
+
+        for term in terms:
+            request = factory.get('/', {'q': term})
+            force_authenticate(request, user)
+
+            started_at = time.perf_counter()
+            view(request).render()
+            durations.append((time.perf_counter() - started_at) * 1000)
+
+        durations.sort()
+
+        return statistics.mean(durations), durations[len(durations) // 2], durations[int(len(durations) * 0.95)]
+
+    def handle(self, *args, **options):
+        generator = random.Random(options['seed'])
+
+        with transaction.atomic():
+            self.generate(generator, options['users'], options['hashtags'])
+
+            user = User.objects.order_by('pk').first()
+            terms = self.terms(generator, options['terms'])
+
+            for name, view in (('twitter_search', twitter_search), ('username_search', username_search_view),
+                               ('hashtag_search', hashtag_search_view)):
+                for kind, kind_terms in terms.items():
+                    mean, median, p95 = self.measure(view, kind_terms, user)
+
+                    self.stdout.write(f'{name:>16} {kind:>6} terms: mean {mean:7.1f}ms p50 {median:7.1f}ms '
+                                      f'p95 {p95:7.1f}ms')
+
+            tag = generator.choice(TAG_WORDS)
+            explained = [(User, term) for term in (terms['prefix'][0], terms['name'][0], terms['typo'][0])] + \
+                        [(Hashtag, term) for term in (tag[:4], with_typo(generator, tag))]
+
+            for model, term in explained:
+                self.stdout.write(f'\nEXPLAIN {model.__name__}.objects.search({term!r}):')
+                self.stdout.write(model.objects.search(term)[:10].explain(analyze=True, buffers=True))
+
+            transaction.set_rollback(True)
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app_twitter.autocomplete import Autocomplete
+
+
+class Command(BaseCommand):
+    help = 'Start a new autocomplete generation and rebuild the memory-mapped snapshot'
+
+    def handle(self, *args, **options):
+        Autocomplete.advance()
+        count = Autocomplete.build()
+
+        if count is None:
+            self.stdout.write(self.style.WARNING('another process is rebuilding the snapshot'))
+            return
+
+        self.stdout.write(self.style.SUCCESS(f'{count} entries written to {settings.AUTOCOMPLETE_SNAPSHOT_PATH}'))
@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from app_twitter.models import UserStats
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Recompute the profile statistics of the users and fix the drifted or missing rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        last_pk, fixed = 0, 0
+
+        while user_ids := list(User.objects.filter(pk__gt=last_pk).order_by('pk')
+                               .values_list('pk', flat=True)[:chunk_size]):
+            fixed += UserStats.objects.reconcile(user_ids)
+            last_pk = user_ids[-1]
+
+            self.stdout.write(f'reconciled users up to {last_pk}, {fixed} rows fixed')
+
+        self.stdout.write(self.style.SUCCESS(f'{fixed} rows fixed'))
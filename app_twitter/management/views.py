@@ -1,6 +1,6 @@
 from django.contrib.auth import get_user_model
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.filters import OrderingFilter
 from rest_framework.viewsets import ModelViewSet
 
 from app_twitter.models import Tweet, Hashtag
@@ -8,24 +8,24 @@ from app_twitter.serializers import tweet
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAdminUser
 
+from utilities.mixins import SearchMixin
+
 User = get_user_model()
 
 
-class AdminTwitterManagementViewSet(ModelViewSet):
+class AdminTwitterManagementViewSet(SearchMixin, ModelViewSet):
     queryset = Tweet.objects.all().cache()
     serializer_class = tweet.TweetSerializer
     permission_classes = (IsAdminUser,)
     pagination_class = PageNumberPagination
 
-    filter_backends = [DjangoFilterBackend, OrderingFilter, SearchFilter]
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
 
     filterset_fields = ['reply_to',  # noqa
                         'retweet',
                         'author'
                         ]
 
-    search_fields = ['@body']
-
     ordering_fields = [
         'likes_count',
         'views_count',
@@ -37,15 +37,14 @@ class AdminTwitterManagementViewSet(ModelViewSet):
     ordering = ['-created_at']
 
 
-class AdminHashtagManagementViewSet(ModelViewSet):
+class AdminHashtagManagementViewSet(SearchMixin, ModelViewSet):
     queryset = Hashtag.objects.all().cache()
     serializer_class = tweet.AdminHashtagSerializer
     permission_classes = (IsAdminUser,)
     pagination_class = PageNumberPagination
 
-    filter_backends = [DjangoFilterBackend, OrderingFilter, SearchFilter]
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
 
-    search_fields = ['@name']
     ordering_fields = '__all__'
     ordering = ['-updated_at']
 
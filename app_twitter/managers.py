@@ -1,14 +1,343 @@
-from django.db import models
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connection, models, transaction
+from django.db.models import BigIntegerField, Count, Exists, F, OuterRef, Q, Subquery
+from django.db.models.functions import Cast, Greatest
+
+from utilities.text import normalize_text
+
+
+class HashtagQuerySet(models.QuerySet):
+    def search(self, term):
+        """
+        Typo tolerant search on the normalized hashtag names, served by their trigram index
+        and ordered by the similarity to the term, then by the usage count.
+        :param term:
+        :return:
+        """
+        term = normalize_text(term)
+
+        return self.filter(Q(normalized_name__trigram_similar=term) | Q(normalized_name__contains=term)) \
+            .annotate(similarity=TrigramSimilarity('normalized_name', term)) \
+            .order_by('-similarity', '-usage_count', 'name')
+
+
+class HashtagManager(models.Manager):
+    def get_queryset(self):
+        return HashtagQuerySet(self.model, using=self._db)
+
+    def search(self, term):
+        return self.get_queryset().search(term)
+
+    def increment_usage(self, names):
+        """
+        Create the missing hashtags and increment the usage count of all of them with one
+        ``INSERT ... ON CONFLICT DO UPDATE`` statement. The spelling variants of a tag count
+        as the existing hashtag of their normalized name, and the rows are locked in
+        normalized name order, so concurrent writers of overlapping tags never deadlock.
+        :param names:
+        :return: list of the names of the used hashtags
+        """
+        names = {normalize_text(name): name for name in sorted(names, reverse=True)}
+        if not names:
+            return []
+
+        quote = connection.ops.quote_name
+
+        table = quote(self.model._meta.db_table)
+        name = quote(self.model._meta.get_field('name').column)
+        normalized_name = quote(self.model._meta.get_field('normalized_name').column)
+        usage_count = quote(self.model._meta.get_field('usage_count').column)
+        updated_at = quote(self.model._meta.get_field('updated_at').column)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} ({name}, {normalized_name}, {usage_count}, {updated_at}) '
+                f'VALUES {", ".join(["(%s, %s, 1, NOW())"] * len(names))} '
+                f'ON CONFLICT ({normalized_name}) DO UPDATE '
+                f'SET {usage_count} = {table}.{usage_count} + 1, {updated_at} = EXCLUDED.{updated_at} '
+                f'RETURNING {name}',
+                [value for item in sorted(names.items()) for value in reversed(item)],
+            )
+
+            return [row[0] for row in cursor.fetchall()]
 
 
 class TweetQuerySet(models.QuerySet):
+    def with_related(self):
+        """
+        Prefetch plan of the serialized tweet lists, the authors, the retweeted tweets with their
+        authors and the votes are joined and the vote choices are loaded in one batched query.
+        :return:
+        """
+        return self.select_related('author', 'retweet__author', 'vote').prefetch_related('vote__choices')
+
     def timeline_tweets(self):
-        return self.select_related('author').filter(author__is_private=False, reply_to__isnull=True).all()
+        return self.with_related().filter(author__is_private=False, reply_to__isnull=True).all()
+
+    def visible_to(self, user):
+        """
+        Exclude the tweets of the authors who blocked, or are blocked or muted by the user. Each
+        condition is an anti-join on an indexed pair, so the cost does not grow with the lists.
+        :param user:
+        :return:
+        """
+        if not user.is_authenticated:
+            return self
+
+        from app_twitter.models import BlockList, MutedUsers
+
+        return self.filter(
+            ~Exists(BlockList.objects.filter(blocker=user, blocked=OuterRef('author'))),
+            ~Exists(BlockList.objects.filter(blocker=OuterRef('author'), blocked=user)),
+            ~Exists(MutedUsers.objects.filter(muter=user, muted=OuterRef('author'))),
+        )
+
+    def readable_by(self, user):
+        """
+        Exclude the tweets of the private authors the user does not follow
+        :param user:
+        :return:
+        """
+        if not user.is_authenticated:
+            return self.filter(author__is_private=False)
+
+        from app_twitter.models import Fellowship
+
+        return self.filter(
+            Q(author__is_private=False) | Q(author=user) |
+            Exists(Fellowship.objects.filter(follower=user, following=OuterRef('author')))
+        )
+
+    def mentioning(self, user):
+        """
+        Tweets mentioning the user, served by the index of the mentions on the mentioned user
+        :param user:
+        :return:
+        """
+        from app_twitter.models import Mention
+
+        return self.filter(pk__in=Mention.objects.filter(mention_to=user).values('tweet'))
+
+    def search(self, term):
+        """
+        Full text search on the tweet bodies, served by the GIN index of their search vector.
+        The vectors are built from the bodies folded by the ``tweet_search_text`` sql function,
+        the same folding ``normalize_text`` applies to the term. The ``search_rank`` annotation
+        is the rank scaled to an integer, so it is an exact pagination key.
+        :param term: web search syntax, e.g. ``"exact phrase" -excluded or alternative``
+        :return:
+        """
+        query = SearchQuery(normalize_text(term), config=self.model.SEARCH_CONFIG, search_type='websearch')
+
+        return self.filter(search_vector=query).annotate(
+            search_rank=Cast(SearchRank(F('search_vector'), query) * 1_000_000, BigIntegerField()),
+        ).order_by('-search_rank', '-pk')
 
 
 class TweetManager(models.Manager):
     def get_queryset(self):
         return TweetQuerySet(self.model, using=self._db)
 
+    def with_related(self):
+        return self.get_queryset().with_related()
+
     def timeline_tweets(self):
         return self.get_queryset().timeline_tweets()
+
+    def search(self, term):
+        return self.get_queryset().search(term)
+
+
+class ConversationQuerySet(models.QuerySet):
+    def with_last_message(self):
+        """
+        Join the participants and annotate the body of the last message as ``last_message_body``,
+        so the serialized conversation lists need no query per row.
+        :return:
+        """
+        message = self.model._meta.get_field('messages').related_model
+        last_message = message.objects.filter(conversation=OuterRef('pk')).order_by('-created_at').values('body')[:1]
+
+        return self.select_related('starter_participant', 'contact_participant').annotate(
+            last_message_body=Subquery(last_message),
+        )
+
+
+class ConversationManager(models.Manager):
+    def get_queryset(self):
+        return ConversationQuerySet(self.model, using=self._db)
+
+    def with_last_message(self):
+        return self.get_queryset().with_last_message()
+
+
+class UserStatsManager(models.Manager):
+    COUNTERS = (
+        'tweets_count',
+        'likes_count',
+        'retweets_count',
+        'replies_count',
+        'followers_count',
+        'followings_count',
+    )
+
+    def lock(self, user_id, shared=False):
+        """
+        Take the transaction level advisory lock of the stats row of a user, the row is computed
+        under the exclusive lock while the increments finding no row hold the shared one. The
+        single bigint key has the hash of the table name in its high bits and the user id in
+        its low bits.
+        :param user_id:
+        :param shared:
+        :return:
+        """
+        function = 'pg_advisory_xact_lock_shared' if shared else 'pg_advisory_xact_lock'
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT {function}((hashtext(%s)::bigint << 32) | %s::bigint)',
+                           [self.model._meta.db_table, user_id])
+
+    def increment(self, user_id, **deltas):
+        """
+        Apply the deltas to the counters of a user with one ``UPDATE``, users without
+        a stats row are skipped as their row is computed on its first read.
+        :param user_id:
+        :param deltas: counter name to delta
+        :return:
+        """
+        deltas = {counter: delta for counter, delta in deltas.items() if delta}
+
+        if not deltas:
+            return
+
+        values = {counter: Greatest(F(counter) + delta, 0) for counter, delta in deltas.items()}
+
+        with transaction.atomic():
+            if self.filter(pk=user_id).update(**values):
+                return
+
+            # a row being computed meanwhile either waits for this change to commit and counts it,
+            # or is committed before the lock is granted and takes the delta
+            self.lock(user_id, shared=True)
+            self.filter(pk=user_id).update(**values)
+
+    def tweet_created(self, tweet):
+        self.increment(tweet.author_id,
+                       tweets_count=1,
+                       retweets_count=int(tweet.retweet_id is not None),
+                       replies_count=int(tweet.reply_to_id is not None))
+
+    def tweet_deleted(self, tweet):
+        """
+        Decrement the counters of every user losing a tweet or a like to the deletion,
+        the replies and retweets of the tweet are deleted along with it.
+        :param tweet:
+        :return:
+        """
+        from app_like.models import Like
+        from app_twitter.models import Tweet
+
+        rows = [(tweet.author_id, tweet.retweet_id, tweet.reply_to_id)]
+        tweet_ids, frontier = {tweet.pk}, [tweet.pk]
+
+        while frontier:
+            cascaded = list(Tweet.objects.filter(Q(reply_to__in=frontier) | Q(retweet__in=frontier))
+                            .exclude(pk__in=tweet_ids).values_list('pk', 'author_id', 'retweet_id', 'reply_to_id'))
+
+            frontier = []
+            for pk, *row in cascaded:
+                tweet_ids.add(pk)
+                frontier.append(pk)
+                rows.append(row)
+
+        deltas = dict()
+
+        for author_id, retweet_id, reply_to_id in rows:
+            counters = deltas.setdefault(author_id, dict())
+            counters['tweets_count'] = counters.get('tweets_count', 0) - 1
+            counters['retweets_count'] = counters.get('retweets_count', 0) - int(retweet_id is not None)
+            counters['replies_count'] = counters.get('replies_count', 0) - int(reply_to_id is not None)
+
+        likes = Like.objects.filter(tweet__in=tweet_ids, is_dislike=False).order_by() \
+            .values('user').annotate(count=Count('pk')).values_list('user', 'count')
+
+        for user_id, count in likes:
+            counters = deltas.setdefault(user_id, dict())
+            counters['likes_count'] = -count
+
+        for user_id, counters in deltas.items():
+            self.increment(user_id, **counters)
+
+    def followed(self, follower, following, is_followed):
+        delta = 1 if is_followed else -1
+
+        self.increment(follower.pk, followings_count=delta)
+        self.increment(following.pk, followers_count=delta)
+
+    def compute(self, user_ids):
+        """
+        Count the statistics of the users from the source tables, one grouped query per counter
+        :param user_ids:
+        :return: dict of user id to dict of counter name to value
+        """
+        from app_like.models import Like
+        from app_twitter.models import Tweet, Fellowship
+
+        stats = {user_id: dict.fromkeys(self.COUNTERS, 0) for user_id in user_ids}
+
+        for counter, queryset, field in (
+                ('tweets_count', Tweet.objects.all(), 'author'),
+                ('likes_count', Like.objects.filter(is_dislike=False), 'user'),
+                ('retweets_count', Tweet.objects.filter(retweet__isnull=False), 'author'),
+                ('replies_count', Tweet.objects.filter(reply_to__isnull=False), 'author'),
+                ('followers_count', Fellowship.objects.all(), 'following'),
+                ('followings_count', Fellowship.objects.all(), 'follower'),
+        ):
+            counts = queryset.filter(**{f'{field}__in': user_ids}).order_by() \
+                .values(field).annotate(count=Count('pk')).values_list(field, 'count')
+
+            for user_id, count in counts:
+                stats[user_id][counter] = count
+
+        return stats
+
+    def for_user(self, user):
+        """
+        Returns the stats row of the user, computing it if the user has none yet
+        :param user:
+        :return:
+        """
+        if stats := self.filter(pk=user.pk).first():
+            return stats
+
+        with transaction.atomic():
+            self.lock(user.pk)
+
+            if stats := self.filter(pk=user.pk).first():
+                return stats
+
+            return self.create(pk=user.pk, **self.compute([user.pk])[user.pk])
+
+    def reconcile(self, user_ids):
+        """
+        Recompute the statistics of the users and fix the drifted or missing rows
+        :param user_ids:
+        :return: number of fixed rows
+        """
+        computed = self.compute(user_ids)
+        existing = self.in_bulk(user_ids)
+
+        missing = [self.model(pk=user_id, **counters) for user_id, counters in computed.items()
+                   if user_id not in existing]
+        drifted = []
+
+        for user_id, stats in existing.items():
+            if any(getattr(stats, counter) != value for counter, value in computed[user_id].items()):
+                for counter, value in computed[user_id].items():
+                    setattr(stats, counter, value)
+                drifted.append(stats)
+
+        self.bulk_create(missing, ignore_conflicts=True)
+        self.bulk_update(drifted, self.COUNTERS)
+
+        return len(missing) + len(drifted)
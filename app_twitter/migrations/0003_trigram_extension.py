@@ -0,0 +1,15 @@
+# Generated by Django 4.0.4 on 2026-10-18 17:47
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_twitter', '0002_user_stats'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+    ]
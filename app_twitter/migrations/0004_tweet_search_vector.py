@@ -0,0 +1,45 @@
+# Generated by Django 4.0.4 on 2026-10-18 17:49
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('app_twitter', '0003_trigram_extension'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tweet',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        # the vectors of the existing tweets are built by the backfill_tweet_search_vector command
+        migrations.RunSQL(
+            sql="""
+            CREATE FUNCTION tweet_search_vector_update() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector := to_tsvector('simple', coalesce(NEW.body, ''));
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql;
+
+            CREATE TRIGGER tweet_search_vector_update
+                BEFORE INSERT OR UPDATE OF body ON app_twitter_tweet
+                FOR EACH ROW EXECUTE FUNCTION tweet_search_vector_update();
+            """,
+            reverse_sql="""
+            DROP TRIGGER tweet_search_vector_update ON app_twitter_tweet;
+            DROP FUNCTION tweet_search_vector_update();
+            """,
+        ),
+        AddIndexConcurrently(
+            model_name='tweet',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='tweet_search_vector_index'),
+        ),
+    ]
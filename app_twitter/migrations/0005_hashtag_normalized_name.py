@@ -0,0 +1,18 @@
+# Generated by Django 4.0.4 on 2026-10-18 17:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_twitter', '0004_tweet_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hashtag',
+            name='normalized_name',
+            field=models.CharField(max_length=765, null=True),
+        ),
+    ]
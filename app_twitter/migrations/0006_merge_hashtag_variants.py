@@ -0,0 +1,74 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+# frozen copy of ``utilities.text.normalize_text`` as of this migration, so a later change
+# of the normalizer never changes what the migration does
+normalization_table = str.maketrans({
+    **{character: 'ی' for character in 'يىئ'},
+    **{character: 'ک' for character in 'ك'},
+    **{character: 'ه' for character in 'ةۀ'},
+    **{character: 'ا' for character in 'أإٱ'},
+    **{character: 'و' for character in 'ؤ'},
+    **{character: str(digit) for digit, character in enumerate('۰۱۲۳۴۵۶۷۸۹')},
+    **{character: str(digit) for digit, character in enumerate('٠١٢٣٤٥٦٧٨٩')},
+    **{chr(code): None for code in range(0x064B, 0x0660)},
+    '\u0670': None,  # superscript alef
+    '\u0640': None,  # tatweel
+    '\u200c': None,  # zero-width non-joiner
+    '\u200d': None,  # zero-width joiner
+    '\u200e': None,  # left-to-right mark
+    '\u200f': None,  # right-to-left mark
+})
+
+
+def normalize_text(raw_text):
+    if raw_text is None:
+        return None
+
+    return ' '.join(raw_text.translate(normalization_table).casefold().split())
+
+
+def merge_hashtag_variants(apps, schema_editor):
+    """
+    Fill the normalized names and merge the hashtags sharing one into the most used of them
+    """
+    Hashtag = apps.get_model('app_twitter', 'Hashtag')
+    HashtagsUsedInTweets = apps.get_model('app_twitter', 'HashtagsUsedInTweets')
+
+    variants = dict()
+    for name, usage_count in Hashtag.objects.order_by().values_list('name', 'usage_count').iterator():
+        variants.setdefault(normalize_text(name), []).append((usage_count, name))
+
+    for normalized_name, names in variants.items():
+        names.sort(key=lambda variant: (-variant[0], variant[1]))
+        (usage_count, name), merged = names[0], [variant_name for _, variant_name in names[1:]]
+
+        if merged:
+            HashtagsUsedInTweets.objects.filter(hashtag_id__in=merged).update(hashtag_id=name)
+            usage_count += sum(variant_usage_count for variant_usage_count, _ in names[1:])
+
+            # a tweet using two variants is linked once
+            duplicates = HashtagsUsedInTweets.objects.filter(hashtag_id=name).values('tweet') \
+                .annotate(links=Count('pk')).filter(links__gt=1).values_list('tweet', 'links')
+
+            for tweet_id, links in duplicates:
+                extra = HashtagsUsedInTweets.objects.filter(hashtag_id=name, tweet_id=tweet_id) \
+                            .order_by('pk').values_list('pk', flat=True)[1:]
+                HashtagsUsedInTweets.objects.filter(pk__in=list(extra)).delete()
+                usage_count -= links - 1
+
+            Hashtag.objects.filter(name__in=merged).delete()
+
+        Hashtag.objects.filter(name=name).update(normalized_name=normalized_name, usage_count=max(usage_count, 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_twitter', '0005_hashtag_normalized_name'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_hashtag_variants, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 4.0.4 on 2026-10-18 17:53
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+def names(schema_editor, model):
+    table = model._meta.db_table
+    column = model._meta.get_field('normalized_name').column
+
+    return table, column, schema_editor._create_index_name(table, [column], suffix='_uniq'), \
+        schema_editor._create_index_name(table, [column], suffix='_like'), \
+        schema_editor._create_index_name(table, [column], suffix='_notnull')
+
+
+def add_unique_concurrently(apps, schema_editor):
+    """
+    The unique constraint of the normalized name, built without blocking the writes to the
+    table: the unique index is built concurrently and then attached as the constraint, and
+    NOT NULL is proven by a check validated under a lock that lets the writes through.
+    """
+    table, column, unique, like, not_null = (schema_editor.quote_name(name) for name in
+                                             names(schema_editor, apps.get_model('app_twitter', 'Hashtag')))
+
+    schema_editor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {not_null} CHECK ({column} IS NOT NULL) NOT VALID')
+    schema_editor.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT {not_null}')
+    schema_editor.execute(f'ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL')
+    schema_editor.execute(f'ALTER TABLE {table} DROP CONSTRAINT {not_null}')
+
+    schema_editor.execute(f'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {unique} ON {table} ({column})')
+    schema_editor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {unique} UNIQUE USING INDEX {unique}')
+    schema_editor.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {like} ON {table} ({column} varchar_pattern_ops)')
+
+
+def remove_unique(apps, schema_editor):
+    table, column, unique, like, _ = (schema_editor.quote_name(name) for name in
+                                      names(schema_editor, apps.get_model('app_twitter', 'Hashtag')))
+
+    schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {like}')
+    schema_editor.execute(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {unique}')
+    schema_editor.execute(f'ALTER TABLE {table} ALTER COLUMN {column} DROP NOT NULL')
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('app_twitter', '0006_merge_hashtag_variants'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(add_unique_concurrently, remove_unique),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='hashtag',
+                    name='normalized_name',
+                    field=models.CharField(max_length=765, unique=True),
+                ),
+            ],
+        ),
+        AddIndexConcurrently(
+            model_name='hashtag',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['normalized_name'], name='hashtag_normalized_trgm_index', opclasses=('gin_trgm_ops',)),
+        ),
+    ]
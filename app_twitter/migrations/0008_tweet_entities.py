@@ -0,0 +1,18 @@
+# Generated by Django 4.0.4 on 2026-10-18 17:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_twitter', '0007_hashtag_normalized_name_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tweet',
+            name='entities',
+            field=models.JSONField(editable=False, null=True),
+        ),
+    ]
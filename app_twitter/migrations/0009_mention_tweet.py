@@ -0,0 +1,127 @@
+# Generated by Django 4.0.4 on 2026-10-18 18:06
+
+import re
+from collections import defaultdict, deque
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models, transaction
+import django.db.models.deletion
+
+# frozen copy of the mention part of ``utilities.text.entity_pattern`` as of this migration
+mention_pattern = re.compile(r"(?<!\S)[＠@]([^\s#＃@＠<>[\]|{}]*[^\s#＃@＠<>[\]|{}'.,:;!?)])", re.UNICODE)
+
+
+def link_mentions(apps, schema_editor):
+    """
+    Link the mentions written before they had a tweet to the tweets mentioning their users.
+    The mentions of an author and a mentioned user were written in the order of the tweets,
+    so each tweet takes the oldest unlinked one of its pair, and a tweet with none left gets
+    a new mention. Runs in chunks of tweets, each chunk in its own transaction.
+    """
+    Tweet = apps.get_model('app_twitter', 'Tweet')
+    Mention = apps.get_model('app_twitter', 'Mention')
+    User = apps.get_model('app_users', 'User')
+
+    last_pk = 0
+
+    while tweets := list(Tweet.objects.filter(pk__gt=last_pk, body__isnull=False).order_by('pk')
+                         .values_list('pk', 'author_id', 'body')[:1000]):
+        last_pk = tweets[-1][0]
+
+        usernames = {pk: {username.lower() for username in mention_pattern.findall(body)} for pk, _, body in tweets}
+        users = dict(User.objects.filter(username__in=set().union(*usernames.values()))
+                     .values_list('username', 'pk'))
+        if not users:
+            continue
+
+        linked = set(Mention.objects.filter(mention_to__in=users.values(), tweet__in=list(usernames))
+                     .values_list('tweet', 'mention_to'))
+        unlinked = defaultdict(deque)
+        for pk, mention_by, mention_to in Mention.objects.filter(
+                tweet__isnull=True, mention_by__in={author for _, author, _ in tweets},
+                mention_to__in=users.values()).order_by('pk').values_list('pk', 'mention_by', 'mention_to'):
+            unlinked[mention_by, mention_to].append(pk)
+
+        linked_mentions, created = [], []
+        for pk, author, _ in tweets:
+            for user in sorted(users[username] for username in usernames[pk] if username in users):
+                if user == author or (pk, user) in linked:
+                    continue
+
+                if unlinked[author, user]:
+                    linked_mentions.append(Mention(pk=unlinked[author, user].popleft(), tweet_id=pk))
+                else:
+                    created.append(Mention(mention_by_id=author, mention_to_id=user, tweet_id=pk))
+
+        with transaction.atomic(using=schema_editor.connection.alias):
+            Mention.objects.bulk_update(linked_mentions, ['tweet'])
+            Mention.objects.bulk_create(created)
+
+
+def add_unique_concurrently(apps, schema_editor):
+    """
+    The unique constraint of the mentions of a tweet, built without blocking the writes to
+    the table: the duplicates are deleted, then the unique index is built concurrently and
+    attached as the constraint. An invalid index left by a failed build is dropped first.
+    """
+    Mention = apps.get_model('app_twitter', 'Mention')
+
+    quote = schema_editor.quote_name
+    table = quote(Mention._meta.db_table)
+    pk = quote(Mention._meta.pk.column)
+    tweet = quote(Mention._meta.get_field('tweet').column)
+    mention_to = quote(Mention._meta.get_field('mention_to').column)
+    unique = quote('mention_unique')
+
+    schema_editor.execute(
+        f'DELETE FROM {table} AS duplicate USING {table} AS kept '
+        f'WHERE duplicate.{tweet} = kept.{tweet} AND duplicate.{mention_to} = kept.{mention_to} '
+        f'AND duplicate.{pk} > kept.{pk}'
+    )
+    schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {unique}')
+    schema_editor.execute(f'CREATE UNIQUE INDEX CONCURRENTLY {unique} ON {table} ({tweet}, {mention_to})')
+    schema_editor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {unique} UNIQUE USING INDEX {unique}')
+
+
+def remove_unique(apps, schema_editor):
+    Mention = apps.get_model('app_twitter', 'Mention')
+
+    schema_editor.execute(f'ALTER TABLE {schema_editor.quote_name(Mention._meta.db_table)} '
+                          f'DROP CONSTRAINT IF EXISTS {schema_editor.quote_name("mention_unique")}')
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('app_twitter', '0008_tweet_entities'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mention',
+            name='tweet',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='mentioned_users', to='app_twitter.tweet'),
+        ),
+        migrations.AlterField(
+            model_name='tweet',
+            name='mentions',
+            field=models.ManyToManyField(related_name='tweets', through='app_twitter.MentionUsedInTweets', to='app_twitter.mention'),
+        ),
+        AddIndexConcurrently(
+            model_name='mention',
+            index=models.Index(fields=['mention_to', '-tweet'], name='mention_to_tweet_index'),
+        ),
+        migrations.RunPython(link_mentions, migrations.RunPython.noop),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(add_unique_concurrently, remove_unique),
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='mention',
+                    constraint=models.UniqueConstraint(fields=('tweet', 'mention_to'), name='mention_unique'),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,60 @@
+from django.db import migrations
+
+# frozen copy of ``utilities.text.normalization_table`` as of this migration, the same folding
+# applied in sql by ``translate``. Characters mapped to None have no replacement, which makes
+# ``translate`` drop them. Casefolding is left to ``to_tsvector``, which lowercases the words.
+normalization_table = {
+    **{character: 'ی' for character in 'يىئ'},
+    **{character: 'ک' for character in 'ك'},
+    **{character: 'ه' for character in 'ةۀ'},
+    **{character: 'ا' for character in 'أإٱ'},
+    **{character: 'و' for character in 'ؤ'},
+    **{character: str(digit) for digit, character in enumerate('۰۱۲۳۴۵۶۷۸۹')},
+    **{character: str(digit) for digit, character in enumerate('٠١٢٣٤٥٦٧٨٩')},
+    **{chr(code): None for code in range(0x064B, 0x0660)},
+    '\u0670': None,  # superscript alef
+    '\u0640': None,  # tatweel
+    '\u200c': None,  # zero-width non-joiner
+    '\u200d': None,  # zero-width joiner
+    '\u200e': None,  # left-to-right mark
+    '\u200f': None,  # right-to-left mark
+}
+
+replaced = ''.join(character for character, replacement in normalization_table.items() if replacement is not None)
+replacements = ''.join(replacement for replacement in normalization_table.values() if replacement is not None)
+dropped = ''.join(character for character, replacement in normalization_table.items() if replacement is None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_twitter', '0009_mention_tweet'),
+    ]
+
+    operations = [
+        # the vectors of the existing tweets are rebuilt by ``backfill_tweet_search_vector --rebuild``
+        migrations.RunSQL(
+            sql=f"""
+            CREATE FUNCTION tweet_search_text(body text) RETURNS text AS $$
+                SELECT translate(coalesce(body, ''), '{replaced}{dropped}', '{replacements}')
+            $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+            CREATE OR REPLACE FUNCTION tweet_search_vector_update() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector := to_tsvector('simple', tweet_search_text(NEW.body));
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql;
+            """,
+            reverse_sql="""
+            CREATE OR REPLACE FUNCTION tweet_search_vector_update() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector := to_tsvector('simple', coalesce(NEW.body, ''));
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql;
+
+            DROP FUNCTION tweet_search_text(text);
+            """,
+        ),
+    ]
@@ -3,27 +3,34 @@ import uuid
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.fields import GenericRelation, GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
-from django.contrib.postgres.indexes import HashIndex
+from django.contrib.postgres.indexes import GinIndex, HashIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.db.models import F
 from django.utils.translation import gettext as _
 
-from app_twitter.managers import TweetManager
+from app_twitter.managers import ConversationManager, HashtagManager, TweetManager, UserStatsManager
+from utilities.text import NORMALIZED_LENGTH_FACTOR, extract_entities
 
 User = get_user_model()
 
 
 class Hashtag(models.Model):
     name = models.CharField(primary_key=True, max_length=255, null=False, blank=False)
+    # the spelling variants of a hashtag share one row, see utilities.text.normalize_text
+    normalized_name = models.CharField(max_length=255 * NORMALIZED_LENGTH_FACTOR, unique=True)
     usage_count = models.PositiveBigIntegerField(default=0)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = HashtagManager()
+
     class Meta:
         ordering = ('-usage_count',)
 
         indexes = [
             models.Index(fields=('-usage_count',)),
-            HashIndex(fields=('name',), name='hashtag_name_hash_index')
+            HashIndex(fields=('name',), name='hashtag_name_hash_index'),
+            GinIndex(fields=('normalized_name',), opclasses=('gin_trgm_ops',), name='hashtag_normalized_trgm_index'),
         ]
 
     def __str__(self):
@@ -33,6 +40,18 @@ class Hashtag(models.Model):
 class Mention(models.Model):
     mention_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='mention_by_user')
     mention_to = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='mention_to_user')
+    # served by the unique constraint, which starts with the tweet
+    tweet = models.ForeignKey('Tweet', on_delete=models.CASCADE, null=True, db_index=False,
+                              related_name='mentioned_users')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=('mention_to', '-tweet'), name='mention_to_tweet_index'),
+        ]
+
+        constraints = [
+            models.UniqueConstraint(fields=('tweet', 'mention_to'), name='mention_unique'),
+        ]
 
     def __str__(self):
         return f'{self.mention_by} mentioned {self.mention_to}'
@@ -70,7 +89,7 @@ class Tweet(models.Model):
     images = models.JSONField(null=True)
 
     hashtags = models.ManyToManyField(Hashtag, through='HashtagsUsedInTweets')
-    mentions = models.ManyToManyField(Mention, through='MentionUsedInTweets')
+    mentions = models.ManyToManyField(Mention, through='MentionUsedInTweets', related_name='tweets')
 
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -89,8 +108,15 @@ class Tweet(models.Model):
     related_item_object_id = models.PositiveIntegerField(null=True)
     related_item_content_object = GenericForeignKey('related_item_content_type', 'related_item_object_id')
 
+    # maintained by the tweet_search_vector_update trigger, see the 0004 migration
+    search_vector = SearchVectorField(null=True, editable=False)
+    # hashtags, mentions and urls of the body with their offsets, see utilities.text.extract_entities
+    entities = models.JSONField(null=True, editable=False)
+
     objects = TweetManager()
 
+    SEARCH_CONFIG = 'simple'
+
     class Meta:
         ordering = ('-created_at',)
         indexes = [
@@ -100,8 +126,28 @@ class Tweet(models.Model):
             HashIndex(fields=('author',), name='tweet_author_hash_index'),
             HashIndex(fields=('retweet',), name='tweet_retweet_hash_index'),
             HashIndex(fields=('reply_to',), name='tweet_reply_to_hash_index'),
+            GinIndex(fields=('search_vector',), name='tweet_search_vector_index'),
         ]
 
+    def save(self, *args, **kwargs):
+        self.entities = extract_entities(self.body)
+
+        update_fields = kwargs.get('update_fields', None)
+        if update_fields is not None and 'body' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'entities'}
+
+        return super().save(*args, **kwargs)
+
+    def get_entities(self):
+        """
+        Returns the entities of the body, extracted if the tweet was saved before they were stored
+        :return:
+        """
+        if self.entities is None:
+            self.entities = extract_entities(self.body)
+
+        return self.entities
+
     def delete(self, using=None, keep_parents=False):
         self.hashtags.update(usage_count=F('usage_count') - 1)
 
@@ -150,6 +196,8 @@ class Conversation(models.Model):
 
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ConversationManager()
+
     class Meta:
         ordering = ('-updated_at',)
         indexes = [
@@ -241,3 +289,26 @@ class MutedUsers(models.Model):
         indexes = [
             models.Index(fields=('muter', 'muted'))
         ]
+
+
+class UserStats(models.Model):
+    """
+    Denormalized profile statistics of a user, kept up to date by the tweet, like and
+    follow code paths and recomputed by the ``reconcile_user_stats`` command.
+    """
+    user = models.OneToOneField(User, primary_key=True, on_delete=models.CASCADE, related_name='stats')
+
+    tweets_count = models.PositiveIntegerField(default=0)
+    likes_count = models.PositiveIntegerField(default=0)
+    retweets_count = models.PositiveIntegerField(default=0)
+    replies_count = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0)
+    followings_count = models.PositiveIntegerField(default=0)
+
+    objects = UserStatsManager()
+
+    class Meta:
+        verbose_name_plural = 'user stats'
+
+    def __str__(self):
+        return f'statistics of {self.user_id}'
@@ -72,9 +72,14 @@ class ConversationSerializer(serializers.ModelSerializer):
 
     @staticmethod
     def get_last_message(instance: Conversation):
-        message = instance.messages.first()
-        body = message.body[:20]
-        if not body == message.body:
+        # annotated by the bulk loaders, see ``Conversation.objects.with_last_message``
+        if hasattr(instance, 'last_message_body'):
+            message_body = instance.last_message_body
+        else:
+            message_body = instance.messages.first().body
+
+        body = message_body[:20]
+        if not body == message_body:
             body += ' ...'
         return body
 
@@ -1,3 +1,5 @@
+from django.contrib.auth import get_user_model
+from django.db import models
 from rest_framework import serializers
 
 from app_notification.models import Notification
@@ -5,6 +7,9 @@ from app_twitter.models import Tweet, Conversation
 from app_twitter.serializers.profile import ProfileNotificationInfoSerializer
 from app_twitter.serializers.message import ConversationSerializer
 from app_twitter.serializers.tweet import TweetSerializer
+from utilities.content_types import content_types
+
+User = get_user_model()
 
 
 class TweetNotificationSerializer(TweetSerializer):
@@ -18,12 +23,55 @@ class TweetNotificationSerializer(TweetSerializer):
         )
 
 
+class NotificationListSerializer(serializers.ListSerializer):
+    """
+    Loads the recent actors and the contents of a page of notifications up front, with one
+    query for the actors and one per content model, instead of a few queries per notification.
+    """
+    content_querysets = {
+        Tweet: lambda: Tweet.objects.all(),
+        Conversation: lambda: Conversation.objects.with_last_message(),
+    }
+
+    @classmethod
+    def load_contents(cls, notifications):
+        """
+        :param notifications:
+        :return: dict of ``(content_type_id, object_id)`` to the content object
+        """
+        object_ids = dict()
+        for notification in notifications:
+            object_ids.setdefault(notification.content_type_id, set()).add(notification.object_id)
+
+        contents = dict()
+        for content_type_id, ids in object_ids.items():
+            queryset = cls.content_querysets.get(content_types.get_for_id(content_type_id).model_class())
+
+            if queryset is not None:
+                contents.update(((content_type_id, str(pk)), instance)
+                                for pk, instance in queryset().in_bulk(ids).items())
+
+        return contents
+
+    def to_representation(self, data):
+        notifications = list(data.all() if isinstance(data, models.Manager) else data)
+
+        self.context['notification_actors'] = User.objects.in_bulk(
+            {actor for notification in notifications for actor in notification.recent_actors}
+        )
+        self.context['notification_contents'] = self.load_contents(notifications)
+
+        return super().to_representation(notifications)
+
+
 class NotificationSerializer(serializers.ModelSerializer):
     notify_by = ProfileNotificationInfoSerializer(read_only=True, source='performed_by')
     notification_group = serializers.CharField(read_only=True, source='group')
     notification_type = serializers.CharField(read_only=True, source='type')
 
+    actors = serializers.SerializerMethodField(read_only=True)
     content = serializers.SerializerMethodField(read_only=True)
+    read_at = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = Notification
@@ -32,25 +80,47 @@ class NotificationSerializer(serializers.ModelSerializer):
             'notify_by',
             'notification_group',
             'notification_type',
+            'actors',
+            'actors_count',
             'content',
             'created_at',
+            'updated_at',
             'read_at',
         )
 
         read_only_fields = fields
 
+        list_serializer_class = NotificationListSerializer
+
+    def get_actors(self, instance: Notification):
+        actors = self.context.get('notification_actors', None)
+        if actors is None:
+            actors = User.objects.in_bulk(instance.recent_actors)
+
+        return ProfileNotificationInfoSerializer(
+            [actors[pk] for pk in instance.recent_actors if pk in actors], many=True, context=self.context,
+        ).data
+
+    @staticmethod
+    def get_read_at(instance: Notification):
+        # annotated by ``Notification.objects.get_notifications``
+        read_until = getattr(instance, 'read_until', None)
+
+        if instance.read_at is None and read_until and instance.updated_at <= read_until:
+            return serializers.DateTimeField().to_representation(read_until)
+
+        return instance.read_at and serializers.DateTimeField().to_representation(instance.read_at)
+
     def get_content(self, instance: Notification):
-        if not instance.type == Notification.NotificationsTypes.MESSAGE:
-            try:
-                instance = Tweet.objects.get(pk=instance.object_id)
-                return TweetNotificationSerializer(instance=instance, context=self.context).data
+        contents = self.context.get('notification_contents', None)
+        if contents is None:
+            contents = NotificationListSerializer.load_contents([instance])
 
-            except Tweet.DoesNotExist:
-                return None
-        else:
-            try:
-                instance = Conversation.objects.get(pk=instance.object_id)
-                return ConversationSerializer(instance=instance, context=self.context).data
+        content = contents.get((instance.content_type_id, instance.object_id), None)
 
-            except Conversation.DoesNotExist:
-                return None
+        if isinstance(content, Tweet):
+            return TweetNotificationSerializer(instance=content, context=self.context).data
+        elif isinstance(content, Conversation):
+            return ConversationSerializer(instance=content, context=self.context).data
+        else:
+            return None
@@ -3,8 +3,7 @@ from django.utils.translation import gettext as _
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
-from app_like.models import Like
-from app_twitter.models import Tweet, Fellowship, MutedUsers
+from app_twitter.models import Fellowship, MutedUsers, UserStats
 from utilities.serializers import HybridImageField
 
 User = get_user_model()
@@ -64,6 +63,10 @@ class TwitterProfileSerializer(serializers.ModelSerializer):
     def get_you_follows(self, instance: User):
         user = self.context['request'].user
         if user.is_authenticated:
+            viewer_state = self.context.get('viewer_state', None)
+            if viewer_state and viewer_state.covers_author(instance):
+                return instance.pk in viewer_state.followed
+
             return Fellowship.objects.filter(follower=user, following=instance).cache().exists()
         else:
             return False
@@ -111,15 +114,11 @@ class UserSerializer(TwitterProfileSerializer):
         read_only_fields = fields
 
 
-class ProfileStaticsSerializers(serializers.Serializer):
-    tweets_count = serializers.SerializerMethodField(read_only=True)
-    likes_count = serializers.SerializerMethodField(read_only=True)
-    retweets_count = serializers.SerializerMethodField(read_only=True)
-    mentions_count = serializers.SerializerMethodField(read_only=True)
-    followers_count = serializers.SerializerMethodField(read_only=True)
-    followings_count = serializers.SerializerMethodField(read_only=True)
+class ProfileStaticsSerializers(serializers.ModelSerializer):
+    mentions_count = serializers.IntegerField(source='replies_count', read_only=True)
 
     class Meta:
+        model = UserStats
         fields = (
             'tweets_count',
             'likes_count',
@@ -129,35 +128,7 @@ class ProfileStaticsSerializers(serializers.Serializer):
             'followings_count',
         )
 
-    @staticmethod
-    def get_tweets_count(user_obj):
-        return Tweet.objects.filter(author=user_obj).cache().count()
-
-    @staticmethod
-    def get_likes_count(user_obj):
-        return Like.objects.filter(user=user_obj).cache().count()
-
-    @staticmethod
-    def get_retweets_count(user_obj):
-        return Tweet.objects.filter(author=user_obj, retweet__isnull=False).cache().count()
-
-    @staticmethod
-    def get_mentions_count(user_obj):
-        return Tweet.objects.filter(author=user_obj, reply_to__isnull=False).cache().count()
-
-    @staticmethod
-    def get_followers_count(user_obj):
-        return Fellowship.objects.filter(following=user_obj).cache().count()
-
-    @staticmethod
-    def get_followings_count(user_obj):
-        return Fellowship.objects.filter(follower=user_obj).cache().count()
-
-    def update(self, instance, validated_data):
-        pass
-
-    def create(self, validated_data):
-        pass
+        read_only_fields = fields
 
 
 class MinimalProfileSerializer(TwitterProfileSerializer):
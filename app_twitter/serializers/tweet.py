@@ -1,14 +1,18 @@
-from bs4 import BeautifulSoup
-from django.contrib.contenttypes.models import ContentType
+import time
+
+from django.db import models, transaction
 from rest_framework import serializers
 
 from app_bookmark.models import Bookmark
+from app_like.counters import likes_count_buffer
 from app_like.models import Like
-from app_twitter.models import Tweet, MentionUsedInTweets, Hashtag, MutedUsers
+from app_twitter.models import Tweet, Hashtag, MutedUsers, UserStats
 from app_twitter.serializers.profile import AuthorSerializer, TweetAuthorSerializer
-from app_twitter.tasks.notifications import removing_mentions, saving_mentions
-from app_twitter.tasks.pre_process import saving_hashtags
+from app_twitter.tasks.notifications import saving_mentions
+from app_twitter.tasks.pipeline import TWEET_STAGES, process_tweet
+from app_twitter.viewer_state import ViewerState
 from app_vote.serializers import VoteSerializer
+from utilities.markup import strip_markup
 
 
 class HashtagSerializer(serializers.ModelSerializer):
@@ -50,16 +54,33 @@ class RetweetedTweetSerializer(serializers.ModelSerializer):
             return None
 
 
+class TweetListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        tweets = list(data.all() if isinstance(data, models.Manager) else data)
+
+        self.context['pending_likes'] = likes_count_buffer.pending(tweet.pk for tweet in tweets)
+
+        request = self.context.get('request', None)
+        if request and request.user.is_authenticated:
+            self.context['viewer_state'] = ViewerState(request.user, tweets)
+
+        return super().to_representation(tweets)
+
+
 class TweetSerializer(serializers.ModelSerializer):
     author = TweetAuthorSerializer(read_only=True)
     body = serializers.CharField(required=True, max_length=5000, allow_null=False, allow_blank=False)
     retweet = serializers.SerializerMethodField(read_only=True)
 
+    likes_count = serializers.SerializerMethodField(read_only=True)
+
     is_liked = serializers.SerializerMethodField(read_only=True)
     retweeted = serializers.SerializerMethodField(read_only=True)
     is_bookmarked = serializers.SerializerMethodField(read_only=True)
     is_muted = serializers.SerializerMethodField(read_only=True)
 
+    entities = serializers.JSONField(source='get_entities', read_only=True)
+
     images = serializers.ListField(max_length=10, allow_empty=True, required=False,
                                    child=serializers.URLField(allow_blank=False, allow_null=False),
                                    )
@@ -86,6 +107,7 @@ class TweetSerializer(serializers.ModelSerializer):
             'retweeted',
             'is_bookmarked',
             'is_muted',
+            'entities',
             'related_item_content_type',
             'related_item_pk',
         )
@@ -100,9 +122,26 @@ class TweetSerializer(serializers.ModelSerializer):
             'is_muted',
         )
 
+        list_serializer_class = TweetListSerializer
+
+    def get_viewer_state(self, instance: Tweet):
+        viewer_state = self.context.get('viewer_state', None)
+        if viewer_state and viewer_state.covers_tweet(instance):
+            return viewer_state
+
+    def get_likes_count(self, instance: Tweet):
+        pending_likes = self.context.get('pending_likes', None)
+        if pending_likes is None or instance.pk not in pending_likes:
+            pending_likes = likes_count_buffer.pending([instance.pk])
+
+        return max(instance.likes_count + pending_likes[instance.pk], 0)
+
     def get_is_muted(self, instance: Tweet):
         request = self.context.get('request', None)
         if request and request.user.is_authenticated:
+            if viewer_state := self.get_viewer_state(instance):
+                return instance.author_id in viewer_state.muted
+
             return MutedUsers.objects.filter(muter=request.user, muted=instance.author).cache().exists()
         else:
             return False
@@ -110,6 +149,9 @@ class TweetSerializer(serializers.ModelSerializer):
     def get_is_liked(self, instance: Tweet):
         request = self.context.get('request', None)
         if request:
+            if viewer_state := self.get_viewer_state(instance):
+                return instance.pk in viewer_state.liked
+
             return Like.objects.is_liked(user=request.user, instance=instance)
         else:
             return False
@@ -117,6 +159,9 @@ class TweetSerializer(serializers.ModelSerializer):
     def get_retweeted(self, instance: Tweet):
         request = self.context.get('request', None)
         if request and request.user.is_authenticated:
+            if viewer_state := self.get_viewer_state(instance):
+                return instance.pk in viewer_state.retweeted
+
             return Tweet.objects.filter(author=request.user, retweet=instance).cache().exists()
         else:
             return False
@@ -124,6 +169,9 @@ class TweetSerializer(serializers.ModelSerializer):
     def get_is_bookmarked(self, instance: Tweet):
         request = self.context.get('request', None)
         if request:
+            if viewer_state := self.get_viewer_state(instance):
+                return instance.pk in viewer_state.bookmarked
+
             return Bookmark.objects.is_bookmarked(user=request.user, instance=instance)
         else:
             return False
@@ -139,7 +187,7 @@ class TweetSerializer(serializers.ModelSerializer):
         body = attrs.get('body', None)
 
         if body:
-            body = BeautifulSoup(body, "lxml").text
+            body = strip_markup(body)
             attrs['body'] = body
 
         return super().validate(attrs)
@@ -162,25 +210,17 @@ class TweetSerializer(serializers.ModelSerializer):
             vote_instance = serializer.create(serializer.validated_data)
 
         tweet_instance = Tweet.objects.create(author=self.context['request'].user, vote=vote_instance, **validated_data)
+        UserStats.objects.tweet_created(tweet_instance)
 
-        saving_hashtags(tweet_instance)
-        saving_mentions(tweet_instance, self.context['request'].user)
-
-        if related_item_pk and related_item_content_type:
-            parts = related_item_content_type.split('_')
-
-            model_name = parts.pop()
-            app_label = '_'.join(parts)
+        related_item = (related_item_content_type, related_item_pk) \
+            if related_item_pk and related_item_content_type else None
 
-            if content_type := ContentType.objects.filter(app_label=app_label, model=model_name).cache(
-                    timeout=60 * 60 * 24 * 365).first():
-
-                item_class = content_type.model_class()
-
-                if item_class.objects.filter(pk=related_item_pk).first():
-                    tweet_instance.related_item_content_type = content_type
-                    tweet_instance.related_item_object_id = related_item_pk
-                    tweet_instance.save(update_fields=['related_item_content_type', 'related_item_object_id'])
+        transaction.on_commit(lambda: process_tweet(
+            tweet_id=tweet_instance.pk,
+            committed_at=time.time(),
+            stages=tuple(TWEET_STAGES),
+            related_item=related_item,
+        ))
 
         return tweet_instance
 
@@ -188,14 +228,13 @@ class TweetSerializer(serializers.ModelSerializer):
 
         validated_data.pop('vote', None)
 
-        older_mentions = MentionUsedInTweets.objects.filter(tweet=instance).values_list('pk', flat=True)
         instance.hashtags.clear()
 
-        removing_mentions(older_mentions)
-        saving_mentions(instance, self.context['request'].user)
-
         instance = super().update(instance, validated_data)
 
+        # the mentions are read from the entities of the updated body
+        saving_mentions(instance, self.context['request'].user)
+
         return instance
 
 
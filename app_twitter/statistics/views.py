@@ -10,6 +10,7 @@ from rest_framework.response import Response
 
 from app_like.models import Like
 from app_twitter.models import Tweet, Hashtag, Fellowship
+from app_twitter.tasks.pipeline import TWEET_STAGES, tweet_pipeline_latency
 from utilities.date import get_n_unit_ago
 
 
@@ -69,6 +70,7 @@ class TwitterStatistics(ListAPIView):
         return Response(data={
             'today': today_statistics,
             'thirty_days_ago': charts_data,
+            'tweet_pipeline': tweet_pipeline_latency.summary(('queue', *TWEET_STAGES, 'total')),
         })
 
 
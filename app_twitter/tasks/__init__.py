@@ -1,2 +1,6 @@
 from .pre_process import *
 from .notifications import *
+from .impressions import *
+from .trends import *
+from .autocomplete import *
+from .pipeline import *
@@ -0,0 +1,19 @@
+from celery import shared_task
+
+from app_twitter.autocomplete import Autocomplete
+
+
+@shared_task(name='build_autocomplete')
+def build_autocomplete():
+    """
+    start a new autocomplete generation and rebuild the snapshot, the processes remap it on their next refresh
+    :return: number of entries, None if another process is rebuilding the snapshot
+    """
+    Autocomplete.advance()
+
+    return Autocomplete.build()
+
+
+__all__ = [
+    'build_autocomplete',
+]
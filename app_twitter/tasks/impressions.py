@@ -0,0 +1,17 @@
+from celery import shared_task
+
+from app_twitter.impressions import views_count_buffer
+
+
+@shared_task(name='flush_views_count')
+def flush_views_count():
+    """
+    write the buffered tweet impressions to Tweet.views_count
+    :return:
+    """
+    return views_count_buffer.flush()
+
+
+__all__ = [
+    'flush_views_count',
+]
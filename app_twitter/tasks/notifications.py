@@ -1,44 +1,85 @@
 import pickle
+from collections import Counter
 
 from celery import shared_task
 from django.contrib.auth import get_user_model
-from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
 
-from app_notification.models import Notification
-from app_twitter.models import Mention, MutedUsers
+from app_notification.aggregation import notifications_aggregator
+from app_notification.models import Notification, NotificationInbox
+from app_notification.tasks import queue_notifications
+from app_twitter.models import Mention, MutedUsers, Tweet
+from utilities.content_types import content_types
 from utilities.decorators import pickle_input
-from utilities.text import mention_extractor
+from utilities.text import entity_texts
 
 User = get_user_model()
 
 
-def removing_mentions(object_id):
+def removing_mentions(tweet, users=None):
+    """
+    Delete the mentions of a tweet and their notifications
+    :param tweet:
+    :param users: pks of the mentioned users to remove, all of them by default
+    :return:
+    """
+    mentions = Mention.objects.filter(tweet=tweet)
+    if users is not None:
+        mentions = mentions.filter(mention_to__in=users)
+
     with transaction.atomic():
-        content_type = ContentType.objects.get(app_label='app_twitter', model='mention')
+        notifications = Notification.objects.filter(
+            type=Notification.NotificationsTypes.MENTION,
+            content_type=content_types.get_for_model(Tweet),
+            object_id=str(tweet.pk),
+            performed_on__in=mentions.values('mention_to'),
+        )
 
-        Notification.objects.filter(content_type=content_type,
-                                    object_id__in=object_id).delete()
+        unread = Counter(notifications.filter(read_at=None).values_list('performed_on', 'group'))
+        notifications.delete()
+        NotificationInbox.objects.add_unread({key: -count for key, count in unread.items()})
+
+        mentions.delete()
 
 
 def saving_mentions(instance, owner: User):
-    if type(instance.body) is str:
+    """
+    Sync the mentions of a tweet with its body, the users mentioned by an earlier
+    version of the tweet are not notified again.
+    :param instance:
+    :param owner:
+    :return:
+    """
+    if type(instance.body) is not str:
+        return
+
+    usernames = {username.lower() for username in entity_texts(instance.get_entities(), 'mentions')}
+
+    with transaction.atomic():
+        mentioned = set(Mention.objects.filter(tweet=instance).values_list('mention_to', flat=True))
+
+        users = set(User.objects.filter(username__in=usernames).exclude(pk=owner.pk).values_list('pk', flat=True))
 
-        with transaction.atomic():
-            mentions = mention_extractor(instance.body)
-            users = User.objects.filter(username__in=mentions)
+        if removed := mentioned - users:
+            removing_mentions(instance, removed)
 
-            content_type = ContentType.objects.get(model='mention')
+        new_users = users - mentioned
+        if not new_users:
+            return
 
-            for user in users:
-                Mention.objects.create(mention_by=owner, mention_to=user)
-                Notification.objects.create(
-                    performed_by=owner,
-                    performed_on=user,
-                    group=Notification.NotificationsGroups.TWITTER,
-                    content_type=content_type,
-                    object_id=instance.pk
-                )
+        Mention.objects.bulk_create([Mention(mention_by=owner, mention_to_id=user, tweet=instance)
+                                     for user in sorted(new_users)])
+
+        muters = set(MutedUsers.objects.filter(muter__in=new_users, muted=owner).values_list('muter', flat=True))
+        content_type = content_types.get_for_model(Tweet)
+
+        events = [
+            notifications_aggregator.event(user, owner.pk, Notification.NotificationsTypes.MENTION,
+                                           Notification.NotificationsGroups.TWITTER, content_type.pk, instance.pk)
+            for user in sorted(new_users - muters)
+        ]
+
+        transaction.on_commit(lambda: queue_notifications(events))
 
 
 @pickle_input
@@ -48,7 +89,8 @@ def saving_mentions(instance, owner: User):
              retry_kwargs={'max_retries': 5})
 def notify(self, instance, to: User, by: User, _type, parent_id=None):
     """
-    create a new notification
+    queue a notification, it is merged into the notification of the same receiver, type and
+    object within the aggregation window
     :param self:
     :param instance:
     :param to:
@@ -62,17 +104,13 @@ def notify(self, instance, to: User, by: User, _type, parent_id=None):
     by = pickle.loads(by)
     _type = pickle.loads(_type)
 
-    if not (to == by and not MutedUsers.objects.filter(muter=to, muted=by).cache().exists()):
-        content_type = ContentType.objects.get_for_model(instance)
+    if to == by or MutedUsers.objects.filter(muter=to, muted=by).cache().exists():
+        return
 
-        Notification.objects.create(
-            performed_on=to,
-            performed_by=by,
-            type=_type,
-            group=Notification.NotificationsGroups.TWITTER,
-            content_type=content_type,
-            object_id=instance.pk
-        )
+    queue_notifications([
+        notifications_aggregator.event(to.pk, by.pk, _type, Notification.NotificationsGroups.TWITTER,
+                                       content_types.get_for_model(instance).pk, instance.pk)
+    ])
 
 
 __all__ = [
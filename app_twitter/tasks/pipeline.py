@@ -0,0 +1,99 @@
+import logging
+import pickle
+import time
+
+from celery import shared_task
+
+from app_twitter.models import Tweet
+from app_twitter.tasks.notifications import saving_mentions
+from app_twitter.tasks.pre_process import saving_hashtags
+from app_twitter.timeline import HomeTimeline
+from utilities.decorators import pickle_input
+from utilities.content_types import content_types
+from utilities.metrics import LatencyRecorder
+
+logger = logging.getLogger(__name__)
+
+tweet_pipeline_latency = LatencyRecorder('pipeline:tweet')
+
+
+def link_related_item(tweet, related_item):
+    if not related_item:
+        return
+
+    related_item_content_type, related_item_pk = related_item
+
+    parts = related_item_content_type.split('_')
+
+    model_name = parts.pop()
+    app_label = '_'.join(parts)
+
+    if content_type := content_types.get(app_label, model_name):
+        item_class = content_type.model_class()
+
+        if item_class and item_class.objects.filter(pk=related_item_pk).first():
+            tweet.related_item_content_type = content_type
+            tweet.related_item_object_id = related_item_pk
+            tweet.save(update_fields=['related_item_content_type', 'related_item_object_id'])
+
+
+# a failed stage is run again, so every stage is idempotent: the hashtags and mentions already
+# linked to the tweet are skipped, and the related item and the timeline entries are overwritten
+TWEET_STAGES = {
+    'hashtags': lambda tweet, related_item: saving_hashtags(tweet),
+    'mentions': lambda tweet, related_item: saving_mentions(tweet, tweet.author),
+    'related_item': link_related_item,
+    'timeline': lambda tweet, related_item: HomeTimeline.fan_out(tweet),
+}
+
+
+@pickle_input
+@shared_task(bind=True, name='process_tweet', max_retries=5)
+def process_tweet(self, tweet_id, committed_at, stages, related_item):
+    """
+    run the stages of a newly committed tweet, a failed stage is retried with the stages after it.
+    Run synchronously, from the request committing the tweet, a failed stage is logged and skipped.
+    :param self:
+    :param tweet_id:
+    :param committed_at: unix time of the commit of the tweet
+    :param stages: names of the ``TWEET_STAGES`` to run
+    :param related_item: tuple of the content type name and the pk of the item the tweet is about
+    :return:
+    """
+    tweet_id = pickle.loads(tweet_id)
+    committed_at = pickle.loads(committed_at)
+    stages = pickle.loads(stages)
+    related_item = pickle.loads(related_item)
+
+    if self.request.retries == 0:
+        tweet_pipeline_latency.record('queue', (time.time() - committed_at) * 1000)
+
+    tweet = Tweet.objects.select_related('author').filter(pk=tweet_id).first()
+    if tweet is None:
+        return
+
+    for index, stage in enumerate(stages):
+        try:
+            with tweet_pipeline_latency(stage):
+                TWEET_STAGES[stage](tweet, related_item)
+
+        except Exception as exc:
+            if self.request.called_directly:
+                logger.exception('stage %s of tweet %s failed', stage, tweet_id)
+                continue
+
+            raise self.retry(exc=exc, countdown=2 ** self.request.retries, kwargs={
+                'tweet_id': pickle.dumps(tweet_id),
+                'committed_at': pickle.dumps(committed_at),
+                'stages': pickle.dumps(stages[index:]),
+                'related_item': pickle.dumps(related_item),
+            })
+
+    tweet_pipeline_latency.record('total', (time.time() - committed_at) * 1000)
+
+
+__all__ = [
+    'TWEET_STAGES',
+    'process_tweet',
+    'tweet_pipeline_latency',
+]
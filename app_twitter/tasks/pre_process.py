@@ -1,26 +1,34 @@
 from django.db import transaction
-from django.db.models import F
 
+from app_twitter.autocomplete import Autocomplete
 from app_twitter.models import Hashtag, HashtagsUsedInTweets
-from utilities.text import hashtag_extractor
+from app_twitter.trends import HashtagTrends
+from utilities.text import entity_texts, normalize_text
 
 
 def saving_hashtags(instance):
-    all_hashtag_used = list()
-
+    """
+    Link the hashtags of the tweet and count their usage, the hashtags already linked
+    by an earlier run are skipped so a retried run counts every hashtag once
+    :param instance:
+    :return:
+    """
     if type(instance.body) is str:
-        hashtags_set = hashtag_extractor(instance.body)
+        hashtags_set = entity_texts(instance.get_entities(), 'hashtags')
 
         with transaction.atomic():
-            for hashtag_name in hashtags_set:
-                complete_name = f'#{hashtag_name}'
-                hashtag, _ = Hashtag.objects.select_for_update().get_or_create(name=complete_name)
-                hashtag.usage_count = F('usage_count') + 1
-                hashtag.save()
-                all_hashtag_used.append(HashtagsUsedInTweets(tweet=instance, hashtag=hashtag))
-
-            if all_hashtag_used:
-                HashtagsUsedInTweets.objects.bulk_create(all_hashtag_used, batch_size=min(len(all_hashtag_used), 250))
+            linked = set(HashtagsUsedInTweets.objects.filter(tweet=instance)
+                         .values_list('hashtag__normalized_name', flat=True))
+
+            names = Hashtag.objects.increment_usage(f'#{hashtag_name}' for hashtag_name in hashtags_set
+                                                    if normalize_text(f'#{hashtag_name}') not in linked)
+
+            if names:
+                HashtagsUsedInTweets.objects.bulk_create([HashtagsUsedInTweets(tweet=instance, hashtag_id=name)
+                                                          for name in names], batch_size=250)
+
+                transaction.on_commit(lambda: HashtagTrends.record(names))
+                Autocomplete.add_hashtags(names)
 
 
 __all__ = [
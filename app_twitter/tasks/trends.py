@@ -0,0 +1,17 @@
+from celery import shared_task
+
+from app_twitter.trends import HashtagTrends
+
+
+@shared_task(name='publish_hashtag_trends')
+def publish_hashtag_trends():
+    """
+    rank the recently used hashtags and publish the trends of every timeframe
+    :return:
+    """
+    HashtagTrends.publish()
+
+
+__all__ = [
+    'publish_hashtag_trends',
+]
@@ -0,0 +1,11 @@
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+def create_user(username):
+    user = User.objects.create_user(username=username, password='x', email=f'{username}@x.com')
+    User.objects.filter(pk=user.pk).update(is_active=True)
+    user.is_active = True
+
+    return user
@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django_redis import get_redis_connection
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from app_twitter.management.views import AdminHashtagManagementViewSet, AdminTwitterManagementViewSet
+from app_twitter.models import Hashtag, Tweet
+
+User = get_user_model()
+
+
+class AdminSearchTest(TestCase):
+    """
+    The admin searches keep the order of the search, the default ordering only
+    applies without a search term.
+    """
+
+    def setUp(self):
+        get_redis_connection('default').flushdb()
+
+        self.admin = User.objects.create_superuser(username='admin', password='x', email='admin@x.com')
+
+    def list(self, viewset, field, **params):
+        request = APIRequestFactory().get('/', params)
+        force_authenticate(request, self.admin)
+
+        return [row[field] for row in viewset.as_view({'get': 'list'})(request).data['results']]
+
+    def test_tweets_are_ranked(self):
+        ranked = Tweet.objects.create(author=self.admin, body='django django django')
+        newer = Tweet.objects.create(author=self.admin, body='django and other words')
+
+        def tweets(**params):
+            return self.list(AdminTwitterManagementViewSet, 'id', author=self.admin.pk, **params)
+
+        self.assertEqual(tweets(), [newer.pk, ranked.pk])
+        self.assertEqual(tweets(search='django'), [ranked.pk, newer.pk])
+        self.assertEqual(tweets(search='django', ordering='-created_at'), [newer.pk, ranked.pk])
+
+    def test_hashtags_are_ranked(self):
+        Hashtag.objects.create(name='#django', normalized_name='#django')
+        Hashtag.objects.create(name='#djangocon_tehran', normalized_name='#djangocon_tehran')
+
+        self.assertEqual(self.list(AdminHashtagManagementViewSet, 'name', search='django')[:2],
+                         ['#django', '#djangocon_tehran'])
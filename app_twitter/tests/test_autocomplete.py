@@ -0,0 +1,44 @@
+import os
+import tempfile
+
+from django.test import TestCase, override_settings
+from django_redis import get_redis_connection
+
+from app_twitter.autocomplete import Autocomplete
+from app_twitter.tasks.autocomplete import build_autocomplete
+from app_twitter.tests import create_user
+
+
+class AutocompleteTest(TestCase):
+    def setUp(self):
+        get_redis_connection('default').flushdb()
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        self.path = os.path.join(directory.name, 'autocomplete.snapshot')
+        settings = override_settings(AUTOCOMPLETE_SNAPSHOT_PATH=self.path, AUTOCOMPLETE_OVERLAY_REFRESH=0)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.reset()
+        self.addCleanup(self.reset)
+
+    @staticmethod
+    def reset():
+        Autocomplete.snapshot, Autocomplete.snapshot_stat, Autocomplete.refreshed_at = None, None, None
+
+    def test_refresh_never_builds_the_snapshot(self):
+        create_user('autocompleted')
+
+        self.assertEqual(Autocomplete.complete('@autoc'), [])
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_built_snapshot_is_remapped(self):
+        user = create_user('autocompleted')
+
+        self.assertGreater(build_autocomplete(), 0)
+        self.assertEqual([payload['id'] for payload in Autocomplete.complete('@autoc')], [user.pk])
+        # the temporary file was renamed to the snapshot
+        self.assertEqual(sorted(os.listdir(os.path.dirname(self.path))),
+                         ['autocomplete.snapshot', 'autocomplete.snapshot.lock'])
@@ -0,0 +1,40 @@
+import time
+from unittest import mock
+
+from django.test import TestCase
+from django_redis import get_redis_connection
+
+from app_twitter.models import Mention, Tweet
+from app_twitter.tasks.pipeline import TWEET_STAGES, process_tweet
+from app_twitter.tests import create_user
+
+
+class TweetPipelineTest(TestCase):
+    def setUp(self):
+        get_redis_connection('default').flushdb()
+
+        self.author = create_user('author')
+        self.mentioned = create_user('mentioned')
+        self.tweet = Tweet.objects.create(author=self.author, body='#django #Django @mentioned')
+
+    def process(self, stages=tuple(TWEET_STAGES)):
+        with self.captureOnCommitCallbacks(execute=True):
+            process_tweet(tweet_id=self.tweet.pk, committed_at=time.time(), stages=stages, related_item=None)
+
+    def test_stages_are_idempotent(self):
+        self.process()
+        self.process()
+
+        self.assertEqual(list(self.tweet.hashtags.values_list('usage_count', flat=True)), [1])
+        self.assertEqual(Mention.objects.filter(tweet=self.tweet, mention_to=self.mentioned).count(), 1)
+
+    def test_failed_stage_is_logged_when_run_synchronously(self):
+        failing = mock.Mock(side_effect=RuntimeError('stage failed'))
+
+        with mock.patch.dict(TWEET_STAGES, hashtags=failing), \
+                self.assertLogs('app_twitter.tasks.pipeline', 'ERROR') as logs:
+            self.process(('hashtags', 'mentions'))
+
+        failing.assert_called_once()
+        self.assertIn('stage hashtags', logs.output[0])
+        self.assertTrue(Mention.objects.filter(tweet=self.tweet).exists())
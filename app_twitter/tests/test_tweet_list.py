@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django_redis import get_redis_connection
+from rest_framework.test import APIClient
+
+from app_twitter.models import Tweet
+from app_twitter.tests import create_user
+from app_vote.models import Choice, Vote
+
+
+class TweetListQueriesTest(TestCase):
+    """
+    The serialized tweet lists load their related rows with a fixed number of
+    queries, see ``TweetQuerySet.with_related``.
+    """
+
+    def setUp(self):
+        get_redis_connection('default').flushdb()
+
+        self.viewer = create_user('viewer')
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def create_tweets(self, count):
+        """
+        Plain tweets, retweets and tweets with a vote, each of another author
+        :param count:
+        :return:
+        """
+        start = Tweet.objects.count()
+
+        for index in range(start, start + count):
+            author = create_user(f'author{index}')
+
+            if index % 3 == 0:
+                Tweet.objects.create(author=author, body=f'tweet {index}')
+
+            elif index % 3 == 1:
+                Tweet.objects.create(author=author, retweet=Tweet.objects.create(author=author, body='retweeted'))
+
+            else:
+                vote = Vote.objects.create(owner=author, expire_date=timezone.now() + timedelta(days=1))
+                vote.choices.add(Choice.objects.create(title='yes'), Choice.objects.create(title='no'))
+                Tweet.objects.create(author=author, body=f'vote {index}', vote=vote)
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/tweets/', {'filter': 'global'})
+
+        self.assertEqual(response.status_code, 200)
+
+        return len(context.captured_queries), len(response.data['results'])
+
+    def test_query_count_does_not_grow_with_the_page(self):
+        self.create_tweets(3)
+        small, small_page = self.count_queries()
+
+        self.create_tweets(9)
+        large, large_page = self.count_queries()
+
+        self.assertGreater(large_page, small_page)
+        self.assertEqual(small, large)
+
+    def test_query_count(self):
+        self.create_tweets(6)
+
+        # the page, the vote choices, then the likes, bookmarks, retweets, mutes,
+        # followings and vote history of the viewer
+        with self.assertNumQueries(8):
+            self.client.get('/tweets/', {'filter': 'global'})
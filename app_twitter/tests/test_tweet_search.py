@@ -0,0 +1,54 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVector
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from app_twitter.models import Tweet
+from utilities.text import normalization_table, normalize_text
+
+User = get_user_model()
+
+
+class TweetSearchTest(TestCase):
+    """
+    The tweet search matches the spelling variants the normalized searches match,
+    the vectors are built from the bodies folded in sql like ``normalize_text``.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='x', email='author@x.com')
+
+    def search(self, term):
+        return list(Tweet.objects.search(term).filter(author=self.author).values_list('pk', flat=True))
+
+    def test_spelling_variants_match(self):
+        tweet = Tweet.objects.create(author=self.author, body='كتاب مي‌خوانم در ۱۴۰۲')
+
+        self.assertEqual(self.search('کتاب'), [tweet.pk])
+        self.assertEqual(self.search('میخوانم'), [tweet.pk])
+        self.assertEqual(self.search('می‌خوانم 1402'), [tweet.pk])
+        self.assertEqual(self.search('كِتاب'), [tweet.pk])
+
+    def test_sql_folding_matches_normalize_text(self):
+        body = ' '.join(chr(character) for character in normalization_table) + ' Latin WORDS'
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_tsvector('simple', tweet_search_text(%s))::text, "
+                           "to_tsvector('simple', %s)::text", [body, normalize_text(body)])
+            folded, normalized = cursor.fetchone()
+
+        self.assertEqual(folded, normalized)
+
+    def test_rebuild_builds_the_trigger_vectors(self):
+        tweet = Tweet.objects.create(author=self.author, body='يک كتاب')
+        vector = Tweet.objects.values_list('search_vector', flat=True).get(pk=tweet.pk)
+        # a vector of the raw body, as built before the folding
+        Tweet.objects.filter(pk=tweet.pk).update(search_vector=SearchVector('body', config=Tweet.SEARCH_CONFIG))
+
+        call_command('backfill_tweet_search_vector', rebuild=True, stdout=StringIO())
+
+        self.assertEqual(Tweet.objects.values_list('search_vector', flat=True).get(pk=tweet.pk), vector)
+        self.assertEqual(self.search('یک کتاب'), [tweet.pk])
@@ -0,0 +1,16 @@
+from django.db import connection
+from django.test import TestCase
+
+from app_twitter.models import UserStats
+
+
+class UserStatsLockTest(TestCase):
+    def test_lock_takes_any_bigint_user_id(self):
+        for user_id in (1, 2 ** 31 + 1, 2 ** 32 - 1):
+            UserStats.objects.lock(user_id)
+            UserStats.objects.lock(user_id + 1, shared=True)
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM pg_locks WHERE locktype = 'advisory' AND pid = pg_backend_pid()")
+
+            self.assertEqual(cursor.fetchone()[0], 6)
@@ -0,0 +1,295 @@
+import heapq
+from operator import itemgetter
+
+from django.conf import settings
+from django.db.models import Q
+from django_redis import get_redis_connection
+
+from app_twitter.exclusions import ExclusionSet
+from app_twitter.models import Tweet, Fellowship, UserStats
+from utilities.timing import ServerTiming
+
+
+class RedisTimeline:
+    """
+    A bounded redis sorted set of ``<tweet id>:<author id>`` members scored
+    by the tweet creation time.
+
+    The top member of a built timeline is always a sentinel (scored ``+inf``),
+    so an empty but built timeline can be told apart from a cold one.
+    """
+    KEY = None
+    SENTINEL = '-'
+
+    # pushes the (score, member) pairs into a timeline only if it is already built,
+    # cold timelines are built from the database on their first read.
+    PUSH_SCRIPT = """
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        return 0
+    end
+    local max_length = tonumber(ARGV[1])
+    for i = 2, #ARGV, 2 do
+        redis.call('ZADD', KEYS[1], ARGV[i], ARGV[i + 1])
+    end
+    redis.call('ZREMRANGEBYRANK', KEYS[1], 0, -(max_length + 2))
+    return 1
+    """
+
+    @classmethod
+    def key(cls, owner_id):
+        return cls.KEY.format(owner_id)
+
+    @staticmethod
+    def connection():
+        return get_redis_connection('default')
+
+    @classmethod
+    def push_script(cls, connection):
+        return connection.register_script(cls.PUSH_SCRIPT)
+
+    @staticmethod
+    def member(tweet_id, author_id):
+        return f'{tweet_id}:{author_id}'
+
+    @staticmethod
+    def parse_member(member):
+        tweet_id, author_id = member.decode().split(':')
+        return int(tweet_id), int(author_id)
+
+    @classmethod
+    def entries(cls, tweets):
+        """
+        Flatten ``(pk, author_id, created_at)`` rows into the arguments of the push script
+        :param tweets:
+        :return:
+        """
+        args = [settings.TIMELINE_MAX_LENGTH]
+        for pk, author_id, created_at in tweets:
+            args.extend((created_at.timestamp(), cls.member(pk, author_id)))
+
+        return args
+
+    @staticmethod
+    def eligible_tweets():
+        return Tweet.objects.filter(reply_to__isnull=True).order_by('-created_at') \
+            .values_list('pk', 'author_id', 'created_at')
+
+    @classmethod
+    def source(cls, owner_id):
+        """
+        The tweets of the timeline, as ``(pk, author_id, created_at)`` rows newest first
+        :param owner_id:
+        :return:
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def build(cls, owner_id):
+        """
+        Rebuild a (cold) timeline from the database
+        :param owner_id:
+        :return: list of (score, tweet id, author id) newest first
+        """
+        tweets = list(cls.source(owner_id)[:settings.TIMELINE_MAX_LENGTH])
+
+        key = cls.key(owner_id)
+
+        pipeline = cls.connection().pipeline()
+        pipeline.delete(key)
+        pipeline.zadd(key, {cls.SENTINEL: '+inf'})
+        if tweets:
+            pipeline.zadd(key, {cls.member(pk, author_id): created_at.timestamp()
+                                for pk, author_id, created_at in tweets})
+        pipeline.expire(key, settings.TIMELINE_TTL)
+        pipeline.execute()
+
+        return [(created_at.timestamp(), pk, author_id) for pk, author_id, created_at in tweets]
+
+    @classmethod
+    def read_many(cls, owner_ids):
+        """
+        Read several timelines in one round trip, building the cold ones
+        :param owner_ids:
+        :return: dict of owner id to list of (score, tweet id, author id) newest first
+        """
+        pipeline = cls.connection().pipeline()
+        for owner_id in owner_ids:
+            pipeline.zrevrange(cls.key(owner_id), 1, settings.TIMELINE_MAX_LENGTH, withscores=True)
+            pipeline.expire(cls.key(owner_id), settings.TIMELINE_TTL)
+        results = pipeline.execute()
+
+        timelines = dict()
+        for owner_id, members, exists in zip(owner_ids, results[::2], results[1::2]):
+            if exists:
+                timelines[owner_id] = [(score, *cls.parse_member(member)) for member, score in members]
+            else:
+                timelines[owner_id] = cls.build(owner_id)
+
+        return timelines
+
+
+class AuthorTimeline(RedisTimeline):
+    """
+    Recent tweets of the authors with more followers than ``TIMELINE_FAN_OUT_THRESHOLD``.
+
+    These authors are not fanned out on write, their tweets are merged into
+    the home timelines of their followers at read time. Once an author is
+    pulled it stays pulled, so no tweet goes missing from warm home timelines.
+    """
+    KEY = 'timeline:author:{}'
+    CELEBRITIES_KEY = 'timeline:celebrities'
+
+    @classmethod
+    def source(cls, owner_id):
+        return cls.eligible_tweets().filter(author_id=owner_id)
+
+    @classmethod
+    def is_pulled(cls, author):
+        """
+        Whether the tweets of the author are pulled by the readers instead of fanned out,
+        the followers are only counted for authors not known to be pulled yet.
+        :param author:
+        :return:
+        """
+        if cls.connection().sismember(cls.CELEBRITIES_KEY, author.pk):
+            return True
+
+        return UserStats.objects.for_user(author).followers_count >= settings.TIMELINE_FAN_OUT_THRESHOLD
+
+    @classmethod
+    def followed_by(cls, user):
+        """
+        Returns the ids of the pulled authors the user follows
+        :param user:
+        :return:
+        """
+        celebrities = cls.connection().smembers(cls.CELEBRITIES_KEY)
+
+        if not celebrities:
+            return []
+
+        return list(Fellowship.objects.filter(follower=user, following__in=[int(pk) for pk in celebrities])
+                    .values_list('following', flat=True))
+
+
+class HomeTimeline(RedisTimeline):
+    """
+    Materialized ``filter=following`` feed of the users, the tweets of the
+    user and of the followed authors below the fan-out threshold.
+    """
+    KEY = 'timeline:home:{}'
+
+    FAN_OUT_CHUNK_SIZE = 1000
+
+    @classmethod
+    def source(cls, owner_id):
+        followings = Fellowship.objects.filter(follower_id=owner_id).values('following')
+        return cls.eligible_tweets().filter(Q(author__in=followings) | Q(author_id=owner_id))
+
+    @classmethod
+    def tweet_ids(cls, user, timing=None):
+        """
+        Returns the tweet ids of the user's home timeline, newest first. The tweets
+        of the followed pulled authors are k-way merged into the pushed ones and
+        the tweets of blocked and muted authors are dropped.
+        :param user:
+        :param timing: ``ServerTiming`` to record the cost of every part of the merge
+        :return:
+        """
+        timing = timing or ServerTiming()
+
+        with timing('timeline-home'):
+            home = cls.read_many([user.pk])[user.pk]
+
+        with timing('timeline-pulled-authors'):
+            authors = AuthorTimeline.followed_by(user)
+
+        with timing('timeline-pulled-tweets'):
+            pulled = AuthorTimeline.read_many(authors) if authors else dict()
+
+        with timing('timeline-exclusions'):
+            excluded = ExclusionSet.excluded(user, [author_id for _, _, author_id in home] + authors)
+
+        with timing('timeline-merge'):
+            tweet_ids, seen = list(), set()
+
+            for _, tweet_id, author_id in heapq.merge(home, *pulled.values(), key=itemgetter(0), reverse=True):
+                if tweet_id not in seen and author_id not in excluded:
+                    seen.add(tweet_id)
+                    tweet_ids.append(tweet_id)
+
+                    if len(tweet_ids) == settings.TIMELINE_MAX_LENGTH:
+                        break
+
+        return tweet_ids
+
+    @classmethod
+    def fan_out(cls, tweet: Tweet):
+        """
+        Push a new tweet into the timelines of its author and the author's followers,
+        tweets of the pulled authors only go to their author timeline.
+        :param tweet:
+        :return:
+        """
+        if tweet.reply_to_id is not None:
+            return
+
+        connection = cls.connection()
+        script = cls.push_script(connection)
+        args = cls.entries([(tweet.pk, tweet.author_id, tweet.created_at)])
+
+        pipeline = connection.pipeline(transaction=False)
+        script(keys=[cls.key(tweet.author_id)], args=args, client=pipeline)
+
+        if AuthorTimeline.is_pulled(tweet.author):
+            pipeline.sadd(AuthorTimeline.CELEBRITIES_KEY, tweet.author_id)
+            script(keys=[AuthorTimeline.key(tweet.author_id)], args=args, client=pipeline)
+            pipeline.execute()
+            return
+
+        followers = Fellowship.objects.filter(following_id=tweet.author_id) \
+            .values_list('follower', flat=True).iterator(chunk_size=cls.FAN_OUT_CHUNK_SIZE)
+
+        for index, follower_id in enumerate(followers, start=1):
+            script(keys=[cls.key(follower_id)], args=args, client=pipeline)
+
+            if index % cls.FAN_OUT_CHUNK_SIZE == 0:
+                pipeline.execute()
+
+        pipeline.execute()
+
+    @classmethod
+    def merge_author(cls, user, author):
+        """
+        Merge the recent tweets of a newly followed author into the user's timeline
+        :param user:
+        :param author:
+        :return:
+        """
+        tweets = AuthorTimeline.source(author.pk)[:settings.TIMELINE_MAX_LENGTH]
+
+        connection = cls.connection()
+        cls.push_script(connection)(keys=[cls.key(user.pk)], args=cls.entries(tweets))
+
+    @classmethod
+    def purge_author(cls, user, author):
+        """
+        Remove the tweets of an unfollowed author from the user's timeline
+        :param user:
+        :param author:
+        :return:
+        """
+        key = cls.key(user.pk)
+        suffix = f':{author.pk}'.encode()
+
+        connection = cls.connection()
+        members = [member for member in connection.zrange(key, 0, -1) if member.endswith(suffix)]
+
+        if members:
+            connection.zrem(key, *members)
+
+
+__all__ = [
+    'HomeTimeline',
+    'AuthorTimeline',
+]
@@ -0,0 +1,201 @@
+import json
+import time
+
+import numpy as np
+from django.conf import settings
+from django_redis import get_redis_connection
+
+
+class Granularity:
+    def __init__(self, name, seconds, retention):
+        self.name = name
+        self.seconds = seconds
+        self.retention = retention
+
+    def bucket(self, timestamp):
+        return int(timestamp // self.seconds) * self.seconds
+
+    def key(self, bucket):
+        return f'trends:{self.name}:{bucket}'
+
+
+class Timeframe:
+    def __init__(self, granularity, buckets, half_life, recent):
+        """
+        :param granularity: the buckets the timeframe is computed from
+        :param buckets: length of the timeframe, in buckets
+        :param half_life: age in buckets at which a use weighs half of a current one
+        :param recent: the newest buckets the velocity is measured on
+        """
+        self.granularity = granularity
+        self.buckets = buckets
+        self.half_life = half_life
+        self.recent = recent
+
+    def bucket_starts(self, now):
+        """
+        Start times of the buckets of the timeframe, oldest first
+        :param now:
+        :return:
+        """
+        current = self.granularity.bucket(now)
+        return [current - index * self.granularity.seconds for index in range(self.buckets - 1, -1, -1)]
+
+
+class HashtagTrends:
+    """
+    Time-decayed trending hashtags.
+
+    Every use of a hashtag increments its counter in the current bucket of each
+    granularity, a bucket is a redis hash of ``hashtag -> uses`` expiring after
+    the longest timeframe built on it. A periodic task scores the hashtags of
+    every timeframe over the bucket matrix and publishes the top of the ranking,
+    so the trends endpoint is a single read.
+
+    The score is the exponentially decayed number of uses, boosted by the velocity,
+    the ratio of the recent rate of uses to the earlier rate of the timeframe.
+    """
+    TOP_KEY = 'trends:top:{}'
+
+    MINUTES = Granularity('5m', 60 * 5, 60 * 60 * 24 * 2)
+    HOURS = Granularity('1h', 60 * 60, 60 * 60 * 24 * 8)
+    DAYS = Granularity('1d', 60 * 60 * 24, 60 * 60 * 24 * 366)
+
+    GRANULARITIES = (MINUTES, HOURS, DAYS)
+
+    TIMEFRAMES = {
+        'd': Timeframe(MINUTES, buckets=12 * 24, half_life=12 * 6, recent=12),
+        'w': Timeframe(HOURS, buckets=24 * 7, half_life=24, recent=6),
+        'm': Timeframe(DAYS, buckets=30, half_life=7, recent=2),
+        'y': Timeframe(DAYS, buckets=365, half_life=60, recent=14),
+    }
+
+    @staticmethod
+    def connection():
+        return get_redis_connection('default')
+
+    @classmethod
+    def top_key(cls, timeframe):
+        return cls.TOP_KEY.format(timeframe)
+
+    @classmethod
+    def record(cls, names, timestamp=None):
+        """
+        Count a use of every given hashtag
+        :param names:
+        :param timestamp: time of the use, defaults to now
+        :return:
+        """
+        if not names:
+            return
+
+        timestamp = timestamp or time.time()
+
+        pipeline = cls.connection().pipeline(transaction=False)
+        for granularity in cls.GRANULARITIES:
+            key = granularity.key(granularity.bucket(timestamp))
+
+            for name in names:
+                pipeline.hincrby(key, name, 1)
+            pipeline.expire(key, granularity.retention)
+        pipeline.execute()
+
+    @classmethod
+    def matrix(cls, timeframe, now):
+        """
+        Read the buckets of a timeframe as a ``hashtags x buckets`` matrix of uses
+        :param timeframe:
+        :param now:
+        :return: tuple of the hashtag names and the matrix, buckets oldest first
+        """
+        pipeline = cls.connection().pipeline(transaction=False)
+        for bucket in timeframe.bucket_starts(now):
+            pipeline.hgetall(timeframe.granularity.key(bucket))
+        buckets = pipeline.execute()
+
+        names = dict()
+        for counts in buckets:
+            for name in counts:
+                names.setdefault(name, len(names))
+
+        uses = np.zeros((len(names), len(buckets)), dtype=np.float64)
+        for column, counts in enumerate(buckets):
+            if counts:
+                uses[[names[name] for name in counts], column] = [int(count) for count in counts.values()]
+
+        return [name.decode() for name in names], uses
+
+    @staticmethod
+    def score(timeframe, uses):
+        """
+        Score every row of the uses matrix
+        :param timeframe:
+        :param uses:
+        :return: array of scores
+        """
+        ages = np.arange(uses.shape[1] - 1, -1, -1, dtype=np.float64)
+        decayed = uses @ np.power(0.5, ages / timeframe.half_life)
+
+        recent, earlier = uses[:, -timeframe.recent:], uses[:, :-timeframe.recent]
+
+        recent_rate = recent.sum(axis=1) / recent.shape[1]
+        earlier_rate = (earlier.sum(axis=1) + 1) / max(earlier.shape[1], 1)
+        velocity = recent_rate / earlier_rate
+
+        return decayed * (1 + np.log1p(velocity))
+
+    @classmethod
+    def compute(cls, timeframe, now=None):
+        """
+        Rank the hashtags used in a timeframe
+        :param timeframe:
+        :param now:
+        :return: list of (name, uses in the timeframe), best first
+        """
+        timeframe = cls.TIMEFRAMES[timeframe]
+
+        names, uses = cls.matrix(timeframe, now or time.time())
+        if not names:
+            return []
+
+        scores = cls.score(timeframe, uses)
+        totals = uses.sum(axis=1)
+
+        size = min(settings.TRENDS_SIZE, len(names))
+        top = np.argpartition(-scores, size - 1)[:size]
+        top = top[np.argsort(-scores[top], kind='stable')]
+
+        return [(names[index], int(totals[index])) for index in top]
+
+    @classmethod
+    def publish(cls, now=None):
+        """
+        Compute and publish the trends of every timeframe
+        :param now:
+        :return:
+        """
+        now = now or time.time()
+
+        pipeline = cls.connection().pipeline()
+        for timeframe in cls.TIMEFRAMES:
+            pipeline.set(cls.top_key(timeframe), json.dumps(cls.compute(timeframe, now)))
+        pipeline.execute()
+
+    @classmethod
+    def top(cls, timeframe):
+        """
+        Returns the published trends of a timeframe
+        :param timeframe:
+        :return: list of (name, uses in the timeframe), or None if nothing is published yet
+        """
+        trends = cls.connection().get(cls.top_key(timeframe))
+
+        if trends is None:
+            return None
+
+        return [(name, count) for name, count in json.loads(trends)]
+
+
+__all__ = [
+    'HashtagTrends',
+]
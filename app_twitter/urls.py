@@ -34,6 +34,8 @@ urlpatterns = [
     path('search/', twitter_search, name='twitter_search'),
     path('search/usernames/', username_search_view, name='search_usernames'),
     path('search/hashtags/', hashtag_search_view, name='search_hashtags'),
+    path('search/autocomplete/', autocomplete, name='search_autocomplete'),
+    path('search/tweets/', tweet_search_view, name='search_tweets'),
 
     path('trends/hashtags/', hashtag_trends, name='trend_hashtags'),
     path('trends/profiles/', trend_profiles, name='trend_profiles'),
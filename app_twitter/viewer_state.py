@@ -0,0 +1,43 @@
+from app_bookmark.models import Bookmark
+from app_like.models import Like
+from app_twitter.models import Tweet, Fellowship, MutedUsers
+from app_vote.models import UserVoteHistory
+
+
+class ViewerState:
+    """
+    Relations of the requesting user with a page of tweets and their authors,
+    resolved with one ``IN`` query per relation instead of a few queries per row.
+    """
+
+    def __init__(self, user, tweets):
+        self.tweet_ids = {tweet.pk for tweet in tweets}
+        self.author_ids = {tweet.author_id for tweet in tweets}
+        self.vote_ids = {tweet.vote_id for tweet in tweets if tweet.vote_id}
+
+        self.liked = set(Like.objects.filter(user=user, is_dislike=False, tweet_id__in=self.tweet_ids)
+                         .values_list('tweet_id', flat=True))
+        self.bookmarked = set(Bookmark.objects.filter(user=user, tweet_id__in=self.tweet_ids)
+                              .values_list('tweet_id', flat=True))
+        self.retweeted = set(Tweet.objects.filter(author=user, retweet_id__in=self.tweet_ids)
+                             .values_list('retweet_id', flat=True))
+        self.muted = set(MutedUsers.objects.filter(muter=user, muted_id__in=self.author_ids)
+                         .values_list('muted_id', flat=True))
+        self.followed = set(Fellowship.objects.filter(follower=user, following_id__in=self.author_ids)
+                            .values_list('following_id', flat=True))
+        self.participated = dict(UserVoteHistory.objects.filter(user=user, vote_id__in=self.vote_ids)
+                                 .values_list('vote_id', 'choice_id')) if self.vote_ids else dict()
+
+    def covers_tweet(self, tweet):
+        return tweet.pk in self.tweet_ids
+
+    def covers_author(self, user):
+        return user.pk in self.author_ids
+
+    def covers_vote(self, vote):
+        return vote.pk in self.vote_ids
+
+
+__all__ = [
+    'ViewerState',
+]
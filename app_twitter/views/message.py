@@ -1,5 +1,6 @@
 from datetime import datetime
 
+from django.db import transaction
 from django.db.models import Q
 from django.utils.http import parse_http_date_safe
 from rest_framework import status
@@ -9,6 +10,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
+from app_notification.events import user_events
 from app_notification.models import Notification
 from app_twitter import permissions
 from app_twitter.models import Message, Conversation, MessagesInConversation
@@ -45,6 +47,12 @@ class SendPrivateMessageAPIView(CreateAPIView):
                by=request.user,
                _type=Notification.NotificationsTypes.MESSAGE)
 
+        transaction.on_commit(lambda: user_events.publish([(receiver.pk, 'message', {
+            'conversation': conversation.id,
+            'message': message.id,
+            'author': request.user.username,
+        })]))
+
         return Response(status=status.HTTP_200_OK, data={
             'id': conversation.id,
             'message': MessageSerializer(message).data,
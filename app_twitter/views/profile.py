@@ -2,8 +2,8 @@ from datetime import datetime
 
 from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.db.models import Count
-from django.utils.http import parse_http_date_safe
+from django.db.models import Count, OuterRef, Subquery
+from django.utils.http import parse_etags, parse_http_date_safe, quote_etag
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.generics import get_object_or_404, ListAPIView, RetrieveAPIView
@@ -12,12 +12,16 @@ from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
 from app_like.models import Like
-from app_notification.models import Notification
-from app_twitter.models import Fellowship, BlockList, Tweet, MutedUsers
+from app_notification.models import Notification, NotificationInbox
+from app_twitter.autocomplete import Autocomplete
+from app_twitter.exclusions import ExclusionSet
+from app_twitter.models import Fellowship, BlockList, Tweet, MutedUsers, UserStats
 from app_twitter.permissions import *
 from app_twitter.serializers.notifications import NotificationSerializer
 from app_twitter.serializers.profile import *
 from app_twitter.serializers.tweet import TweetSerializer
+from app_twitter.timeline import HomeTimeline
+from utilities.pagination import KeysetCursorPagination
 
 User = get_user_model()
 
@@ -53,6 +57,11 @@ class ProfileViewSet(ModelViewSet):
     def list(self, request, *args, **kwargs):
         return Response(status=status.HTTP_200_OK, data=self.get_serializer(request.user).data)
 
+    def perform_update(self, serializer):
+        user = serializer.save()
+
+        Autocomplete.add_user(user, UserStats.objects.for_user(user).followers_count)
+
     @transaction.atomic
     @action(methods=['patch'], detail=False, permission_classes=[
         IsAuthenticated,
@@ -79,6 +88,10 @@ class ProfileViewSet(ModelViewSet):
 
         _, result = Fellowship.objects.get_or_create(follower=request.user, following=following)
 
+        if result:
+            UserStats.objects.followed(request.user, following, True)
+            transaction.on_commit(lambda: HomeTimeline.merge_author(request.user, following))
+
         return Response(status=status.HTTP_202_ACCEPTED if result else status.HTTP_204_NO_CONTENT)
 
     @transaction.atomic
@@ -95,9 +108,13 @@ class ProfileViewSet(ModelViewSet):
         fellowship_instance = get_object_or_404(queryset=Fellowship.objects.select_for_update(), follower=request.user,
                                                 following=following)
         fellowship_instance.delete()
+        UserStats.objects.followed(request.user, following, False)
+
+        transaction.on_commit(lambda: HomeTimeline.purge_author(request.user, following))
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @transaction.atomic
     @action(methods=['put'], detail=True, permission_classes=[
         IsAuthenticated,
         UsernameIsActive,
@@ -113,8 +130,11 @@ class ProfileViewSet(ModelViewSet):
         if not blocked:
             instance.delete()
 
+        ExclusionSet.block(request.user, to_block, blocked)
+
         return Response(status=status.HTTP_200_OK, data={'blocked': blocked})
 
+    @transaction.atomic
     @action(methods=['put'], detail=True, permission_classes=[
         IsAuthenticated,
         UsernameIsActive,
@@ -129,6 +149,8 @@ class ProfileViewSet(ModelViewSet):
         if not muted:
             instance.delete()
 
+        ExclusionSet.mute(request.user, to_mute, muted)
+
         return Response(status=status.HTTP_200_OK, data={'muted': muted})
 
 
@@ -197,15 +219,21 @@ class ProfileStaticsAPIView(RetrieveAPIView):
         else:
             return super().get_permissions()
 
+    def retrieve(self, request, *args, **kwargs):
+        stats = UserStats.objects.for_user(self.get_object())
+
+        return Response(self.get_serializer(stats).data)
+
 
 class ProfileTweets(ListAPIView):
-    queryset = Tweet.objects.select_related('author').all()
+    queryset = Tweet.objects.with_related()
     permission_classes = [
         IsPrivate,
         IsBlocked,
         BlockedYou,
     ]
     serializer_class = TweetSerializer
+    pagination_class = KeysetCursorPagination
 
     lookup_field = 'username'
 
@@ -268,19 +296,16 @@ class ProfileNotificationsCount(ListAPIView):
     ]
 
     def list(self, request, *args, **kwargs):
-        if_modified_since = self.request.META.get('HTTP_IF_MODIFIED_SINCE')
-        if_modified_since = if_modified_since and parse_http_date_safe(if_modified_since)
+        count = NotificationInbox.objects.unread(user_id=self.request.user.pk,
+                                                 group=Notification.NotificationsGroups.TWITTER)
 
-        _datetime = None
+        # the response is the count alone, so the count is its entity tag
+        etag = quote_etag(str(count))
 
-        if if_modified_since:
-            _datetime = datetime.fromtimestamp(if_modified_since)
+        if etag in parse_etags(self.request.META.get('HTTP_IF_NONE_MATCH', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
 
-        count = Notification.objects.get_notification_count(user=self.request.user,
-                                                            from_date=_datetime,
-                                                            group=Notification.NotificationsGroups.TWITTER)
-
-        return Response(status=status.HTTP_200_OK, data={'count': count})
+        return Response(status=status.HTTP_200_OK, data={'count': count}, headers={'ETag': etag})
 
 
 class ProfileBlockedList(ListAPIView):
@@ -298,16 +323,24 @@ class ProfileBlockedList(ListAPIView):
         return User.objects.filter(pk__in=users)
 
 
+class LikedCursorPagination(KeysetCursorPagination):
+    ordering = ('-liked_at', '-pk')
+
+
 class ProfileLikedList(ListAPIView):
     queryset = Like.objects.none()
     serializer_class = AuthorSerializer
     permission_classes = [
         IsAuthenticated,
     ]
+    pagination_class = LikedCursorPagination
 
     def get_queryset(self):
-        return Tweet.objects.select_related('author').filter(
-            pk__in=Like.objects.get_liked_object_ids(user=self.request.user), author__is_private=False).cache()
+        likes = Like.objects.filter(user=self.request.user, is_dislike=False)
+        liked_at = likes.filter(tweet=OuterRef('pk')).values('created_at')[:1]
+
+        return Tweet.objects.with_related().filter(
+            pk__in=likes.values('tweet'), author__is_private=False).annotate(liked_at=Subquery(liked_at)).cache()
 
 
 class MostFollowedProfiles(ListAPIView):
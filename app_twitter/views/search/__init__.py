@@ -1,5 +1,4 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Q
 from rest_framework.generics import ListAPIView
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
@@ -7,7 +6,9 @@ from rest_framework.response import Response
 from app_twitter.models import Hashtag
 from app_twitter.serializers.profile import TwitterUsernameSearchResult
 from app_twitter.serializers.tweet import HashtagSerializer
+from app_twitter.views.search.autocomplete import AutocompleteAPIView
 from app_twitter.views.search.hashtags import SearchHashTags
+from app_twitter.views.search.tweets import SearchTweets
 from app_twitter.views.search.usernames import SearchUsernames
 
 User = get_user_model()
@@ -24,12 +25,11 @@ class SearchTwitter(ListAPIView):
         user_only = self.request.query_params.get('user_only', None)
         if search_term:
             hashtags_qs = []
-            users_qs = User.objects.filter(Q(fullname__icontains=search_term) | Q(username__icontains=search_term))[
-                       :self.MAX_RESULT_COUNT].only('username', 'fullname').cache()
+            users_qs = User.objects.search(search_term)[:self.MAX_RESULT_COUNT].only('username', 'fullname', 'avatar') \
+                .cache()
 
             if user_only != '1':
-                hashtags_qs = Hashtag.objects.filter(name__icontains=search_term)[:self.MAX_RESULT_COUNT].only(
-                    'name').cache()
+                hashtags_qs = Hashtag.objects.search(search_term)[:self.MAX_RESULT_COUNT].only('name').cache()
 
                 if len(hashtags_qs) + len(users_qs) > self.MAX_RESULT_COUNT:
                     if len(hashtags_qs) > len(users_qs):
@@ -60,9 +60,13 @@ class SearchTwitter(ListAPIView):
 hashtag_search_view = SearchHashTags.as_view()
 username_search_view = SearchUsernames.as_view()
 twitter_search = SearchTwitter.as_view()
+tweet_search_view = SearchTweets.as_view()
+autocomplete = AutocompleteAPIView.as_view()
 
 __all__ = [
     'hashtag_search_view',
     'username_search_view',
     'twitter_search',
+    'tweet_search_view',
+    'autocomplete',
 ]
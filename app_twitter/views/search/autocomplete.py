@@ -0,0 +1,30 @@
+from rest_framework.generics import GenericAPIView
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from app_twitter.autocomplete import Autocomplete
+
+
+class AutocompleteAPIView(GenericAPIView):
+    permission_classes = (AllowAny,)
+    MAX_RESULT_COUNT = 10
+
+    def get(self, request, *args, **kwargs):
+        search_term = request.query_params.get('q', None)
+        result = {
+            'hashtag': [],
+            'user': [],
+        }
+
+        if search_term and search_term.strip('@# '):
+            for item in Autocomplete.complete(search_term, limit=self.MAX_RESULT_COUNT):
+                if item['kind'] == Autocomplete.HASHTAG:
+                    result['hashtag'].append({'name': item['name']})
+                else:
+                    result['user'].append({
+                        'username': item['username'],
+                        'fullname': item['fullname'],
+                        'avatar': item['avatar'] and request.build_absolute_uri(item['avatar']),
+                    })
+
+        return Response(data=result)
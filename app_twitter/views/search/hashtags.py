@@ -14,6 +14,6 @@ class SearchHashTags(ListAPIView):
     def get_queryset(self):
         search_term = self.request.query_params.get('q')
         if search_term:
-            return super().get_queryset().filter(name__contains=search_term).cache()
+            return super().get_queryset().search(search_term).cache()
         else:
             return Hashtag.objects.none()
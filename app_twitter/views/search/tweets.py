@@ -0,0 +1,26 @@
+from rest_framework.generics import ListAPIView
+from rest_framework.permissions import AllowAny
+
+from app_twitter.models import Tweet
+from app_twitter.serializers.tweet import TweetSerializer
+from utilities.pagination import KeysetCursorPagination
+
+
+class SearchRankCursorPagination(KeysetCursorPagination):
+    ordering = ('-search_rank', '-pk')
+
+
+class SearchTweets(ListAPIView):
+    queryset = Tweet.objects.with_related()
+
+    serializer_class = TweetSerializer
+    permission_classes = (AllowAny,)
+    pagination_class = SearchRankCursorPagination
+
+    def get_queryset(self):
+        search_term = self.request.query_params.get('q')
+        if search_term:
+            return super().get_queryset().search(search_term) \
+                .visible_to(self.request.user).readable_by(self.request.user)
+        else:
+            return Tweet.objects.none()
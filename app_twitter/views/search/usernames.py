@@ -16,6 +16,6 @@ class SearchUsernames(ListAPIView):
     def get_queryset(self):
         search_term = self.request.query_params.get('q')
         if search_term:
-            return super().get_queryset().filter(username__icontains=search_term).cache()
+            return super().get_queryset().search(search_term).cache()
         else:
             return User.objects.none()
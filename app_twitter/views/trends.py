@@ -5,6 +5,7 @@ from rest_framework.permissions import AllowAny
 
 from app_twitter.models import Hashtag
 from app_twitter.serializers.hashtag import HashTagSerializer
+from app_twitter.trends import HashtagTrends
 from utilities.date import get_n_unit_ago
 
 
@@ -25,9 +26,16 @@ class SearchHashTags(ListAPIView):
         count = self.request.query_params.get('count', 20)
         time_frame = self.request.query_params.get('time_frame', 'w')
 
-        time_filter = self.TIMEFRAMES.get(time_frame, 'w')
+        if time_frame not in self.TIMEFRAMES:
+            time_frame = 'w'
 
-        queryset = super().get_queryset().filter(updated_at__gt=get_n_unit_ago(days=time_filter)).cache()
+        trends = HashtagTrends.top(time_frame)
+
+        if trends is not None:
+            queryset = [Hashtag(name=name, usage_count=usage_count) for name, usage_count in trends]
+        else:
+            queryset = super().get_queryset().filter(updated_at__gt=get_n_unit_ago(days=self.TIMEFRAMES[time_frame])) \
+                .cache()
 
         if count and type(count) is int:
             count = int(min(math.fabs(count), 20))
@@ -2,7 +2,6 @@ from datetime import datetime
 
 from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.db.models import Q
 from django.http import Http404
 from django.utils.http import parse_http_date_safe
 from rest_framework import status
@@ -15,12 +14,17 @@ from rest_framework.viewsets import ModelViewSet
 from app_bookmark.models import Bookmark
 from app_like.models import Like
 from app_notification.models import Notification
-from app_twitter.models import Tweet, Fellowship, BlockList, Hashtag, MutedUsers
+from app_twitter.impressions import impressions
+from app_twitter.models import Tweet, Hashtag, UserStats
 from app_twitter.permissions import *
 from app_twitter.serializers.hashtag import HashTagSerializer
 from app_twitter.serializers.profile import MinimalProfileSerializer
 from app_twitter.serializers.tweet import *
-from app_twitter.tasks.notifications import notify
+from app_twitter.tasks.notifications import notify, removing_mentions
+from app_twitter.timeline import HomeTimeline
+from utilities.pagination import KeysetCursorPagination
+from utilities.text import normalize_text
+from utilities.timing import ServerTiming
 
 User = get_user_model()
 
@@ -29,23 +33,16 @@ class TweetViewSet(ModelViewSet):
     queryset = Tweet.objects.timeline_tweets()
     serializer_class = TweetSerializer
     permission_classes = [IsOwnerOrReadOnly, IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+
+    timing = None
 
     def get_queryset(self):
         if self.action == 'retrieve':
-            return Tweet.objects.select_related('author').all()
+            return Tweet.objects.with_related()
 
         qs = super().get_queryset()
 
-        if self.request.user.is_authenticated:
-            blocked_profiles = BlockList.objects.filter(blocker=self.request.user).cache().values_list('blocked',
-                                                                                                       flat=True)
-            blocked_user = BlockList.objects.filter(blocked=self.request.user).cache().values_list('blocker',
-                                                                                                   flat=True)
-
-            muted_users = MutedUsers.objects.filter(muter=self.request.user).cache().values_list('muted',
-                                                                                                 flat=True)
-            qs = qs.filter(~Q(author__in=list(set(blocked_profiles) | set(blocked_user) | set(muted_users))))
-
         before = self.request.query_params.get('before', None)
         before = before and parse_http_date_safe(before)
         if before:
@@ -65,15 +62,48 @@ class TweetViewSet(ModelViewSet):
             search_term = self.request.query_params.get('q', None)
 
             if search_term:
-                return qs.filter(hashtags__name__contains=search_term).cache()
+                return qs.visible_to(self.request.user) \
+                    .filter(hashtags__normalized_name__contains=normalize_text(search_term)).cache()
 
         if self.request.user.is_authenticated and type(filter_by) is str and filter_by.lower() == 'following':
-            followings = Fellowship.objects.filter(follower=self.request.user).cache() \
-                .values_list('following', flat=True)
+            return qs.filter(pk__in=HomeTimeline.tweet_ids(self.request.user, timing=self.timing))
+
+        if self.request.user.is_authenticated and type(filter_by) is str and filter_by.lower() == 'mentions':
+            return Tweet.objects.with_related().mentioning(self.request.user) \
+                .readable_by(self.request.user).visible_to(self.request.user)
+
+        return qs.visible_to(self.request.user).cache()
+
+    def list(self, request, *args, **kwargs):
+        self.timing = ServerTiming()
+
+        response = super().list(request, *args, **kwargs)
+
+        if self.timing.metrics:
+            response['Server-Timing'] = self.timing.header()
+
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+
+        impressions.record([instance], request.user)
+
+        return Response(self.get_serializer(instance).data)
+
+    def paginate_queryset(self, queryset):
+        with self.timing('hydrate'):
+            page = super().paginate_queryset(queryset)
+
+        impressions.record(page, self.request.user)
 
-            return qs.filter(Q(author__in=followings) | Q(author=self.request.user)).cache()
+        return page
 
-        return qs.cache()
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        UserStats.objects.tweet_deleted(instance)
+        removing_mentions(instance)
+        instance.delete()
 
     def get_permissions(self):
         if self.action == 'create':
@@ -209,13 +239,14 @@ class TweetViewSet(ModelViewSet):
 
 
 class TweetMentions(RetrieveAPIView):
-    queryset = Tweet.objects.all()
+    queryset = Tweet.objects.with_related()
     permission_classes = [
         IsPrivate,
         IsBlocked,
         BlockedYou
     ]
     serializer_class = TweetSerializer
+    pagination_class = KeysetCursorPagination
 
     def check_object_permissions(self, request, obj):
         return super().check_object_permissions(request, obj.author)
@@ -223,18 +254,20 @@ class TweetMentions(RetrieveAPIView):
     def retrieve(self, request, *args, **kwargs):
         tweet = self.get_object()
 
-        return Response(TweetSerializer(self.get_queryset().filter(reply_to=tweet).cache(), many=True,
-                                        context={'request': request}).data)
+        page = self.paginate_queryset(self.get_queryset().filter(reply_to=tweet).cache())
+
+        return self.get_paginated_response(TweetSerializer(page, many=True, context={'request': request}).data)
 
 
 class TweetRetweets(RetrieveAPIView):
-    queryset = Tweet.objects.select_related('author').all().cache()
+    queryset = Tweet.objects.with_related().cache()
     permission_classes = [
         IsPrivate,
         IsBlocked,
         BlockedYou
     ]
     serializer_class = TweetSerializer
+    pagination_class = KeysetCursorPagination
 
     def check_object_permissions(self, request, obj):
         return super().check_object_permissions(request, obj.author)
@@ -244,9 +277,9 @@ class TweetRetweets(RetrieveAPIView):
 
         self.check_object_permissions(request, tweet)
 
-        return Response(
-            TweetSerializer(self.get_queryset().filter(body__isnull=True, retweet=tweet).cache(), many=True,
-                            context={'request': request}).data)
+        page = self.paginate_queryset(self.get_queryset().filter(body__isnull=True, retweet=tweet).cache())
+
+        return self.get_paginated_response(TweetSerializer(page, many=True, context={'request': request}).data)
 
 
 class TweetLikes(RetrieveAPIView):
@@ -309,9 +342,7 @@ class HashTagRetrieveView(RetrieveAPIView):
         if not name:
             raise Http404
 
-        filter_kwargs = {self.lookup_field: name}
-
-        hashtag = self.get_queryset().filter(**filter_kwargs)
+        hashtag = self.get_queryset().filter(normalized_name=normalize_text(name))
 
         if hashtag.exists():
             return hashtag.first()
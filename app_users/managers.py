@@ -1,14 +1,36 @@
 from django.conf import settings
 from django.contrib.auth.base_user import BaseUserManager
+from django.contrib.postgres.search import TrigramSimilarity
 from django.db import models
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
 from django.utils.translation import gettext_lazy as _
 
+from utilities.text import normalize_text
+
 
 class UserQuerySet(models.QuerySet):
 
     def activated(self):
         return self.filter(is_active=True)
 
+    def search(self, term):
+        """
+        Typo tolerant search on the normalized username and full name, served by their
+        trigram indexes and ordered by the similarity to the term, then by the followers count.
+        :param term:
+        :return:
+        """
+        term = normalize_text(term)
+
+        return self.filter(
+            Q(normalized_username__trigram_similar=term) | Q(normalized_fullname__trigram_similar=term) |
+            Q(normalized_username__contains=term) | Q(normalized_fullname__contains=term)
+        ).annotate(
+            similarity=Greatest(TrigramSimilarity('normalized_username', term),
+                                TrigramSimilarity('normalized_fullname', term)),
+        ).order_by('-similarity', F('stats__followers_count').desc(nulls_last=True), 'pk')
+
 
 class UserManager(BaseUserManager):
     def get_queryset(self):
@@ -49,6 +71,9 @@ class UserManager(BaseUserManager):
     def activated(self):
         return self.get_queryset().activated()
 
+    def search(self, term):
+        return self.get_queryset().search(term)
+
     def create_user(self, username, password, email=None, phone=None, **extra_fields):
         return self._create_user(username, password, False, False, False, email, phone, **extra_fields)
 
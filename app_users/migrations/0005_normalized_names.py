@@ -0,0 +1,80 @@
+# Generated by Django 4.0.4 on 2026-10-18 17:51
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+# frozen copy of ``utilities.text.normalize_text`` as of this migration, so a later change
+# of the normalizer never changes what the migration does
+normalization_table = str.maketrans({
+    **{character: 'ی' for character in 'يىئ'},
+    **{character: 'ک' for character in 'ك'},
+    **{character: 'ه' for character in 'ةۀ'},
+    **{character: 'ا' for character in 'أإٱ'},
+    **{character: 'و' for character in 'ؤ'},
+    **{character: str(digit) for digit, character in enumerate('۰۱۲۳۴۵۶۷۸۹')},
+    **{character: str(digit) for digit, character in enumerate('٠١٢٣٤٥٦٧٨٩')},
+    **{chr(code): None for code in range(0x064B, 0x0660)},
+    '\u0670': None,  # superscript alef
+    '\u0640': None,  # tatweel
+    '\u200c': None,  # zero-width non-joiner
+    '\u200d': None,  # zero-width joiner
+    '\u200e': None,  # left-to-right mark
+    '\u200f': None,  # right-to-left mark
+})
+
+
+def normalize_text(raw_text):
+    if raw_text is None:
+        return None
+
+    return ' '.join(raw_text.translate(normalization_table).casefold().split())
+
+
+def normalize_names(apps, schema_editor):
+    User = apps.get_model('app_users', 'User')
+
+    last_pk = 0
+
+    while users := list(User.objects.filter(pk__gt=last_pk).order_by('pk').only('username', 'fullname')[:1000]):
+        for user in users:
+            user.normalized_username = normalize_text(user.username)
+            user.normalized_fullname = normalize_text(user.fullname)
+
+        User.objects.bulk_update(users, ['normalized_username', 'normalized_fullname'])
+        last_pk = users[-1].pk
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('app_users', '0004_trigram_extension'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='normalized_fullname',
+            field=models.CharField(editable=False, max_length=384, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='normalized_username',
+            field=models.CharField(editable=False, max_length=78, null=True),
+        ),
+        migrations.RunPython(normalize_names, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='user',
+            index=models.Index(fields=['normalized_username'], name='user_normalized_username_index'),
+        ),
+        AddIndexConcurrently(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['normalized_username'], name='user_norm_username_trgm_index', opclasses=('gin_trgm_ops',)),
+        ),
+        AddIndexConcurrently(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['normalized_fullname'], name='user_norm_fullname_trgm_index', opclasses=('gin_trgm_ops',)),
+        ),
+    ]
@@ -2,12 +2,13 @@ import uuid
 
 from django.contrib.auth.base_user import AbstractBaseUser
 from django.contrib.auth.models import PermissionsMixin
-from django.contrib.postgres.indexes import HashIndex
+from django.contrib.postgres.indexes import GinIndex, HashIndex
 from django.db import models
 from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 
 from app_users.managers import UserManager
+from utilities.text import NORMALIZED_LENGTH_FACTOR, normalize_text
 
 
 def user_avatar_upload_path(instance, filename):
@@ -33,8 +34,10 @@ class User(AbstractBaseUser, PermissionsMixin):
     email = models.EmailField(_('email address'), unique=True, null=True)
     phone = models.CharField(_('mobile number'), max_length=11, unique=True, null=True)
     fullname = models.CharField(_('full name'), max_length=128, null=True)
+    normalized_fullname = models.CharField(max_length=128 * NORMALIZED_LENGTH_FACTOR, null=True, editable=False)
 
     username = models.CharField(_('username'), max_length=26, unique=True)
+    normalized_username = models.CharField(max_length=26 * NORMALIZED_LENGTH_FACTOR, null=True, editable=False)
     password = models.CharField(_('password'), max_length=128)
 
     avatar = models.ImageField(upload_to=user_avatar_upload_path, null=True, blank=True)
@@ -63,12 +66,29 @@ class User(AbstractBaseUser, PermissionsMixin):
             HashIndex(fields=('phone',)),
             HashIndex(fields=('email',)),
             HashIndex(fields=('username',)),
+            models.Index(fields=('normalized_username',), name='user_normalized_username_index'),
+            GinIndex(fields=('normalized_username',), opclasses=('gin_trgm_ops',), name='user_norm_username_trgm_index'),
+            GinIndex(fields=('normalized_fullname',), opclasses=('gin_trgm_ops',), name='user_norm_fullname_trgm_index'),
         ]
 
     def save(self, *args, **kwargs):
         if self.username:
             self.username = str.lower(self.username)
 
+        self.normalized_username = normalize_text(self.username)
+        self.normalized_fullname = normalize_text(self.fullname)
+
+        update_fields = kwargs.get('update_fields', None)
+        if update_fields is not None:
+            update_fields = set(update_fields)
+
+            if 'username' in update_fields:
+                update_fields.add('normalized_username')
+            if 'fullname' in update_fields:
+                update_fields.add('normalized_fullname')
+
+            kwargs['update_fields'] = update_fields
+
         return super().save(*args, **kwargs)
 
     @property
@@ -6,6 +6,7 @@ from rest_framework import exceptions, serializers
 from rest_framework.exceptions import ValidationError
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from app_twitter.autocomplete import Autocomplete
 from app_users.backends import PasswordAuthenticationBackend
 from app_users.serializers.userprofile import UserMetadataSerializer
 from utilities.validators import phone_number_validator
@@ -89,6 +90,8 @@ class UserRegisterSerializer(serializers.HyperlinkedModelSerializer):
         user_obj.set_password(validated_data.get('password'))
         user_obj.save()
 
+        Autocomplete.add_user(user_obj)
+
         return user_obj
 
 
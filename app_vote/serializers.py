@@ -54,8 +54,12 @@ class VoteSerializer(serializers.ModelSerializer):
     def get_participated(self, instance):
         user = self.context['request'].user
         if user.is_authenticated:
+            viewer_state = self.context.get('viewer_state', None)
+            if viewer_state and viewer_state.covers_vote(instance):
+                return viewer_state.participated.get(instance.pk, None)
+
             history = UserVoteHistory.objects.filter(vote=instance, user=user).cache().first()
-            return history.choice.id if history else None
+            return history.choice_id if history else None
         else:
             return None
 
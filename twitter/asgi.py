@@ -13,4 +13,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'twitter.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# imported once the apps are loaded
+from app_notification.streaming import EventStreamApplication  # noqa: E402
+
+application = EventStreamApplication(django_application, path='/events/')
@@ -122,6 +122,81 @@ CACHEOPS = {
 CACHEOPS_ENABLED = env.bool('CACHEOPS_ENABLED', default=False)
 RUNNING_TASK_ASYNC = env.bool('RUNNING_TASK_ASYNC', default=False)
 
+CELERY_BROKER_URL = env('CELERY_BROKER_URL', default=f'{REDIS_URL}/2')
+CELERY_BEAT_SCHEDULE = {
+    'flush-likes-count': {
+        'task': 'flush_likes_count',
+        'schedule': env.float('LIKES_COUNT_FLUSH_INTERVAL', default=10.0),
+    },
+    'flush-views-count': {
+        'task': 'flush_views_count',
+        'schedule': env.float('VIEWS_COUNT_FLUSH_INTERVAL', default=30.0),
+    },
+    'publish-hashtag-trends': {
+        'task': 'publish_hashtag_trends',
+        'schedule': env.float('TRENDS_PUBLISH_INTERVAL', default=60.0),
+    },
+    'build-autocomplete': {
+        'task': 'build_autocomplete',
+        'schedule': env.float('AUTOCOMPLETE_BUILD_INTERVAL', default=60.0 * 15),
+    },
+    'flush-notifications': {
+        'task': 'flush_notifications',
+        'schedule': env.float('NOTIFICATIONS_FLUSH_INTERVAL', default=60.0),
+    },
+}
+
+# a write-behind batch still around WRITE_BEHIND_RECOVERY_DELAY seconds after being taken was left behind by a
+# crashed flush and is applied by the next flush, the ids of the applied batches are kept WRITE_BEHIND_BATCHES_TTL
+WRITE_BEHIND_RECOVERY_DELAY = env.int('WRITE_BEHIND_RECOVERY_DELAY', default=60)
+WRITE_BEHIND_BATCHES_TTL = env.int('WRITE_BEHIND_BATCHES_TTL', default=60 * 60 * 24)
+
+# served tweets are buffered in memory and handed to redis every IMPRESSIONS_FLUSH_EVENTS impressions
+# or IMPRESSIONS_FLUSH_INTERVAL milliseconds, unique viewers are estimated with a hyperloglog per tweet
+IMPRESSIONS_FLUSH_EVENTS = env.int('IMPRESSIONS_FLUSH_EVENTS', default=500)
+IMPRESSIONS_FLUSH_INTERVAL = env.int('IMPRESSIONS_FLUSH_INTERVAL', default=1000)
+IMPRESSIONS_UNIQUE_VIEWERS = env.bool('IMPRESSIONS_UNIQUE_VIEWERS', default=True)
+# the unique viewers of a tweet are forgotten once it was not viewed for IMPRESSIONS_VIEWERS_TTL seconds
+IMPRESSIONS_VIEWERS_TTL = env.int('IMPRESSIONS_VIEWERS_TTL', default=60 * 60 * 24 * 30)
+
+# number of the published trending hashtags of every timeframe
+TRENDS_SIZE = env.int('TRENDS_SIZE', default=50)
+
+# memory-mapped autocomplete snapshot rebuilt by the build_autocomplete task every build interval, on a path the
+# web hosts share (or by the build_autocomplete command on every host), the processes only remap it. Entries
+# created since are copied from redis every AUTOCOMPLETE_OVERLAY_REFRESH seconds and kept AUTOCOMPLETE_OVERLAY_TTL
+AUTOCOMPLETE_SNAPSHOT_PATH = env('AUTOCOMPLETE_SNAPSHOT_PATH', default=str(BASE_DIR / 'var' / 'autocomplete.snapshot'))
+AUTOCOMPLETE_OVERLAY_REFRESH = env.float('AUTOCOMPLETE_OVERLAY_REFRESH', default=5.0)
+AUTOCOMPLETE_OVERLAY_TTL = env.int('AUTOCOMPLETE_OVERLAY_TTL', default=60 * 60 * 24)
+
+# durations kept per stage of the background pipelines for the latency percentiles
+LATENCY_SAMPLES = env.int('LATENCY_SAMPLES', default=1000)
+
+# notifications of a receiver, type and object within NOTIFICATIONS_AGGREGATION_WINDOW seconds share a row
+# keeping its NOTIFICATIONS_RECENT_ACTORS latest actors, the events are written NOTIFICATIONS_FLUSH_DEBOUNCE
+# seconds after the first of a burst
+NOTIFICATIONS_AGGREGATION_WINDOW = env.int('NOTIFICATIONS_AGGREGATION_WINDOW', default=60 * 60)
+NOTIFICATIONS_RECENT_ACTORS = env.int('NOTIFICATIONS_RECENT_ACTORS', default=5)
+NOTIFICATIONS_FLUSH_DEBOUNCE = env.float('NOTIFICATIONS_FLUSH_DEBOUNCE', default=2.0)
+# unread notifications counts are cached in redis for NOTIFICATIONS_INBOX_TTL seconds after being loaded
+NOTIFICATIONS_INBOX_TTL = env.int('NOTIFICATIONS_INBOX_TTL', default=60 * 60 * 24)
+
+# the notification and message events of every user are kept in a redis stream of about EVENTS_STREAM_LENGTH
+# entries for resuming, which expires after EVENTS_STREAM_TTL seconds without events. An open event stream gets a
+# keepalive comment every EVENTS_KEEPALIVE seconds and is closed once EVENTS_QUEUE_SIZE events are waiting for it
+EVENTS_STREAM_LENGTH = env.int('EVENTS_STREAM_LENGTH', default=100)
+EVENTS_STREAM_TTL = env.int('EVENTS_STREAM_TTL', default=60 * 60 * 24)
+EVENTS_KEEPALIVE = env.float('EVENTS_KEEPALIVE', default=15.0)
+EVENTS_QUEUE_SIZE = env.int('EVENTS_QUEUE_SIZE', default=100)
+
+# home timelines keep at most this many tweets and expire after being idle for TIMELINE_TTL seconds
+TIMELINE_MAX_LENGTH = env.int('TIMELINE_MAX_LENGTH', default=800)
+TIMELINE_TTL = env.int('TIMELINE_TTL', default=60 * 60 * 24 * 7)
+# tweets of authors with at least this many followers are merged into the home timelines at read time
+TIMELINE_FAN_OUT_THRESHOLD = env.int('TIMELINE_FAN_OUT_THRESHOLD', default=10_000)
+# the blocked and muted authors hidden from a viewer are cached and expire after being idle for EXCLUSIONS_TTL seconds
+EXCLUSIONS_TTL = env.int('EXCLUSIONS_TTL', default=60 * 60 * 24 * 7)
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
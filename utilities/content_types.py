@@ -0,0 +1,91 @@
+import threading
+
+from django.contrib.contenttypes.models import ContentType
+
+
+class ContentTypeRegistry:
+    """
+    In-process registry of the content types, mapping ``(app_label, model)``, the id
+    and the model class to each other. All the content types are loaded with one
+    query on the first lookup and handed to the cache of the ``ContentType`` manager
+    too, so the generic foreign keys are resolved without a query afterwards.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.by_natural_key = None
+        self.by_id = None
+
+    def warm(self):
+        """
+        Load all the content types, again if already loaded
+        :return:
+        """
+        with self.lock:
+            content_types = list(ContentType.objects.all())
+
+            for content_type in content_types:
+                ContentType.objects._add_to_cache(ContentType.objects.db, content_type)
+
+            self.by_id = {content_type.pk: content_type for content_type in content_types}
+            self.by_natural_key = {content_type.natural_key(): content_type for content_type in content_types}
+
+    def add(self, content_type):
+        with self.lock:
+            self.by_id[content_type.pk] = content_type
+            self.by_natural_key[content_type.natural_key()] = content_type
+
+    def get(self, app_label, model):
+        """
+        :param app_label:
+        :param model: lower case model name
+        :return: the content type, or None if there is no such model
+        """
+        if self.by_natural_key is None:
+            self.warm()
+
+        return self.by_natural_key.get((app_label, model))
+
+    def get_for_model(self, model):
+        """
+        :param model: model class or instance
+        :return: the content type of the concrete model, created if missing
+        """
+        opts = model._meta.concrete_model._meta
+
+        if content_type := self.get(opts.app_label, opts.model_name):
+            return content_type
+
+        content_type = ContentType.objects.get_for_model(model)
+        self.add(content_type)
+
+        return content_type
+
+    def get_for_id(self, pk):
+        if self.by_id is None:
+            self.warm()
+
+        if content_type := self.by_id.get(pk):
+            return content_type
+
+        content_type = ContentType.objects.get_for_id(pk)
+        self.add(content_type)
+
+        return content_type
+
+    def model_class(self, app_label, model):
+        """
+        :param app_label:
+        :param model: lower case model name
+        :return: the model class, or None if there is no such model
+        """
+        content_type = self.get(app_label, model)
+
+        return content_type and content_type.model_class()
+
+
+content_types = ContentTypeRegistry()
+
+__all__ = [
+    'content_types',
+]
@@ -0,0 +1,236 @@
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.timezone import now
+from django_redis import get_redis_connection
+
+from utilities.models import FlushedBatch
+
+
+def bulk_increment(model, field, deltas, batch_size=1000):
+    """
+    Apply ``{pk: delta}`` to a counter column with one ``UPDATE ... FROM (VALUES ...)``
+    statement per batch, counters never go below zero.
+    :param model:
+    :param field:
+    :param deltas:
+    :param batch_size:
+    :return: number of updated rows
+    """
+    quote = connection.ops.quote_name
+
+    table = quote(model._meta.db_table)
+    pk = quote(model._meta.pk.column)
+    column = quote(model._meta.get_field(field).column)
+
+    deltas = [(pk_value, delta) for pk_value, delta in deltas.items() if delta]
+    updated = 0
+
+    with connection.cursor() as cursor:
+        for index in range(0, len(deltas), batch_size):
+            batch = deltas[index:index + batch_size]
+
+            cursor.execute(
+                f'UPDATE {table} SET {column} = GREATEST({table}.{column} + v.delta, 0) '
+                f'FROM (VALUES {", ".join(["(%s, %s)"] * len(batch))}) AS v(id, delta) '
+                f'WHERE {table}.{pk} = v.id',
+                [value for row in batch for value in row],
+            )
+            updated += cursor.rowcount
+
+    return updated
+
+
+class BatchBuffer:
+    """
+    Write-behind buffer of database writes queued in a redis key, which a task
+    flushes to the database in bulk.
+
+    A flush renames the pending key to a key of its own batch, so overlapping
+    flushes never take the same writes. The batch is applied in a transaction
+    that also records its id, so a batch left behind by a crashed flush is
+    applied by a later flush at most once. The batch is removed once the
+    transaction commits, until then the readers keep adding its writes.
+    """
+
+    # moves the pending writes aside as a new batch, and registers the batch
+    TAKE_SCRIPT = """
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        return 0
+    end
+    redis.call('RENAME', KEYS[1], KEYS[2])
+    redis.call('ZADD', KEYS[3], ARGV[2], ARGV[1])
+    redis.call('SADD', KEYS[4], ARGV[1])
+    return 1
+    """
+
+    def __init__(self, pending_key):
+        self.pending_key = pending_key
+
+        # every batch not cleaned up yet, scored by the time it was taken
+        self.batches_key = f'{pending_key}:batches'
+        # the batches not applied yet, which the readers add to the database values
+        self.unapplied_key = f'{pending_key}:unapplied'
+
+    @staticmethod
+    def connection():
+        return get_redis_connection('default')
+
+    def batch_key(self, batch_id):
+        return f'{self.pending_key}:batch:{batch_id}'
+
+    def read(self, connection, key):
+        """
+        :param connection:
+        :param key: key of a batch
+        :return: the writes of the batch, empty if the batch is gone
+        """
+        raise NotImplementedError
+
+    def apply(self, writes):
+        """
+        Apply the writes of a batch, runs in the transaction recording the batch
+        :param writes: as returned by ``read``
+        :return: number of written rows
+        """
+        raise NotImplementedError
+
+    def take(self):
+        """
+        Move the pending writes aside as a new batch
+        :return: id of the batch, None if nothing is pending
+        """
+        batch_id = uuid.uuid4().hex
+
+        taken = self.connection().register_script(self.TAKE_SCRIPT)(
+            keys=[self.pending_key, self.batch_key(batch_id), self.batches_key, self.unapplied_key],
+            args=[batch_id, time.time()])
+
+        return batch_id if taken else None
+
+    def apply_batch(self, batch_id):
+        """
+        Apply a batch unless it was already applied, and clean it up
+        :param batch_id:
+        :return: number of written rows
+        """
+        writes = self.read(self.connection(), self.batch_key(batch_id))
+        written = 0
+
+        if not writes:
+            self.clean_up(batch_id)
+            return written
+
+        with transaction.atomic():
+            if FlushedBatch.objects.record(batch_id):
+                written = self.apply(writes)
+
+            # the readers keep adding the batch until its rows are committed, so a count never drops back
+            transaction.on_commit(lambda: self.clean_up(batch_id))
+
+        return written
+
+    def clean_up(self, batch_id):
+        """
+        Stop the readers adding an applied batch, and remove it
+        :param batch_id:
+        :return:
+        """
+        pipeline = self.connection().pipeline(transaction=False)
+        pipeline.srem(self.unapplied_key, batch_id)
+        pipeline.zrem(self.batches_key, batch_id)
+        pipeline.delete(self.batch_key(batch_id))
+        pipeline.execute()
+
+    def flush(self):
+        """
+        Apply the pending writes, and the batches of the flushes that did not finish
+        :return: number of written rows
+        """
+        connection = self.connection()
+
+        left_behind = connection.zrangebyscore(self.batches_key, '-inf',
+                                               time.time() - settings.WRITE_BEHIND_RECOVERY_DELAY)
+        batch_ids = [batch_id.decode() for batch_id in left_behind]
+
+        if batch_id := self.take():
+            batch_ids.append(batch_id)
+
+        written = sum(self.apply_batch(batch_id) for batch_id in batch_ids)
+
+        FlushedBatch.objects.filter(created_at__lt=now() - timedelta(seconds=settings.WRITE_BEHIND_BATCHES_TTL)) \
+            .delete()
+
+        return written
+
+
+class CounterBuffer(BatchBuffer):
+    """
+    Write-behind buffer of a counter column. Increments go to a redis hash of
+    pending deltas and a periodic task flushes them to the database in bulk.
+
+    Reads add the pending deltas, and those of the batches not applied yet,
+    to the database value.
+    """
+
+    # sums the deltas of the pks in the pending hash and in the unapplied batches
+    PENDING_SCRIPT = """
+    local totals = {}
+    for index, value in ipairs(redis.call('HMGET', KEYS[1], unpack(ARGV))) do
+        totals[index] = tonumber(value) or 0
+    end
+    for _, batch_id in ipairs(redis.call('SMEMBERS', KEYS[2])) do
+        for index, value in ipairs(redis.call('HMGET', KEYS[1] .. ':batch:' .. batch_id, unpack(ARGV))) do
+            totals[index] = totals[index] + (tonumber(value) or 0)
+        end
+    end
+    return totals
+    """
+
+    def __init__(self, model, field):
+        super().__init__(f'counters:{model._meta.label_lower}:{field}')
+
+        self.model = model
+        self.field = field
+
+    def add(self, pk, delta):
+        self.connection().hincrby(self.pending_key, pk, delta)
+
+    def add_many(self, deltas):
+        pipeline = self.connection().pipeline(transaction=False)
+        for pk, delta in deltas.items():
+            pipeline.hincrby(self.pending_key, pk, delta)
+        pipeline.execute()
+
+    def pending(self, pks):
+        """
+        Returns the deltas not yet written to the database
+        :param pks:
+        :return: dict of pk to delta, for every given pk
+        """
+        pks = list(pks)
+        if not pks:
+            return dict()
+
+        totals = self.connection().register_script(self.PENDING_SCRIPT)(
+            keys=[self.pending_key, self.unapplied_key], args=pks)
+
+        return dict(zip(pks, totals))
+
+    def read(self, connection, key):
+        deltas = connection.hgetall(key)
+
+        return {int(pk): int(delta) for pk, delta in deltas.items()}
+
+    def apply(self, writes):
+        return bulk_increment(self.model, self.field, writes)
+
+
+__all__ = [
+    'bulk_increment',
+    'BatchBuffer',
+    'CounterBuffer',
+]
@@ -0,0 +1,77 @@
+import random
+import re
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from utilities.text import extract_entities, normalize_text
+
+# persian words with their arabic spelling variants, diacritics, zero-width joiners and digits,
+# hashtags, mentions and urls, and the doubled markers the extractors skip
+WORDS = (
+    'کتاب', 'كتاب', 'می‌خواهم', 'ميخواهم', 'زندگی', 'زندگي', 'مدرسهٔ', 'مدرسة', 'عِلم', 'إيران',
+    'ایران', 'تهران', '۱۴۰۲', '١٤٠٢', 'Python', 'DJANGO', 'Straße', 'ﬁle', 'hello', 'world',
+    '#کتاب', '#Python', '#می‌خواهم', '@amir_h', '@ali.', '##done', 'https://example.com/tweets/42',
+    '(https://t.co/x1Y2).',
+)
+
+# the extractors replaced by extract_entities, a doubled marker fix-up and a search per entity kind
+legacy_hashtag_fix_pattern = re.compile('[#]{2}')
+legacy_hashtag_finder_pattern = re.compile(r"(?:^|\s)[＃#]([\w\u200c]+)", re.UNICODE)
+legacy_mention_fix_pattern = re.compile('[@]{2}')
+legacy_mention_finder_pattern = re.compile(r"(?:^|\s)[＠ @]([^\s#<>[\]|{}]+)", re.UNICODE)
+
+
+def legacy_extractors(raw_body):
+    hashtags = re.findall(pattern=legacy_hashtag_finder_pattern,
+                          string=re.sub(pattern=legacy_hashtag_fix_pattern, repl='', string=raw_body))
+    mentions = re.findall(pattern=legacy_mention_finder_pattern,
+                          string=re.sub(pattern=legacy_mention_fix_pattern, repl='', string=raw_body))
+
+    return set(hashtags), set(mentions)
+
+
+def generate_bodies(count, length, seed=0):
+    """
+    :param count:
+    :param length: number of characters of every body
+    :param seed:
+    :return: list of the generated bodies
+    """
+    generator = random.Random(seed)
+    bodies = []
+
+    for _ in range(count):
+        words = []
+        while sum(len(word) + 1 for word in words) < length:
+            words.append(generator.choice(WORDS))
+        bodies.append(' '.join(words)[:length])
+
+    return bodies
+
+
+class Command(BaseCommand):
+    help = 'Measure the throughput of the text functions of utilities.text on generated tweet bodies'
+
+    benchmarks = {
+        'normalize_text': normalize_text,
+        'legacy_extractors': legacy_extractors,
+        'extract_entities': extract_entities,
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bodies', type=int, default=2000, help='bodies of every length')
+        parser.add_argument('--lengths', type=int, nargs='+', default=[280, 1000, 5000])
+        parser.add_argument('--repeat', type=int, default=5, help='the best of this many runs is reported')
+
+    def handle(self, *args, **options):
+        for length in options['lengths']:
+            bodies = generate_bodies(options['bodies'], length)
+            size = sum(len(body.encode()) for body in bodies)
+
+            for name, function in self.benchmarks.items():
+                duration = min(timeit.repeat(lambda: [function(body) for body in bodies],
+                                             number=1, repeat=options['repeat']))
+
+                self.stdout.write(f'{name:>24} {length:>5} chars: {duration / len(bodies) * 1e6:8.1f} us/body '
+                                  f'{size / duration / 1e6:6.1f} MB/s')
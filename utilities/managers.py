@@ -0,0 +1,24 @@
+from django.db import connection, models
+
+
+class FlushedBatchManager(models.Manager):
+    def record(self, batch_id):
+        """
+        Record a write-behind batch as applied, in the transaction applying it. A batch being
+        applied by another transaction blocks the insert until that transaction ends.
+        :param batch_id:
+        :return: True if the batch was not applied yet
+        """
+        quote = connection.ops.quote_name
+
+        table = quote(self.model._meta.db_table)
+        pk = quote(self.model._meta.pk.column)
+        created_at = quote(self.model._meta.get_field('created_at').column)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} ({pk}, {created_at}) VALUES (%s, NOW()) ON CONFLICT ({pk}) DO NOTHING',
+                [batch_id],
+            )
+
+            return cursor.rowcount == 1
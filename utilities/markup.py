@@ -0,0 +1,160 @@
+import re
+from html.entities import name2codepoint
+
+# the characters the html parser drops, replaces or stops at, a body containing any
+# of them is left to beautiful soup
+unsafe_character_pattern = re.compile('[\x00-\x08\x0b-\x1f\x7f\ud800-\udfff\ufffe\uffff]')
+
+markup_start_pattern = re.compile('[<&]')
+
+start_tag_pattern = re.compile(
+    r'<([A-Za-z][A-Za-z0-9]*)'
+    r'(?:[ \t\n]+[A-Za-z_:][A-Za-z0-9_:.-]*'
+    r'(?:[ \t\n]*=[ \t\n]*(?:"[^"<&]*"|\'[^\'<&]*\'|[A-Za-z0-9_:./-]+))?)*'
+    r'[ \t\n]*/?>'
+)
+end_tag_pattern = re.compile(r'</([A-Za-z][A-Za-z0-9]*)[ \t\n]*>')
+reference_pattern = re.compile(r'&(?:#[xX]([0-9A-Fa-f]{1,6})|#([0-9]{1,7})|([A-Za-z][A-Za-z0-9]*));')
+
+# the tags whose text is kept as is, anything else, like script, style, comments or the
+# document structure tags, is left to beautiful soup
+stripped_tags = frozenset((
+    'a', 'abbr', 'acronym', 'address', 'b', 'bdo', 'big', 'blockquote', 'br', 'center', 'cite', 'code',
+    'dd', 'del', 'dfn', 'div', 'dl', 'dt', 'em', 'font', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i',
+    'img', 'ins', 'kbd', 'li', 'ol', 'p', 'q', 's', 'samp', 'small', 'span', 'strike', 'strong',
+    'sub', 'sup', 'tt', 'u', 'ul', 'var',
+))
+void_tags = frozenset(('br', 'hr', 'img'))
+
+# the html 4 entities known to the parser
+entities = {**{name: chr(code) for name, code in name2codepoint.items()}, 'apos': "'"}
+
+whitespace = ' \t\n'
+soup_whitespace = ' \t\n\x0c\r'
+
+
+class UnsupportedMarkup(Exception):
+    pass
+
+
+def _character(code):
+    if code in (0x9, 0xa) or 0x20 <= code < 0x7f or 0xa0 <= code < 0xd800 or \
+            0xe000 <= code < 0xfffe or 0x10000 <= code < 0x110000:
+        return chr(code)
+
+    raise UnsupportedMarkup
+
+
+def _string(parts):
+    string = ''.join(parts)
+
+    # beautiful soup replaces a whitespace-only string by a single newline or space
+    if string and not string.strip(soup_whitespace):
+        return '\n' if '\n' in string else ' '
+
+    return string
+
+
+def _strip_tags(body):
+    """
+    Streaming tag stripper, the strings between the tags are decoded and joined
+    :param body: body without its leading whitespace
+    :return:
+    :raise UnsupportedMarkup: if the body has markup the stripper does not reproduce
+    """
+    strings, parts, position = [], [], 0
+    opened = dict()
+
+    while match := markup_start_pattern.search(body, position):
+        start = match.start()
+        parts.append(body[position:start])
+
+        if body[start] == '&':
+            reference = reference_pattern.match(body, start)
+
+            if reference is None:
+                # the parser completes some of the references without their ';', which is not worth reproducing
+                following = body[start + 1:start + 2]
+                if following in ('', '#') or (following.isascii() and following.isalnum()):
+                    raise UnsupportedMarkup
+
+                parts.append('&')
+                position = start + 1
+                continue
+
+            hexadecimal, decimal, name = reference.groups()
+
+            if name is not None:
+                # the parser reads an unknown name as a known one it starts with, '&notit;' as '¬it;'
+                if name not in entities:
+                    raise UnsupportedMarkup
+
+                parts.append(entities[name])
+            else:
+                parts.append(_character(int(hexadecimal, 16) if hexadecimal else int(decimal)))
+
+            position = reference.end()
+            continue
+
+        following = body[start + 1:start + 2]
+
+        if following == '/':
+            tag = end_tag_pattern.match(body, start)
+        elif following.isascii() and following.isalpha():
+            tag = start_tag_pattern.match(body, start)
+        elif following in ('!', '?', ''):
+            raise UnsupportedMarkup
+        else:
+            parts.append('<')
+            position = start + 1
+            continue
+
+        if tag is None or (name := tag.group(1).lower()) not in stripped_tags:
+            raise UnsupportedMarkup
+
+        if following == '/':
+            # the parser recovers from a stray end tag in ways not worth reproducing
+            if not opened.get(name):
+                raise UnsupportedMarkup
+
+            opened[name] -= 1
+
+        elif name not in void_tags:
+            opened[name] = opened.get(name, 0) + 1
+
+        strings.append(_string(parts))
+        parts = []
+        position = tag.end()
+
+    parts.append(body[position:])
+    strings.append(_string(parts))
+
+    return ''.join(strings)
+
+
+def strip_markup(raw_body):
+    """
+    Text of a body as ``BeautifulSoup(raw_body, 'lxml').text`` returns it, the html
+    parser only runs for the markup the streaming stripper does not reproduce.
+    :param raw_body:
+    :return:
+    """
+    if not unsafe_character_pattern.search(raw_body) and not raw_body.startswith('\ufeff'):
+        body = raw_body.lstrip(whitespace)
+
+        if '<' not in body and '&' not in body:
+            return body
+
+        try:
+            return _strip_tags(body)
+        except UnsupportedMarkup:
+            pass
+
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(raw_body, 'lxml').text
+
+
+__all__ = [
+    'strip_markup',
+]
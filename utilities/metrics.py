@@ -0,0 +1,80 @@
+from contextlib import contextmanager
+from time import perf_counter
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+
+class LatencyRecorder:
+    """
+    Latency of the named stages of a background job. Every stage keeps its run
+    count and total duration, and its last ``LATENCY_SAMPLES`` durations for the
+    percentiles, in redis, so the metrics of all the workers are read together.
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+
+    @staticmethod
+    def connection():
+        return get_redis_connection('default')
+
+    @property
+    def totals_key(self):
+        return f'{self.prefix}:totals'
+
+    def samples_key(self, stage):
+        return f'{self.prefix}:samples:{stage}'
+
+    def record(self, stage, duration):
+        """
+        :param stage:
+        :param duration: in milliseconds
+        :return:
+        """
+        pipeline = self.connection().pipeline(transaction=False)
+        pipeline.hincrby(self.totals_key, f'{stage}:count', 1)
+        pipeline.hincrbyfloat(self.totals_key, f'{stage}:duration', duration)
+        pipeline.lpush(self.samples_key(stage), f'{duration:.3f}')
+        pipeline.ltrim(self.samples_key(stage), 0, settings.LATENCY_SAMPLES - 1)
+        pipeline.execute()
+
+    @contextmanager
+    def __call__(self, stage):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (perf_counter() - start) * 1000)
+
+    def summary(self, stages):
+        """
+        :param stages:
+        :return: dict of every stage to its count and its mean, median, 95th percentile
+                 and maximum duration in milliseconds
+        """
+        pipeline = self.connection().pipeline(transaction=False)
+        pipeline.hgetall(self.totals_key)
+        for stage in stages:
+            pipeline.lrange(self.samples_key(stage), 0, -1)
+        totals, *samples = pipeline.execute()
+
+        summary = dict()
+        for stage, durations in zip(stages, samples):
+            count = int(totals.get(f'{stage}:count'.encode(), 0))
+            durations = sorted(float(duration) for duration in durations)
+
+            summary[stage] = {
+                'count': count,
+                'mean': round(float(totals.get(f'{stage}:duration'.encode(), 0)) / count, 3) if count else None,
+                'p50': durations[len(durations) // 2] if durations else None,
+                'p95': durations[int(len(durations) * 0.95)] if durations else None,
+                'max': durations[-1] if durations else None,
+            }
+
+        return summary
+
+
+__all__ = [
+    'LatencyRecorder',
+]
@@ -1,3 +1,30 @@
 class LazyAuthenticationMixin:
     def perform_authentication(self, request):
         pass
+
+
+class SearchMixin:
+    """
+    Filters the queryset with its ``search`` method when the ``search`` query param is given.
+    The results keep the order of the search, the default ordering of ``OrderingFilter`` only
+    applies without a search term, an ``ordering`` query param still applies to both.
+    """
+
+    search_param = 'search'
+
+    def get_search_term(self):
+        return self.request.query_params.get(self.search_param, '').strip()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        if search_term := self.get_search_term():
+            return queryset.search(search_term)
+
+        return queryset
+
+    def filter_queryset(self, queryset):
+        if self.get_search_term():
+            self.ordering = None
+
+        return super().filter_queryset(queryset)
@@ -0,0 +1,17 @@
+from django.db import models
+
+from utilities.managers import FlushedBatchManager
+
+
+class FlushedBatch(models.Model):
+    """
+    A write-behind batch applied to the database, see utilities.counters.BatchBuffer
+    """
+    id = models.UUIDField(primary_key=True, editable=False)
+
+    created_at = models.DateTimeField(db_index=True)
+
+    objects = FlushedBatchManager()
+
+    def __str__(self):
+        return f'{self.id} flushed at {self.created_at}'
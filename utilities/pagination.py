@@ -0,0 +1,188 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from datetime import datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Keyset pagination over the ``ordering`` fields. The next and previous links
+    carry an opaque cursor with the position of the last (or first) row of the
+    page, so a page never runs a count query or an offset scan.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    ordering = ('-created_at', '-pk')
+
+    invalid_cursor_message = _('Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+
+        self.position, self.reverse = self.decode_cursor(request, queryset)
+
+        queryset = queryset.order_by(*self.get_ordering(self.reverse))
+        if self.position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(self.position, self.reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+
+        self.page = results[:self.page_size]
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.position is not None
+
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                },
+                'previous': {
+                    'type': 'string',
+                    'nullable': True,
+                },
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {
+                    'type': 'string',
+                },
+            },
+        ]
+
+    def get_ordering(self, reverse):
+        if not reverse:
+            return self.ordering
+
+        return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering)
+
+    def get_keyset_filter(self, position, reverse):
+        """
+        Rows strictly after the position in the page ordering, e.g. for ``(-created_at, -pk)``
+        ``created_at < t OR (created_at = t AND pk < id)``
+        :param position:
+        :param reverse:
+        :return:
+        """
+        condition = Q()
+
+        for index, field in enumerate(self.get_ordering(reverse)):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            q = Q(**{f'{field.lstrip("-")}__{lookup}': position[index]})
+
+            for previous, value in zip(self.ordering[:index], position):
+                q &= Q(**{previous.lstrip('-'): value})
+
+            condition |= q
+
+        return condition
+
+    def get_position(self, instance):
+        return [getattr(instance, field.lstrip('-')) for field in self.ordering]
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+
+        return self.encode_cursor(self.get_position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+
+        return self.encode_cursor(self.get_position(self.page[0]), reverse=True)
+
+    def encode_cursor(self, position, reverse):
+        position = [value.isoformat() if isinstance(value, datetime) else value for value in position]
+        cursor = json.dumps({'p': position, 'r': int(reverse)}, separators=(',', ':'))
+        cursor = urlsafe_b64encode(cursor.encode()).decode()
+
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    @staticmethod
+    def get_ordering_field(queryset, name):
+        """
+        :param queryset:
+        :param name: name of a model field or an annotation of the queryset
+        :return: the field the values of ``name`` are converted with
+        """
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+
+        try:
+            return queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return queryset.model._meta.pk if name == 'pk' else None
+
+    def decode_cursor(self, request, queryset):
+        """
+        :param request:
+        :param queryset: the paginated queryset, its fields validate the position values
+        :return: the position and the direction of the cursor, ``(None, False)`` without one
+        """
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+
+        try:
+            cursor = json.loads(urlsafe_b64decode(cursor.encode()).decode())
+            position, reverse = cursor['p'], cursor['r']
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.ordering) or reverse not in (0, 1):
+            raise NotFound(self.invalid_cursor_message)
+
+        values = []
+
+        for field_name, value in zip(self.ordering, position):
+            field = self.get_ordering_field(queryset, field_name.lstrip('-'))
+
+            # a value of another type is a tampered cursor, it must not reach the query
+            if field is None or isinstance(value, bool) or not isinstance(value, (str, int, float)):
+                raise NotFound(self.invalid_cursor_message)
+
+            try:
+                values.append(field.to_python(value))
+            except (TypeError, ValueError, OverflowError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        return values, bool(reverse)
+
+
+__all__ = [
+    'KeysetCursorPagination',
+]
@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django_redis import get_redis_connection
+
+from app_like.counters import likes_count_buffer
+from app_twitter.models import Tweet
+
+User = get_user_model()
+
+
+class CounterBufferTest(TestCase):
+    def setUp(self):
+        get_redis_connection('default').flushdb()
+
+        author = User.objects.create_user(username='author', password='x', email='author@x.com')
+        self.tweet = Tweet.objects.create(author=author, body='tweet')
+
+    def value(self):
+        self.tweet.refresh_from_db()
+
+        return self.tweet.likes_count + likes_count_buffer.pending([self.tweet.pk])[self.tweet.pk]
+
+    def test_overlapping_flushes_take_separate_batches(self):
+        likes_count_buffer.add(self.tweet.pk, 3)
+        first = likes_count_buffer.take()
+
+        likes_count_buffer.add(self.tweet.pk, 2)
+        second = likes_count_buffer.take()
+
+        self.assertNotEqual(first, second)
+        self.assertEqual(self.value(), 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            likes_count_buffer.apply_batch(second)
+            likes_count_buffer.apply_batch(first)
+
+        self.assertEqual(self.value(), 5)
+
+    def test_batch_is_applied_once(self):
+        likes_count_buffer.add(self.tweet.pk, 4)
+        batch_id = likes_count_buffer.take()
+        key = likes_count_buffer.batch_key(batch_id)
+        writes = likes_count_buffer.read(likes_count_buffer.connection(), key)
+
+        # a flush applying the batch while another one already did
+        with self.captureOnCommitCallbacks(execute=True):
+            likes_count_buffer.apply_batch(batch_id)
+        get_redis_connection('default').hset(key, mapping={str(pk): delta for pk, delta in writes.items()})
+
+        self.assertEqual(likes_count_buffer.apply_batch(batch_id), 0)
+        self.assertEqual(self.value(), 4)
+
+    def test_batch_is_pending_until_committed(self):
+        likes_count_buffer.add(self.tweet.pk, 2)
+        batch_id = likes_count_buffer.take()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            likes_count_buffer.apply_batch(batch_id)
+
+        # applied, not committed yet
+        self.assertEqual(likes_count_buffer.pending([self.tweet.pk]), {self.tweet.pk: 2})
+
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(likes_count_buffer.pending([self.tweet.pk]), {self.tweet.pk: 0})
+        self.assertEqual(self.value(), 2)
+
+    @override_settings(WRITE_BEHIND_RECOVERY_DELAY=-1)
+    def test_left_behind_batch_is_recovered(self):
+        likes_count_buffer.add(self.tweet.pk, 1)
+        likes_count_buffer.take()
+
+        self.assertEqual(self.value(), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(likes_count_buffer.flush(), 1)
+        self.assertEqual(self.value(), 1)
+        self.assertEqual(self.tweet.likes_count, 1)
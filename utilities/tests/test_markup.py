@@ -0,0 +1,113 @@
+import random
+import warnings
+
+from bs4 import BeautifulSoup
+from django.test import SimpleTestCase
+
+from utilities.markup import UnsupportedMarkup, _strip_tags, strip_markup
+
+CORPUS = (
+    '',
+    'plain text',
+    '  \n leading whitespace',
+    'trailing whitespace \n ',
+    'سلام دنیا #کتاب @amir_h',
+    '<b>bold</b> and <i>italic</i>',
+    '<p>first</p>\n<p>second</p>',
+    '<a href="https://example.com/?a=1&amp;b=2" title=\'x\'>link</a>',
+    '<a href=https://example.com/path>unquoted</a>',
+    'line<br>break<br/>and<br />more',
+    '<div> <span> </span>\n</div>',
+    '<ul><li>one</li><li>two</li></ul>',
+    '<img src="a.png" alt="a"> image',
+    '1 < 2 and 3 > 2',
+    'a <- b',
+    'a < b > c',
+    '<3',
+    '<b>unclosed',
+    'stray</b> end tag',
+    '<B>upper</B> case',
+    '<script>alert(1)</script>text',
+    '<style>p {}</style>text',
+    '<!-- comment -->text',
+    '<!DOCTYPE html><p>doctype</p>',
+    '<?xml version="1.0"?>text',
+    '<html><body>document</body></html>',
+    '<unknown>tag</unknown>',
+    '<table><tr><td>cell</td></tr></table>',
+    '<p>nested <b>bold <i>italic</i></b></p>',
+    'fish &amp; chips',
+    'fish & chips',
+    'a &&& b',
+    '&lt;b&gt;escaped&lt;/b&gt;',
+    '&quot;quoted&quot; &apos;single&apos;',
+    '&copy; &nbsp; &eacute; &hellip;',
+    '&copy',
+    '&copy text',
+    '1 &lt 2',
+    '&ampx',
+    '&notit;',
+    '&unknown;',
+    '&unknown',
+    '&#65;&#x42;&#X43;',
+    '&#65',
+    '&#x41 text',
+    '&#0;',
+    '&#1;',
+    '&#128;',
+    '&#xD800;',
+    '&#x10FFFF;',
+    '&#x110000;',
+    '&#12345678;',
+    '&#;',
+    '&#x;',
+    '&',
+    'text &',
+    '\x00null',
+    '\x0bvertical tab',
+    '\r\ncarriage return',
+    '\x0cform feed',
+    '﻿byte order mark',
+    'emoji 🐍 <b>🐍</b>',
+    '<b title="&amp;">attribute reference</b>',
+    '<b title="a<b">lt in attribute</b>',
+)
+
+# fragments of generated bodies, combined at random to reach the cases the corpus misses
+FRAGMENTS = (
+    'text', ' ', '\n', 'سلام', '#tag', '@user', '<b>', '</b>', '<i>', '</i>', '<p>', '</p>', '<br>',
+    '<br/>', '<span class="x">', '</span>', '<a href="https://example.com">', '</a>', '&amp;', '&lt;',
+    '&gt;', '&nbsp;', '&copy', '&#65;', '&#65', '&#x41;', '&', '<', '>', '<3', '&unknown;', '"', "'",
+)
+
+
+class StripMarkupTest(SimpleTestCase):
+    """
+    ``strip_markup`` returns the text beautiful soup returns, on a corpus of the markup
+    the streaming stripper handles and of the markup it leaves to beautiful soup.
+    """
+
+    def assertSameText(self, body):
+        with warnings.catch_warnings():
+            # beautiful soup warns about the bodies looking like a file name or an xml document
+            warnings.simplefilter('ignore')
+
+            self.assertEqual(strip_markup(body), BeautifulSoup(body, 'lxml').text, repr(body))
+
+    def test_corpus(self):
+        for body in CORPUS:
+            self.assertSameText(body)
+
+    def test_streaming_stripper_coverage(self):
+        for body in ('<b>bold</b> &amp; <a href="https://example.com">link</a><br>', 'a < b', 'fish & chips'):
+            self.assertEqual(_strip_tags(body), BeautifulSoup(body, 'lxml').text)
+
+        for body in ('&copy', '1 &lt 2', '&#65', '&notit;', '<script>x</script>', 'stray</b>'):
+            with self.assertRaises(UnsupportedMarkup):
+                _strip_tags(body)
+
+    def test_generated_bodies(self):
+        generator = random.Random(0)
+
+        for _ in range(2000):
+            self.assertSameText(''.join(generator.choices(FRAGMENTS, k=generator.randint(1, 20))))
@@ -0,0 +1,48 @@
+from django.test import SimpleTestCase
+
+from utilities.text import NORMALIZED_LENGTH_FACTOR, extract_entities, hashtag_extractor, mention_extractor, \
+    normalize_text
+
+
+class NormalizeTextTest(SimpleTestCase):
+    def test_spelling_variants_share_a_key(self):
+        self.assertEqual(normalize_text('كتاب'), normalize_text('کتاب'))
+        self.assertEqual(normalize_text('می‌خواهم'), normalize_text('ميخواهم'))
+        self.assertEqual(normalize_text('عِلم'), normalize_text('علم'))
+        self.assertEqual(normalize_text('۱۴۰۲'), normalize_text('١٤٠٢'))
+        self.assertEqual(normalize_text('Django  Straße'), 'django strasse')
+
+    def test_normalized_length_is_bounded(self):
+        for text in ('ß' * 26, 'ﬃ' * 26, 'ΐ' * 26):
+            self.assertLessEqual(len(normalize_text(text)), len(text) * NORMALIZED_LENGTH_FACTOR)
+
+
+class ExtractEntitiesTest(SimpleTestCase):
+    def test_entities_with_offsets(self):
+        body = 'سلام #کتاب و #Python، @amir_h. (https://example.com/a?b=1).'
+
+        self.assertEqual(extract_entities(body), {
+            'hashtags': [['کتاب', 5, 10], ['Python', 13, 20]],
+            'mentions': [['amir_h', 22, 29]],
+            'urls': [['https://example.com/a?b=1', 32, 57]],
+        })
+
+        for kind, entities in extract_entities(body).items():
+            for text, start, end in entities:
+                self.assertIn(text, body[start:end])
+
+    def test_markers_start_a_word(self):
+        self.assertEqual(hashtag_extractor('a#b #c#d'), {'c'})
+        self.assertEqual(mention_extractor('mail@example.com @bob@host'), {'bob'})
+
+    def test_runs_of_markers_are_not_entities(self):
+        # the doubled markers were deleted before the search, which left an entity of
+        # the odd runs, a run of markers of any length is now never one
+        for body in ('##foo', '###foo', '####foo'):
+            self.assertEqual(hashtag_extractor(body), set())
+        for body in ('@@bob', '@@@bob'):
+            self.assertEqual(mention_extractor(body), set())
+
+    def test_empty_body(self):
+        self.assertEqual(extract_entities(''), {'hashtags': [], 'mentions': [], 'urls': []})
+        self.assertEqual(extract_entities(None), {'hashtags': [], 'mentions': [], 'urls': []})
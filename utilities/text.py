@@ -1,20 +1,90 @@
 import re
 
-hashtag_fix_pattern = re.compile('[#]{2}')
-hashtag_finder_pattern = re.compile(r"(?:^|\s)[＃#](\w+)", re.UNICODE)
-mention_fix_pattern = re.compile('[@]{2}')
-mention_finder_pattern = re.compile(r"(?:^|\s)[＠ @]([^\s#<>[\]|{}]+)", re.UNICODE)
+# hashtags and mentions start a word, and the punctuation closing a sentence is not part
+# of a mention or an url. A marker following another one is not an entity, so a run of
+# markers (``##foo``, ``###foo``) is never one. Before the single scan the doubled
+# markers were deleted first, which left ``#foo`` of an odd run such as ``###foo``.
+# The leading lookahead lets the scan skip the characters no entity starts with.
+entity_pattern = re.compile(
+    r"(?=[＃#＠@h])(?:"
+    r"(?<!\S)[＃#](?P<hashtags>[\w\u200c]+)"
+    r"|(?<!\S)[＠@](?P<mentions>[^\s#＃@＠<>[\]|{}]*[^\s#＃@＠<>[\]|{}'.,:;!?)])"
+    r"|(?P<urls>https?://[^\s<>\"]*[^\s<>\"'.,:;!?)\]])"
+    r")",
+    re.UNICODE,
+)
 
+ENTITY_KINDS = ('hashtags', 'mentions', 'urls')
+
+
+def extract_entities(raw_body):
+    """
+    Hashtags, mentions and urls of a text, found in one scan
+    :param raw_body:
+    :return: dict of every entity kind to a list of ``[text, start, end]``, the text of a hashtag
+             or a mention is without its marker and the offsets are the character offsets of the
+             whole entity in the body
+    """
+    entities = {kind: [] for kind in ENTITY_KINDS}
+
+    if raw_body:
+        for match in entity_pattern.finditer(raw_body):
+            kind = match.lastgroup
+            entities[kind].append([match.group(kind), match.start(), match.end()])
+
+    return entities
+
+
+def entity_texts(entities, kind):
+    """
+    :param entities: as returned by ``extract_entities``
+    :param kind: one of ``ENTITY_KINDS``
+    :return: set of the distinct texts of the kind
+    """
+    return {text for text, _, _ in (entities or {}).get(kind, ())}
 
-def hashtag_extractor(raw_body):
-    hashtags = re.findall(pattern=hashtag_finder_pattern,
-                          string=re.sub(pattern=hashtag_fix_pattern, repl='', string=raw_body))
 
-    return set(hashtags)
+def hashtag_extractor(raw_body):
+    return entity_texts(extract_entities(raw_body), 'hashtags')
 
 
 def mention_extractor(raw_body):
-    mentions = re.findall(pattern=mention_finder_pattern,
-                          string=re.sub(pattern=mention_fix_pattern, repl='', string=raw_body))
+    return entity_texts(extract_entities(raw_body), 'mentions')
+
+
+# arabic letter variants folded to their persian form, digits to ascii and the
+# diacritics, tatweel and zero-width joiners dropped
+normalization_table = str.maketrans({
+    **{character: 'ی' for character in 'يىئ'},
+    **{character: 'ک' for character in 'ك'},
+    **{character: 'ه' for character in 'ةۀ'},
+    **{character: 'ا' for character in 'أإٱ'},
+    **{character: 'و' for character in 'ؤ'},
+    **{character: str(digit) for digit, character in enumerate('۰۱۲۳۴۵۶۷۸۹')},
+    **{character: str(digit) for digit, character in enumerate('٠١٢٣٤٥٦٧٨٩')},
+    **{chr(code): None for code in range(0x064B, 0x0660)},
+    '\u0670': None,  # superscript alef
+    '\u0640': None,  # tatweel
+    '\u200c': None,  # zero-width non-joiner
+    '\u200d': None,  # zero-width joiner
+    '\u200e': None,  # left-to-right mark
+    '\u200f': None,  # right-to-left mark
+})
+
+
+# casefolding turns a character into at most three, e.g. 'ΐ', the columns of the
+# normalized texts are this many times longer than the columns of the texts
+NORMALIZED_LENGTH_FACTOR = 3
+
+
+def normalize_text(raw_text):
+    """
+    Search key of a text, the spelling variants of persian and arabic text and the case
+    variants of latin text share a key.
+    :param raw_text:
+    :return:
+    """
+    if raw_text is None:
+        return None
 
-    return set(mentions)
+    return ' '.join(raw_text.translate(normalization_table).casefold().split())
@@ -0,0 +1,23 @@
+from contextlib import contextmanager
+from time import perf_counter
+
+
+class ServerTiming:
+    """
+    Collects the duration of the named steps of a request, rendered
+    as a ``Server-Timing`` response header.
+    """
+
+    def __init__(self):
+        self.metrics = []
+
+    @contextmanager
+    def __call__(self, name):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.metrics.append((name, (perf_counter() - start) * 1000))
+
+    def header(self):
+        return ', '.join(f'{name};dur={duration:.2f}' for name, duration in self.metrics)